@@ -0,0 +1,98 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Compare compile times with grammars rebuilt for every parse,
+with cached grammars, and with cached grammars plus packrat.
+
+Usage: python benchmarks/bench_grammar.py
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+import warnings
+
+import pyparsing as pp
+
+from honeybee.comb_to_xlsform import survey, choices
+from honeybee.comb_to_xlsform.grammar import enable_packrat
+
+from synthetic import write_project
+
+
+EXAMPLE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, "example", "survey.hcs")
+
+
+def compile_file(filename):
+    with open(filename) as f:
+        return survey.compile_survey(
+            f.read(), os.path.dirname(filename))
+
+
+def use_grammars(functions):
+    """Make every honeybee module that has one of the grammar
+    functions by name use the function of that name in `functions`."""
+
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("honeybee."):
+            continue
+
+        for function_name, function in functions.items():
+            if hasattr(module, function_name):
+                setattr(module, function_name, function)
+
+
+def time_compile(filename, repeat):
+    return min(timeit.repeat(
+        lambda: compile_file(filename), number=1, repeat=repeat))
+
+
+def main():
+    warnings.simplefilter("ignore")
+
+    cached = {"parse_survey": survey.parse_survey,
+              "parse_choices": choices.parse_choices}
+    rebuilt = {name: function.__wrapped__
+               for name, function in cached.items()}
+
+    with tempfile.TemporaryDirectory() as directory:
+        forms = (
+            ("example/survey.hcs", EXAMPLE, 50),
+            ("synthetic, 100 includes", write_project(directory), 5))
+
+        print(f"{'form':<28}{'rebuilt':>10}{'cached':>10}{'packrat':>10}")
+
+        for label, filename, repeat in forms:
+            use_grammars(rebuilt)
+            rebuilt_seconds = time_compile(filename, repeat)
+
+            use_grammars(cached)
+            cached_seconds = time_compile(filename, repeat)
+
+            enable_packrat()
+            packrat_seconds = time_compile(filename, repeat)
+            pp.ParserElement.disable_memoization()
+
+            print(f"{label:<28}{rebuilt_seconds:>9.3f}s"
+                  f"{cached_seconds:>9.3f}s{packrat_seconds:>9.3f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
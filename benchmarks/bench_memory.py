@@ -0,0 +1,79 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Compare the peak memory of beepile with and without --stream on
+synthetic projects of growing size.  Each compile runs in its own
+process, which reports its own peak resident size.
+
+Usage: python benchmarks/bench_memory.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import openpyxl
+
+from synthetic import write_project
+
+
+COMPILE = (
+    "import resource, sys\n"
+    "from honeybee.comb_to_xlsform import main\n"
+    "main(sys.argv[1], sys.argv[2], no_cache=True,"
+    " stream=sys.argv[3] == 'stream')\n"
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n")
+
+
+def peak_memory(filename, output, mode):
+    "Return the seconds and peak resident MB of one compile."
+
+    start = time.perf_counter()
+
+    result = subprocess.run(
+        [sys.executable, "-c", COMPILE, filename, output, mode],
+        check=True, capture_output=True, text=True)
+
+    # ru_maxrss is in kilobytes on Linux.
+    #
+    return (time.perf_counter() - start,
+            int(result.stdout.split()[-1]) / 1024)
+
+
+def main():
+    print(f"{'includes':>8}{'rows':>8}"
+          f"{'buffered':>18}{'stream':>18}")
+
+    for includes in (100, 400, 1600, 6400):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = write_project(directory, includes, 20)
+            output = os.path.join(directory, "survey.xlsx")
+
+            results = [peak_memory(filename, output, mode)
+                       for mode in ("buffered", "stream")]
+
+            workbook = openpyxl.load_workbook(output, read_only=True)
+            rows = sum(1 for row in workbook["survey"].iter_rows()) - 1
+
+        print(f"{includes:>8}{rows:>8}" + "".join(
+            f"{seconds:>8.2f}s{mb:>8.1f}MB" for seconds, mb in results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Compare the line-based preprocess_indent with the regular
+expression that it replaced.
+
+Usage: python benchmarks/bench_preprocess.py
+"""
+
+import sys
+import timeit
+
+from honeybee.comb_to_xlsform.preprocess import (
+    preprocess_indent, preprocess_indent_regex)
+
+from synthetic import synthetic_survey
+
+
+def long_labels(questions):
+    "Questions whose labels and hints run over many long lines."
+
+    return "".join(
+        f"q{index} text:\n"
+        f'    "{"word " * 400}"\n'
+        f'    hint "{"x" * 1000}"\n'
+        for index in range(questions))
+
+
+def long_names(questions):
+    "Long lines that start with a long word and have no colon."
+
+    return "".join(
+        f'{"n" * 300}{index} text "{"y" * 3000}"\n'
+        for index in range(questions))
+
+
+def time_preprocess(function, code, repeat=3):
+    return min(timeit.repeat(
+        lambda: function(code), number=1, repeat=repeat))
+
+
+def main():
+    inputs = (
+        ("synthetic survey", synthetic_survey(800, 3)),
+        ("long labels", long_labels(2000)),
+        ("long names", long_names(1000)))
+
+    print(f"{'input':<20}{'lines':>8}{'regex':>10}{'lines':>10}")
+
+    for label, code in inputs:
+        assert preprocess_indent(code) == preprocess_indent_regex(code)
+
+        print(f"{label:<20}{code.count(chr(10)):>8}"
+              f"{time_preprocess(preprocess_indent_regex, code):>9.3f}s"
+              f"{time_preprocess(preprocess_indent, code):>9.3f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
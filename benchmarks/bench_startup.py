@@ -0,0 +1,91 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Measure how long beepile and beelint take to start: the import
+time of their modules from `python -X importtime`, and the wall time
+of short commands.
+
+Usage: python benchmarks/bench_startup.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+RUNS = 10
+
+EXAMPLE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "example",
+    "survey.hcs")
+
+ENTRY_POINTS = {
+    "beepile": "from honeybee.comb_to_xlsform import dispatch; dispatch()",
+    "beelint": "from honeybee.lint import dispatch; dispatch()"}
+
+
+def import_time(module):
+    "Return the cumulative import time of `module` in milliseconds."
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True, capture_output=True, text=True)
+
+    for line in result.stderr.splitlines():
+        if line.split("|")[-1].strip() == module:
+            return int(line.split("|")[1]) / 1000
+
+
+def wall_time(command, *arguments):
+    "Return the fastest of RUNS runs of a command, in milliseconds."
+
+    times = []
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", ENTRY_POINTS[command], *arguments],
+            check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+
+    return min(times) * 1000
+
+
+def main():
+    for module in ("honeybee.comb_to_xlsform", "honeybee.lint"):
+        print(f"import {module:<43}{import_time(module):8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        xform = os.path.join(directory, "survey.xml")
+        xlsx = os.path.join(directory, "survey.xlsx")
+
+        commands = [
+            ("beepile", "--help"),
+            ("beepile", EXAMPLE, "-o", xform, "--format", "xform"),
+            ("beepile", EXAMPLE, "-o", xlsx),
+            ("beelint", xlsx)]
+
+        for command, *arguments in commands:
+            name = " ".join([command] + [
+                os.path.basename(argument) for argument in arguments])
+            print(f"{name:<50}{wall_time(command, *arguments):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
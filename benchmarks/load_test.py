@@ -0,0 +1,138 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Send concurrent compile requests to `beepile serve` and report the
+throughput and latency, next to the time of one `beepile` process.
+
+Usage: python benchmarks/load_test.py [--requests N] [--concurrency C]
+           [--workers W] [--url URL]
+
+Without --url, the script writes a synthetic project and starts a
+server on it.  With --url, the server must already serve a root that
+contains such a project in `load_test/`.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from synthetic import write_project
+
+
+def post(url, code, format):
+    "Send one compile request and return its seconds."
+
+    body = json.dumps({"code": code, "include_path": "load_test",
+                       "format": format}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/compile", body, {"Content-Type": "application/json"})
+
+    start = time.perf_counter()
+
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+    return time.perf_counter() - start
+
+
+def start_server(root, workers):
+    "Start a server on a free port and return it with its URL."
+
+    server = subprocess.Popen(
+        [sys.executable, "-c",
+         "from honeybee.comb_to_xlsform import dispatch; dispatch()",
+         "serve", "--root", root, "--port", "0",
+         "--workers", str(workers)],
+        stdout=subprocess.PIPE, text=True)
+
+    return server, server.stdout.readline().split()[-1]
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, len(latencies) * p // 100)]
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument("--requests", type=int, default=200)
+    arguments.add_argument("--concurrency", type=int, default=8)
+    arguments.add_argument("--workers", type=int, default=os.cpu_count())
+    arguments.add_argument("--format", default="xlsx")
+    arguments.add_argument("--url")
+    options = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        os.mkdir(f"{root}/load_test")
+        filename = write_project(
+            f"{root}/load_test", includes=20, blocks=20)
+
+        with open(filename) as f:
+            code = f.read()
+
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c",
+             "from honeybee.comb_to_xlsform import dispatch; dispatch()",
+             filename, "-o", f"{root}/out.{options.format}",
+             "--format", options.format, "--no-cache"],
+            check=True)
+        process_time = time.perf_counter() - start
+
+        server = None
+        url = options.url
+
+        if url is None:
+            server, url = start_server(root, options.workers)
+
+        try:
+            first = post(url, code, options.format)
+
+            start = time.perf_counter()
+
+            with concurrent.futures.ThreadPoolExecutor(
+                    options.concurrency) as pool:
+                latencies = sorted(pool.map(
+                    lambda _: post(url, code, options.format),
+                    range(options.requests)))
+
+            seconds = time.perf_counter() - start
+
+            with urllib.request.urlopen(f"{url}/stats") as response:
+                stats = json.load(response)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    print(f"beepile process: {process_time * 1000:8.1f} ms")
+    print(f"first request:   {first * 1000:8.1f} ms")
+    print(f"throughput:      {options.requests / seconds:8.1f} requests/s")
+
+    for p in (50, 95, 99):
+        print(f"latency p{p}:     {percentile(latencies, p) * 1000:8.1f} ms")
+
+    print(f"server stats:    {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Benchmark each phase of beepile and beelint on synthetic projects
+and compare the results with a stored baseline.
+
+Usage: python benchmarks/suite.py [--save] [--baseline FILE]
+           [--threshold RATIO] [-k SUBSTRING]
+
+Each case is timed as the median of several runs, with the median
+absolute deviation of the runs as its spread, and its peak memory is
+measured with tracemalloc in a run of its own.  Without --save, a
+case is a regression, and the suite exits with status 1, if its
+peak memory exceeds the threshold times the baseline, or if its time
+exceeds the threshold times the baseline plus a few times the
+spreads of both, after it is measured again a few times.
+
+Baselines depend on the machine, so none is committed: save one with
+--save on the machine that runs the comparison, before the change to
+measure.  Without a baseline, the results are only printed.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from honeybee.comb_to_xlsform.choices import parse_choices_code
+from honeybee.comb_to_xlsform.common import substitute_macros
+from honeybee.comb_to_xlsform.preprocess import preprocess_indent
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import (
+    compile_survey, parse_survey_code)
+from honeybee.comb_to_xlsform.xform import write_xform
+from honeybee.comb_to_xlsform.xlsx import write_xlsx
+from honeybee.lint_batch import lint_file
+from honeybee.xlsx_reader import open_workbook
+
+from synthetic import generate_project
+
+
+BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# The projects that each case runs on, as options of generate_project.
+#
+PROJECTS = {
+    "small": {"questions": 200, "depth": 1, "fanout": 2},
+    "large": {"questions": 3000, "depth": 2, "fanout": 3},
+}
+
+MIN_RUNS = 5
+MAX_RUNS = 20
+MIN_SECONDS = 1.0
+
+# How many more times a case that looks slower than the baseline is
+# measured before it counts as a regression, as timings on shared
+# machines vary from one moment to the next.
+#
+RETRIES = 2
+
+# The spreads of a case and its baseline that its time may exceed the
+# threshold by before it counts as slower.
+#
+NOISE = 3
+
+THRESHOLD = 1.5
+
+
+def lint_read(filename):
+    "Read every row of the worksheets that beelint reads."
+
+    with open_workbook(filename) as workbook:
+        for name in ("choices", "survey"):
+            for row in workbook.sheet(name):
+                pass
+
+
+class Project:
+    "A synthetic project on disk, with its sources and outputs."
+
+    def __init__(self, directory, options):
+        self.directory = directory
+        self.filename = generate_project(directory, **options)
+
+        with open(self.filename) as f:
+            self.code = f.read()
+
+        # The sources as they are parsed, with macros filled in.
+        #
+        self.sources = []
+
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name)) as f:
+                code = f.read()
+
+            if name.endswith(".hcs"):
+                self.sources.append(substitute_macros(
+                    code, {"prefix": "p_"} if "${!" in code else {}))
+
+        with open(os.path.join(directory, "choices.hcc")) as f:
+            self.choices = f.read()
+
+        self.survey = compile_survey(self.code, directory)
+        self.xlsx = os.path.join(directory, "form.xlsx")
+        write_xlsx(self.survey, self.xlsx)
+
+        # A session that has parsed every file, to time expansion.
+        #
+        self.session = Session()
+        compile_survey(self.code, directory, self.session)
+
+    def output(self, extension):
+        return os.path.join(self.directory, f"output.{extension}")
+
+
+CASES = {
+    "preprocess": lambda project: [
+        preprocess_indent(code) for code in project.sources],
+    "parse pyparsing": lambda project: [
+        parse_survey_code(code) for code in project.sources]
+        + [parse_choices_code(project.choices)],
+    "parse fast": lambda project: [
+        parse_survey_code(code, "fast") for code in project.sources]
+        + [parse_choices_code(project.choices, "fast")],
+    "expand": lambda project: compile_survey(
+        project.code, project.directory, project.session),
+    "compile": lambda project: compile_survey(
+        project.code, project.directory),
+    "write xlsx": lambda project: write_xlsx(
+        project.survey, project.output("xlsx")),
+    "write xform": lambda project: write_xform(
+        project.survey, project.output("xml")),
+    "lint read": lambda project: lint_read(project.xlsx),
+    "lint": lambda project: lint_file(project.xlsx),
+}
+
+
+def measure(case, project):
+    """Return the times of several runs of a case and its peak memory,
+    after a run to warm up and with the garbage collector off, like
+    timeit."""
+
+    case(project)
+
+    times = []
+    start = time.perf_counter()
+    gc.disable()
+
+    try:
+        while (len(times) < MIN_RUNS
+               or (len(times) < MAX_RUNS
+                   and time.perf_counter() - start < MIN_SECONDS)):
+            run_start = time.perf_counter()
+            case(project)
+            times.append(time.perf_counter() - run_start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    case(project)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return times, peak
+
+
+def summarize(times, peak):
+    "Return the result of a case from its times and peak memory."
+
+    median = statistics.median(times)
+
+    return {"seconds": median,
+            "spread": statistics.median(abs(t - median) for t in times),
+            "peak_memory": peak}
+
+
+def slower(result, base, threshold):
+    limit = (threshold * base["seconds"]
+             + NOISE * (result["spread"] + base.get("spread", 0)))
+
+    return (result["seconds"] > limit
+            or result["peak_memory"] > threshold * base["peak_memory"])
+
+
+def run(pattern="", baseline={}, threshold=THRESHOLD):
+    """Return the results of the cases whose names contain `pattern`,
+    measuring again those that are slower than the baseline."""
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as root:
+        for size, options in PROJECTS.items():
+            directory = os.path.join(root, size)
+            os.mkdir(directory)
+            project = Project(directory, options)
+
+            for name, case in CASES.items():
+                key = f"{size}/{name}"
+
+                if pattern not in key:
+                    continue
+
+                times, peak = measure(case, project)
+                result = summarize(times, peak)
+
+                for _ in range(RETRIES):
+                    if (key not in baseline
+                            or not slower(result, baseline[key],
+                                          threshold)):
+                        break
+
+                    more_times, more_peak = measure(case, project)
+                    times += more_times
+                    peak = min(peak, more_peak)
+                    result = summarize(times, peak)
+
+                results[key] = result
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    "Print the results next to the baseline and return the regressions."
+
+    regressions = []
+
+    print(f"{'case':<26}{'ms':>10}{'+-':>7}{'base ms':>10}{'ratio':>8}"
+          f"{'peak MB':>10}{'base MB':>10}{'ratio':>8}")
+
+    for key, result in results.items():
+        base = baseline.get(key)
+        line = (f"{key:<26}{result['seconds'] * 1000:10.1f}"
+                f"{result['spread'] * 1000:7.1f}")
+
+        if base is None:
+            print(f"{line}{'-':>10}{'':>8}"
+                  f"{result['peak_memory'] / 2 ** 20:10.2f}")
+            continue
+
+        time_ratio = result["seconds"] / base["seconds"]
+        memory_ratio = result["peak_memory"] / max(base["peak_memory"], 1)
+        regressed = slower(result, base, threshold)
+
+        if regressed:
+            regressions.append(key)
+
+        print(f"{line}{base['seconds'] * 1000:10.1f}{time_ratio:8.2f}"
+              f"{result['peak_memory'] / 2 ** 20:10.2f}"
+              f"{base['peak_memory'] / 2 ** 20:10.2f}{memory_ratio:8.2f}"
+              + ("  REGRESSION" if regressed else ""))
+
+    return regressions
+
+
+def main():
+    arguments = argparse.ArgumentParser(
+        description="Benchmark beepile and beelint.")
+    arguments.add_argument(
+        "--save", action="store_true",
+        help="store the results in the baseline, replacing those of"
+             " the same cases")
+    arguments.add_argument("--baseline", default=BASELINE)
+    arguments.add_argument(
+        "--threshold", type=float, default=THRESHOLD,
+        help="the ratio to the baseline above which a case regressed")
+    arguments.add_argument(
+        "-k", dest="pattern", default="",
+        help="only run the cases whose names contain this")
+    options = arguments.parse_args()
+
+    try:
+        with open(options.baseline) as f:
+            baseline = json.load(f)["results"]
+    except FileNotFoundError:
+        baseline = {}
+
+    if options.save:
+        results = run(options.pattern)
+        baseline.update(results)
+
+        with open(options.baseline, "w") as f:
+            json.dump({"machine": {"platform": platform.platform(),
+                                   "python": platform.python_version(),
+                                   "cpus": os.cpu_count()},
+                       "results": baseline},
+                      f, indent=2, sort_keys=True)
+            f.write("\n")
+
+        compare(results, {}, options.threshold)
+        print(f"Saved the baseline to {options.baseline}.")
+        return 0
+
+    results = run(options.pattern, baseline, options.threshold)
+    regressions = compare(results, baseline, options.threshold)
+
+    if regressions:
+        print(f"{len(regressions)} regressions over {options.threshold}x"
+              f" the baseline: {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Generators for large synthetic Honeycomb forms.
+
+Usage: python benchmarks/synthetic.py DIRECTORY [--questions N]
+           [--depth D] [--fanout F] [--lists L] [--list-size S]
+           [--nesting K] [--no-macros] [--xlsx]
+
+writes a project of generate_project's shape to DIRECTORY, and with
+--xlsx its compiled XLSForm next to it.
+"""
+
+import argparse
+import os
+
+
+def synthetic_block(index, depth, indent=""):
+    "Generate one block of questions nested `depth` levels deep."
+
+    lines = [
+        f"{indent}# Block {index}",
+        f"{indent}q{index} integer:",
+        f'{indent}    "How many items does respondent {index} have?"',
+        f'{indent}    constraint ". >= 0"',
+        f"{indent}    required yes",
+        f'{indent}q{index}_note note: "Block {index}"',
+    ]
+
+    for level in range(depth):
+        inner = indent + "    " * (level + 1)
+        outer = indent + "    " * level
+
+        if level % 3 == 0:
+            lines.append(f"{outer}if ${{q{index}}} > {level}:")
+        elif level % 3 == 1:
+            lines.append(
+                f'{outer}group g{index}_{level} "Group {level}"'
+                f' appearance "field-list":')
+        else:
+            lines.append(
+                f'{outer}repeat r{index}_{level} "Repeat {level}"'
+                f' repeat_count "${{q{index}}}":')
+
+        lines.extend([
+            f"{inner}a{index}_{level} select_one yes_no:",
+            f'{inner}    "Is item {level} of {index} present?"',
+            f"{inner}b{index}_{level} text:",
+            f'{inner}    "Describe item {level} of {index}."',
+            f'{inner}    hint "Free text"',
+        ])
+
+    return "\n".join(lines) + "\n\n"
+
+
+def synthetic_survey(blocks=500, depth=3):
+    "Generate a single-file survey with `blocks` nested blocks."
+
+    return "".join(
+        synthetic_block(index, depth)
+        for index in range(blocks))
+
+
+def synthetic_choices(lists=10, size=100):
+    "Generate a choices file with `lists` lists of `size` entries."
+
+    lines = ["list yes_no:", '    1 "yes"', '    0 "no"', ""]
+
+    for index in range(lists):
+        lines.append(f"list list_{index}:")
+        lines.extend(
+            f'    {value} "Choice {value} of list {index}"'
+            for value in range(size))
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def synthetic_module():
+    "Generate an include file that uses a `member` macro."
+
+    return (
+        "member_${!member}_name text:\n"
+        '    "What is the name of member ${!member}?"\n'
+        "member_${!member}_age integer:\n"
+        '    "How old is ${member_${!member}_name}?"\n'
+        '    constraint ". >= 0"\n'
+        'if ${member_${!member}_age} >= 18:\n'
+        "    member_${!member}_works select_one yes_no:\n"
+        '        "Does ${member_${!member}_name} work?"\n'
+        "    if ${member_${!member}_works} = 1:\n"
+        "        member_${!member}_job text:\n"
+        '            "What is their occupation?"\n')
+
+
+def write_project(directory, includes=100, blocks=100, depth=3):
+    """Write a survey that includes a module `includes` times next
+    to `blocks` nested blocks of its own, and return its filename."""
+
+    with open(f"{directory}/module.hcs", "w") as f:
+        f.write(synthetic_module())
+
+    with open(f"{directory}/choices.hcc", "w") as f:
+        f.write(synthetic_choices())
+
+    filename = f"{directory}/main.hcs"
+
+    with open(filename, "w") as f:
+        f.write('@form synthetic 1 "Synthetic Form"\n')
+        f.write('@choices "choices.hcc"\n')
+        f.write("@required yes\n\n")
+        f.write(synthetic_survey(blocks, depth))
+        f.writelines(
+            f'@include "module.hcs" member "{index}"\n'
+            for index in range(includes))
+
+    return filename
+
+
+def project_block(prefix, index, nesting, lists):
+    """Generate a question block with `nesting` levels of if, group and
+    repeat, with names that start with `prefix`."""
+
+    name = f"{prefix}q{index}"
+    lines = [
+        f"{name} integer:",
+        f'    "How many items does {name} have?"',
+        f'    constraint ". >= 0"',
+    ]
+
+    for level in range(nesting):
+        inner = "    " * (level + 1)
+        outer = "    " * level
+
+        if level % 3 == 0:
+            lines.append(f"{outer}if ${{{name}}} > {level}:")
+        elif level % 3 == 1:
+            lines.append(f'{outer}group {name}_g{level} "Group {level}":')
+        else:
+            lines.append(
+                f'{outer}repeat {name}_r{level} "Repeat {level}"'
+                f' repeat_count "${{{name}}}":')
+
+        lines.extend([
+            f"{inner}{name}_a{level} select_one list_{index % lists}:",
+            f'{inner}    "Which item {level} of ${{{name}}}?"',
+            f"{inner}{name}_b{level} text:",
+            f'{inner}    "Describe item {level} of ${{{name}}}."',
+            f'{inner}    hint "Free text"',
+        ])
+
+    return "\n".join(lines) + "\n\n"
+
+
+def generate_project(directory, questions=1000, depth=2, fanout=3,
+                     lists=10, list_size=100, nesting=3, macros=True):
+    """Write a project to `directory` and return its main file.
+
+    The main file includes `fanout` modules, each module includes the
+    `fanout` modules of the next level, down to `depth` levels, and
+    the blocks of about `questions` questions are spread evenly over
+    the main file and the included copies of the modules.  Each block
+    has `nesting` levels of if, group and repeat and selects from one
+    of `lists` choice lists of `list_size` choices.  With `macros`,
+    each include passes a `prefix` macro that keeps question names
+    unique; without, the copies of a module repeat its names.
+    """
+
+    copies = sum(fanout ** level for level in range(depth + 1))
+    questions_per_block = 1 + 2 * nesting
+    blocks = max(1, questions // (questions_per_block * copies))
+
+    with open(os.path.join(directory, "choices.hcc"), "w") as f:
+        f.write(synthetic_choices(lists, list_size))
+
+    def includes(level, prefix):
+        if level == depth:
+            return ""
+
+        return "".join(
+            f'@include "module_{level}_{index}.hcs"'
+            + (f' prefix "{prefix}m{level}{index}_"' if macros else "")
+            + "\n"
+            for index in range(fanout))
+
+    for level in range(depth):
+        for index in range(fanout):
+            prefix = "${!prefix}" if macros else f"m{level}{index}_"
+
+            with open(os.path.join(
+                    directory, f"module_{level}_{index}.hcs"), "w") as f:
+                f.write("".join(
+                    project_block(prefix, block, nesting, lists)
+                    for block in range(blocks)))
+                f.write(includes(level + 1, prefix))
+
+    filename = os.path.join(directory, "main.hcs")
+
+    with open(filename, "w") as f:
+        f.write('@form synthetic 1 "Synthetic Form"\n')
+        f.write('@choices "choices.hcc"\n')
+        f.write("@required yes\n\n")
+        f.write("".join(
+            project_block("", block, nesting, lists)
+            for block in range(blocks)))
+        f.write(includes(0, ""))
+
+    return filename
+
+
+def main():
+    arguments = argparse.ArgumentParser(
+        description="Write a synthetic Honeycomb project.")
+    arguments.add_argument("directory")
+    arguments.add_argument("--questions", type=int, default=1000)
+    arguments.add_argument("--depth", type=int, default=2)
+    arguments.add_argument("--fanout", type=int, default=3)
+    arguments.add_argument("--lists", type=int, default=10)
+    arguments.add_argument("--list-size", type=int, default=100)
+    arguments.add_argument("--nesting", type=int, default=3)
+    arguments.add_argument("--no-macros", action="store_true")
+    arguments.add_argument(
+        "--xlsx", action="store_true",
+        help="also compile the project to main.xlsx")
+    options = arguments.parse_args()
+
+    os.makedirs(options.directory, exist_ok=True)
+
+    filename = generate_project(
+        options.directory, options.questions, options.depth,
+        options.fanout, options.lists, options.list_size,
+        options.nesting, not options.no_macros)
+
+    if options.xlsx:
+        from honeybee.comb_to_xlsform import comb_to_xlsx
+
+        with open(filename) as f:
+            comb_to_xlsx(f.read(), options.directory,
+                         os.path.splitext(filename)[0] + ".xlsx")
+
+    print(filename)
+
+
+if __name__ == "__main__":
+    main()
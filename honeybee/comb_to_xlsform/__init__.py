@@ -15,28 +15,230 @@
 # Public License along with Honeybee.  If not, see
 # <https://www.gnu.org/licenses/>.
 
+"""Compile Honeycomb into XLSForm: the library functions and the entry
+point of beepile."""
+
 import os
+import sys
+
+from honeybee.comb_to_xlsform.cache import DiskCache, MemoryCache
+from honeybee.comb_to_xlsform.external import (
+    output_directory, split_external_choices)
+from honeybee.comb_to_xlsform.profile import phase
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import (
+    PARSERS, compile_survey, stream_survey)
+from honeybee.comb_to_xlsform.writers import WRITERS
+from honeybee.comb_to_xlsform.xlsx import write_xlsx, write_xlsx_stream
+
+
+# Parse trees and templates that a session keeps in memory with
+# --stream.  Includes are expanded twice, once to find the columns,
+# and the oldest trees come from the cache or are parsed again.
+#
+STREAM_MEMO_SIZE = 256
+
+
+def compile_external(code, include_path, filename, session,
+                     external_threshold):
+    survey = compile_survey(code, include_path, session)
+
+    if external_threshold is None:
+        return survey
+
+    with phase("external choices"):
+        return split_external_choices(
+            survey, external_threshold, output_directory(filename))
+
+
+def comb_to_xlsx(code, include_path, filename, session=None,
+                 stream=False, external_threshold=None):
+    if stream:
+        if session is None:
+            session = Session(memo_size=STREAM_MEMO_SIZE)
+
+        with phase("expand and write"):
+            write_xlsx_stream(
+                lambda: stream_survey(code, include_path, session),
+                filename,
+                external_threshold)
+    else:
+        survey = compile_external(code, include_path, filename, session,
+                                  external_threshold)
+
+        with phase("write"):
+            write_xlsx(survey, filename)
 
-import argh
 
-from honeybee.comb_to_xlsform.survey import compile_survey
-from honeybee.comb_to_xlsform.xlsx import write_xlsx
+def comb_to_file(code, include_path, filename, format, session=None,
+                 external_threshold=None):
+    "Compile `code` and write it with the writer of `format`."
 
+    survey = compile_external(code, include_path, filename, session,
+                              external_threshold)
 
-def comb_to_xlsx(code, include_path, filename):
-    write_xlsx(
-        compile_survey(code, include_path),
-        filename)
+    with phase("write"):
+        WRITERS[format](survey, filename)
 
 
-@argh.arg("-o", "--output-filename", type=str, required=True)
-def main(input_filename, output_filename=None):
+def write_survey(survey, filename, format, external_threshold=None):
+    "Write a compiled form with the writer of `format`."
+
+    if external_threshold is not None:
+        with phase("external choices"):
+            survey = split_external_choices(
+                survey, external_threshold, output_directory(filename))
+
+    with phase("write"):
+        WRITERS[format](survey, filename)
+
+
+def make_session(parser="pyparsing", cache_dir=None, no_cache=False,
+                 jobs=None, watch=False, stream=False):
+    """Return the session of a beepile run with these options.  With
+    `stream`, the session only keeps STREAM_MEMO_SIZE parse trees and
+    templates in memory."""
+
+    if watch:
+        # Parse trees and expansions stay in memory between builds.
+        #
+        cache = MemoryCache()
+    elif no_cache:
+        cache = None
+    else:
+        cache = DiskCache(cache_dir)
+
+    return Session(parser=parser, cache=cache, jobs=jobs or os.cpu_count(),
+                   memo_size=STREAM_MEMO_SIZE if stream else None)
+
+
+def compile_file(input_filename, output_filename, format, session,
+                 stream=False, external_threshold=None, lint=False):
+    """Compile the form in `input_filename` to `output_filename`.  With
+    `lint`, check the compiled form first and return its
+    LocatedDiagnostics, and only write it if none is an error."""
+
     include_path = os.path.dirname(input_filename)
 
     with open(input_filename) as f:
+        code = f.read()
+
+    if lint:
+        from honeybee.comb_to_xlsform.check import check_form, has_errors
+
+        survey = compile_survey(code, include_path, session)
+
+        with phase("lint"):
+            diagnostics = check_form(
+                survey, code, input_filename, session)
+
+        if not has_errors(diagnostics):
+            write_survey(survey, output_filename, format,
+                         external_threshold)
+
+        return diagnostics
+
+    if format == "xlsx":
         comb_to_xlsx(
-            f.read(), include_path, output_filename)
+            code, include_path, output_filename, session, stream,
+            external_threshold)
+    else:
+        comb_to_file(
+            code, include_path, output_filename, format, session,
+            external_threshold)
+
+    return []
+
+
+# The options that quick_arguments understands, after the short
+# options that argh gives them.
+#
+QUICK_OPTIONS = {
+    "-o": "output_filename", "--output-filename": "output_filename",
+    "-f": "format", "--format": "format",
+    "-p": "parser", "--parser": "parser",
+    "-c": "cache_dir", "--cache-dir": "cache_dir",
+    "-e": "external_threshold", "--external-threshold": "external_threshold",
+    "-j": "jobs", "--jobs": "jobs"}
+
+QUICK_FLAGS = {
+    "-n": "no_cache", "--no-cache": "no_cache",
+    "-s": "stream", "--stream": "stream",
+    "-l": "lint", "--lint": "lint"}
+
+
+def quick_arguments(argv):
+    """Return the options of a plain `beepile INPUT -o OUTPUT`, or None
+    if `argv` needs the full command line: help, --watch, --batch,
+    `serve`, or anything that argh would report as an error."""
+
+    options = {"format": "xlsx", "parser": "pyparsing"}
+    inputs = []
+    argv = list(argv)
+
+    while argv:
+        argument = argv.pop(0)
+
+        if argument in QUICK_FLAGS:
+            options[QUICK_FLAGS[argument]] = True
+        elif argument in QUICK_OPTIONS and argv:
+            options[QUICK_OPTIONS[argument]] = argv.pop(0)
+        elif argument.startswith("-") or argument == "serve":
+            return None
+        else:
+            inputs.append(argument)
+
+    if (len(inputs) != 1 or "output_filename" not in options
+            or options["format"] not in WRITERS
+            or options["parser"] not in PARSERS
+            or options["format"] == "csv" and options["output_filename"] == "-"
+            or options.get("stream") and options["format"] != "xlsx"
+            or options.get("stream") and options.get("lint")):
+        return None
+
+    for name in ("external_threshold", "jobs"):
+        if name in options:
+            try:
+                options[name] = int(options[name])
+            except ValueError:
+                return None
+
+    options["input_filename"] = inputs[0]
+
+    return options
 
 
 def dispatch():
-    argh.dispatch_command(main)
+    options = quick_arguments(sys.argv[1:])
+
+    if options is None:
+        from honeybee.comb_to_xlsform.command import run
+
+        run(sys.argv[1:])
+        return
+
+    session = make_session(
+        options["parser"], options.get("cache_dir"),
+        options.get("no_cache", False), options.get("jobs"),
+        stream=options.get("stream", False))
+
+    diagnostics = compile_file(
+        options["input_filename"], options["output_filename"],
+        options["format"], session, options.get("stream", False),
+        options.get("external_threshold"), options.get("lint", False))
+
+    if diagnostics:
+        from honeybee.comb_to_xlsform.check import report
+
+        sys.exit(report(diagnostics, options["output_filename"]))
+
+
+def __getattr__(name):
+    # The command line is only imported when it is used.
+    #
+    if name in ("main", "main_batch"):
+        from honeybee.comb_to_xlsform import command
+
+        return getattr(command, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,153 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Compile many forms at once: `beepile --batch DIR_OR_GLOB`.
+
+The forms are compiled on a pool of processes.  Each process keeps
+one session for all the forms it compiles, so a module that several
+forms include is parsed once per process, and its expansion is
+shared through the compile cache: across processes and runs with the
+DiskCache, within a process with --no-cache.  A form that fails is
+reported and the other forms are still compiled.
+
+With --external-threshold, each form is written to a directory of
+its own in the output directory, with its choices-<list>.csv files,
+since two forms may have lists of the same name.
+"""
+
+import concurrent.futures
+import glob
+import os
+import time
+
+from honeybee.comb_to_xlsform import comb_to_file
+from honeybee.comb_to_xlsform.cache import DiskCache, MemoryCache
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.writers import EXTENSIONS
+
+
+session = None
+
+
+def batch_inputs(pattern):
+    """Return the .hcs files in the directory `pattern`, or the files
+    that match the glob `pattern`, in order."""
+
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.hcs")
+
+    return sorted(filename for filename in glob.glob(pattern)
+                  if os.path.isfile(filename))
+
+
+def batch_outputs(input_filenames, out_dir, format, directories=False):
+    """Return the output file of each input file in `out_dir`, or in a
+    directory of its own in `out_dir` with `directories`."""
+
+    outputs = dict()
+
+    for filename in input_filenames:
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        output = os.path.join(
+            out_dir, stem if directories else "", stem + EXTENSIONS[format])
+
+        if output in outputs.values():
+            raise ValueError(
+                f"Two inputs would be written to the same file: {output}.")
+
+        outputs[filename] = output
+
+    return outputs
+
+
+def init_worker(parser, cache_dir, no_cache, packrat=False):
+    global session
+
+    if packrat:
+        from honeybee.comb_to_xlsform.grammar import enable_packrat
+
+        enable_packrat()
+
+    session = Session(
+        parser=parser,
+        cache=MemoryCache() if no_cache else DiskCache(cache_dir))
+
+
+def compile_form(input_filename, output_filename, format,
+                 external_threshold):
+    """Compile one form in a worker and return (seconds, error), where
+    error is None or the message of the exception."""
+
+    start = time.perf_counter()
+
+    try:
+        with open(input_filename) as f:
+            code = f.read()
+
+        os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+
+        comb_to_file(code, os.path.dirname(input_filename),
+                     output_filename, format, session, external_threshold)
+    except Exception as error:
+        return (time.perf_counter() - start,
+                f"{type(error).__name__}: {error}")
+
+    return time.perf_counter() - start, None
+
+
+def compile_batch(outputs, format, parser="pyparsing", cache_dir=None,
+                  no_cache=False, external_threshold=None, jobs=None,
+                  log=print, packrat=False):
+    """Compile each input of `outputs` to its output file, log a line
+    per form as it finishes, and return {input: (seconds, error)}."""
+
+    results = dict()
+
+    def report(input_filename, result):
+        seconds, error = results[input_filename] = result
+
+        if error is None:
+            log(f"{seconds * 1000:9.1f} ms  {input_filename}"
+                f" -> {outputs[input_filename]}")
+        else:
+            log(f"{'FAILED':>12}  {input_filename}: {error}")
+
+    arguments = (parser, cache_dir, no_cache, packrat)
+    jobs = min(jobs or os.cpu_count(), len(outputs))
+
+    if jobs <= 1:
+        init_worker(*arguments)
+
+        for input_filename, output_filename in outputs.items():
+            report(input_filename, compile_form(
+                input_filename, output_filename, format,
+                external_threshold))
+
+        return results
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_worker,
+            initargs=arguments) as pool:
+        futures = {
+            pool.submit(compile_form, input_filename, output_filename,
+                        format, external_threshold): input_filename
+            for input_filename, output_filename in outputs.items()}
+
+        for future in concurrent.futures.as_completed(futures):
+            report(futures[future], future.result())
+
+    return results
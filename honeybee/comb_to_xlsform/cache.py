@@ -0,0 +1,185 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+import os
+import pickle
+import hashlib
+import tempfile
+import collections
+
+from honeybee.comb_to_xlsform.profile import phase
+
+
+# Bump this whenever the grammars or the shape of the parse trees
+# and expanded rows change, so that old cache entries are ignored.
+#
+GRAMMAR_VERSION = 4
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    cache_home = (os.environ.get("XDG_CACHE_HOME")
+                  or os.path.join(os.path.expanduser("~"), ".cache"))
+
+    return os.path.join(cache_home, "honeybee")
+
+
+def digest(string):
+    return hashlib.sha256(string.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Content-addressed store of pickled values.
+
+    Entries are files named after the hash of their key.  Reading an
+    entry touches it, and writing one evicts the least recently used
+    entries once the directory grows beyond `max_size` bytes.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory or default_cache_dir()
+        self.max_size = max_size
+        self.size = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *parts):
+        return digest(repr((GRAMMAR_VERSION,) + parts))
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def get(self, key):
+        path = self.path(key)
+
+        try:
+            with phase("cache"):
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # A truncated entry, or one that no longer loads, such as
+            # one that refers to a class that was renamed.
+            #
+            self.misses += 1
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            return None
+
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        try:
+            with phase("cache"):
+                os.makedirs(self.directory, exist_ok=True)
+
+                with tempfile.NamedTemporaryFile(
+                        dir=self.directory, suffix=".tmp",
+                        delete=False) as f:
+                    pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+
+                os.replace(f.name, self.path(key))
+        except OSError:
+            return
+
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+        else:
+            self.size += os.path.getsize(self.path(key))
+
+        if self.size > self.max_size:
+            self.evict()
+
+    def entries(self):
+        "Yield (path, size, last use) for each entry."
+
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for name in names:
+            if not name.endswith(".pickle"):
+                continue
+
+            path = os.path.join(self.directory, name)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            yield path, stat.st_size, stat.st_mtime
+
+    def evict(self):
+        "Remove the least recently used entries until under max_size."
+
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        self.size = sum(size for _, size, _ in entries)
+
+        for path, size, _ in entries:
+            if self.size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            self.size -= size
+
+
+class MemoryCache:
+    """A cache like DiskCache that keeps its values in memory, for a
+    process that compiles the same form again and again.  It holds at
+    most `max_entries` entries and drops the least recently used."""
+
+    def __init__(self, max_entries=4096):
+        self.entries = collections.OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *parts):
+        return digest(repr(parts))
+
+    def get(self, key):
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -0,0 +1,253 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Run the checks of beelint on a compiled form: `beepile --lint`.
+
+The checks run on the Survey in memory, before anything is written.
+To point a diagnostic at its source, the form is expanded once more,
+from the parse trees of the session and without the cache of
+expanded includes, with a Locator that follows the expansion.  Parse
+trees do not keep line numbers, so the Locator finds the line of each
+statement by searching its file, with macros filled in, from the line
+of the previous statement: statements are expanded in the order of
+their lines.  This second expansion only happens if there are
+diagnostics.
+"""
+
+import os
+import re
+import sys
+
+from collections import namedtuple
+
+from honeybee.comb_to_xlsform import profile
+from honeybee.comb_to_xlsform.common import (
+    Scope, args_to_params, new_path_and_filename, substitute_macros)
+from honeybee.comb_to_xlsform.model import render
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import expand_survey, parse_form
+from honeybee.comb_to_xlsform.xlsx import iter_sheets
+from honeybee.lint import format_diagnostic, lint_workbook
+
+
+# A diagnostic and the (filename, line) of the statements that led to
+# its row, from the main file to the file of the row.  Lines that are
+# not found are None.
+#
+LocatedDiagnostic = namedtuple(
+    "LocatedDiagnostic", ("diagnostic", "origin"))
+
+STATEMENTS = {
+    "question": r"\s*{}\s",
+    "block": r"\s*{}\s+{}\b",
+    "include": r"\s*@include\b",
+    "choices": r"\s*@choices\b",
+    "list": r"\s*list\s+{}\b"}
+
+
+def find_line(lines, start, kind, *names):
+    """Return the index of the first of `lines` from `start` that holds
+    a statement of `kind`, or None."""
+
+    pattern = re.compile(
+        STATEMENTS[kind].format(*(re.escape(name) for name in names)))
+
+    for i in range(start, len(lines)):
+        if pattern.match(lines[i]):
+            return i
+
+    return None
+
+
+def read_lines(filename, macros):
+    with open(filename) as f:
+        return substitute_macros(f.read(), dict(macros)).splitlines()
+
+
+class Frame:
+    "A file being expanded, and the line of its last statement."
+
+    __slots__ = ("filename", "lines", "cursor", "line")
+
+    def __init__(self, filename, lines):
+        self.filename = filename
+        self.lines = lines
+        self.cursor = 0
+        self.line = None
+
+
+class Locator:
+    """The origins of the rows of a form, which iter_survey adds to
+    `survey` and `choices` as it expands them."""
+
+    def __init__(self, filename, code):
+        self.frames = [Frame(filename, code.splitlines())]
+        self.survey = []
+        self.choices = []
+        self.lists = dict()
+
+    def statement(self, kind, *names):
+        "Return the origin of the next statement of the current file."
+
+        frame = self.frames[-1]
+        i = find_line(frame.lines, frame.cursor, kind, *names)
+
+        if i is None:
+            frame.line = None
+        else:
+            frame.cursor = i + 1
+            frame.line = i + 1
+
+        return tuple((frame.filename, frame.line) for frame in self.frames)
+
+    def include(self, include):
+        "Start the file of an @include, whose key and name is `include`."
+
+        (filename, macros), name = include
+
+        self.frames.append(Frame(name, read_lines(filename, macros)))
+
+    def end_include(self):
+        self.frames.pop()
+
+    def choices_file(self, origin, include_path, filename, args):
+        """Return a function from list names to the origins of the rows
+        of a @choices file."""
+
+        filename = new_path_and_filename(include_path, filename)[1]
+        key = (os.path.abspath(filename),
+               tuple(sorted(args_to_params(args).items())))
+
+        if key not in self.lists:
+            self.lists[key] = read_lines(filename, key[1])
+
+        lines = self.lists[key]
+        name = os.path.normpath(filename)
+
+        def list_origin(list_name):
+            i = find_line(lines, 0, "list", list_name)
+            return origin + ((name, None if i is None else i + 1),)
+
+        return list_origin
+
+
+class SurveySheets:
+    "The worksheets of a Survey, as lint_workbook reads them."
+
+    def __init__(self, survey):
+        self.sheets = {worksheet: (rows, column_names)
+                       for worksheet, rows, column_names
+                       in iter_sheets(survey)}
+
+    def sheet(self, name):
+        rows, column_names = self.sheets[name]
+
+        yield tuple(column_names)
+
+        for row in rows:
+            yield tuple(str(render(row.get(column)) or "")
+                        for column in column_names)
+
+
+def locate_rows(code, filename, include_path, session):
+    "Return a Locator that has followed the expansion of a form."
+
+    locator = Locator(os.path.normpath(filename), code)
+
+    # A session without a cache, which shares the parse trees of
+    # `session`, expands every include instead of reusing it.
+    #
+    walk = Session(session.parser)
+    walk.trees = session.trees
+    walk.templates = session.templates
+
+    # The includes of the second expansion are not profiled, as they
+    # would count twice; its time counts in the lint phase.
+    #
+    active, profile.active = profile.active, None
+
+    try:
+        expand_survey(parse_form(code, include_path, walk), Scope(),
+                      include_path, walk, locator)
+    finally:
+        profile.active = active
+
+    return locator
+
+
+def check_form(survey, code, filename, session):
+    """Return the LocatedDiagnostics of a compiled form, in the order
+    of beelint."""
+
+    diagnostics = lint_workbook(SurveySheets(survey))
+
+    if not diagnostics:
+        return []
+
+    locator = locate_rows(code, filename, os.path.dirname(filename),
+                          session)
+    origins = {"survey": locator.survey, "choices": locator.choices}
+    main = ((os.path.normpath(filename), None),)
+
+    return [LocatedDiagnostic(
+                diagnostic,
+                main if diagnostic.row is None or diagnostic.row < 2
+                else origins[diagnostic.sheet][diagnostic.row - 2])
+            for diagnostic in diagnostics]
+
+
+def format_located(located):
+    """Return a line like `demog.hcs:4: Warning: age is not required.
+    (survey row 3; included from survey.hcs:5)`."""
+
+    diagnostic, origin = located
+
+    def place(filename, line):
+        return filename if line is None else f"{filename}:{line}"
+
+    notes = []
+
+    if diagnostic.row is not None:
+        notes.append(f"{diagnostic.sheet} row {diagnostic.row}")
+
+    if len(origin) > 1:
+        notes.append("included from " + ", ".join(
+            place(*source) for source in reversed(origin[:-1])))
+
+    return (f"{place(*origin[-1])}:"
+            f" {format_diagnostic(diagnostic._replace(sheet=None, row=None))}"
+            + (f" ({'; '.join(notes)})" if notes else ""))
+
+
+def has_errors(diagnostics):
+    return any(located.diagnostic.severity == "error"
+               for located in diagnostics)
+
+
+def report(diagnostics, output_filename, file=sys.stderr):
+    """Print LocatedDiagnostics and return the exit status of beepile:
+    1 if the output was not written because of errors, or else 0."""
+
+    for located in diagnostics:
+        print(format_located(located), file=file)
+
+    if has_errors(diagnostics):
+        print(f"{output_filename} was not written because of errors.",
+              file=file)
+        return 1
+
+    return 0
@@ -15,20 +15,24 @@
 # Public License along with Honeybee.  If not, see
 # <https://www.gnu.org/licenses/>.
 
-import copy
-
-from pyparsing import (
-    Forward, OneOrMore, Group, ungroup, alphas, alphanums, nums,
-    Word, QuotedString, restOfLine, LineEnd,
-    indentedBlock, ZeroOrMore, Suppress)
+import os
 
 from honeybee.comb_to_xlsform.common import (
-    new_path_and_filename, args_to_params, merge_params,
-    substitute_macros)
+    new_path_and_filename, args_to_params, merge_params, Scope, Block,
+    check_include_cycle, cached_grammar)
+from honeybee.comb_to_xlsform.fastparse import parse_choices_tree
+from honeybee.comb_to_xlsform.model import Table
 
 
+@cached_grammar
 def parse_choices():
-    indent_stack = [1]
+    from pyparsing import (
+        Forward, OneOrMore, Group, alphas, alphanums, nums,
+        Word, QuotedString, restOfLine, LineEnd,
+        ZeroOrMore, Suppress)
+
+    from honeybee.comb_to_xlsform.grammar import indented_block
+
     stmt = Forward()
 
     identifier = Word(alphas, alphanums + "_")
@@ -48,7 +52,7 @@ def parse_choices():
 
     list_name = identifier
     list_def = "list" + list_name + choice_params + Suppress(":")
-    list_body = indentedBlock(ungroup(stmt), indent_stack)
+    list_body = indented_block(stmt)
     list_block = Group(list_def + list_body)
 
     stmt <<= (comment | command | list_block | choice)
@@ -57,24 +61,52 @@ def parse_choices():
     return stmts
 
 
-def execute_include(filename, args, params, include_path):
-    """Generate entries for the 'choices' worksheet based on an
-    @include command."""
+def parse_choices_code(code, parser="pyparsing"):
+    "Parse choices code with the pyparsing grammar or the fast parser."
+
+    if parser == "fast":
+        return parse_choices_tree(code)
+    elif parser == "pyparsing":
+        return parse_choices().parseString(
+            code, parseAll=True).asList()
+
+    raise ValueError(f"Unknown parser: {parser}.")
+
+
+def execute_include(filename, args, params, include_path, stack,
+                    rows, session):
+    """Push the block of an @include command onto `stack`, or add its
+    cached expansion to `rows`."""
 
     include_path, filename = new_path_and_filename(
         include_path, filename)
 
     include_macros = args_to_params(args)
 
-    with open(filename) as f:
-        return expand_choices(
-            parse_choices().parseString(
-                substitute_macros(
-                    f.read(),
-                    include_macros),
-                parseAll=True).asList(),
-            params,
-            include_path)
+    code = session.read(filename)
+
+    include = ((os.path.abspath(filename),
+                sorted(include_macros.items())),
+               os.path.normpath(filename))
+    check_include_cycle(stack, include)
+
+    cached = session.begin(
+        "choices",
+        (code, sorted(include_macros.items()), sorted(params.items()),
+         os.path.abspath(include_path)))
+
+    if cached is not None:
+        rows.extend(cached)
+        return
+
+    include_tree = session.instantiate(
+        "choices", code, include_macros, parse_choices_code)
+
+    rows_start = len(rows)
+
+    stack.append(
+        Block(include_tree, params, include_path, include,
+              lambda: session.end(lambda: rows[rows_start:])))
 
 
 def compile_choice(value, args, params):
@@ -88,37 +120,78 @@ def compile_choice(value, args, params):
     return choice
 
 
-def expand_choices(tree, params, include_path):
-    rows = []
+def unique_choices(rows, definitions):
+    """Yield the rows of each list in `rows` unless the same list, with
+    the same rows, is in `definitions`, and add the new lists to it.
+    A list is all the rows with the same list_name in `rows`.  Rows
+    without a list_name are always yielded."""
+
+    lists = dict()
+
+    for row in rows:
+        if row.get("list_name") is not None:
+            lists.setdefault(row["list_name"], []).append(
+                tuple(row.items()))
+
+    new = set()
+
+    for list_name, content in lists.items():
+        content = tuple(content)
+
+        if list_name not in definitions:
+            definitions[list_name] = content
+            new.add(list_name)
+        elif definitions[list_name] != content:
+            raise ValueError(
+                f"Conflicting definitions of choice list: {list_name}.")
+
+    for row in rows:
+        if row.get("list_name") is None or row["list_name"] in new:
+            yield row
+
+
+def expand_choices(tree, params, include_path, session):
+    rows = Table()
+
+    stack = [Block(tree, params, include_path)]
+
+    with session.expanding():
+        while stack:
+            block = stack[-1]
+            statement = next(block.statements, None)
+
+            if statement is None:
+                stack.pop()
+                if block.close is not None:
+                    block.close()
+                continue
+
+            command, *args = statement
 
-    for command, *args in tree:
-        if command == "#":
-            continue
+            if command == "#":
+                continue
 
-        if command == "@":
-            if args[0] == "include":
-                rows.extend(
+            if command == "@":
+                if args[0] == "include":
                     execute_include(
                         filename=args[1],
                         args=args[2:],
-                        params=copy.deepcopy(params),
-                        include_path=include_path))
+                        params=block.params,
+                        include_path=block.include_path,
+                        stack=stack,
+                        rows=rows,
+                        session=session)
+                else:
+                    raise NameError(f"Unknown command: @{args[0]}.")
+            elif command == "list":
+                list_params = block.params.set("list_name", args[0])
+                list_params = Scope(args_to_params(args[1]), list_params)
+
+                stack.append(
+                    Block(args[2], list_params, block.include_path))
             else:
-                raise NameError(f"Unknown command: @{args[0]}.")
-        elif command == "list":
-            list_params = merge_params(
-                params,
-                {"list_name": args[0]})
-
-            list_params.update(
-                args_to_params(args[1]))
-
-            rows.extend(
-                expand_choices(
-                    args[2], list_params, include_path))
-        else:
-            rows.append(
-                compile_choice(
-                    command, args, copy.deepcopy(params)))
+                rows.append(
+                    compile_choice(
+                        command, args, block.params))
 
     return rows
@@ -0,0 +1,210 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""The command line of beepile, with argh.
+
+beepile runs the common `beepile INPUT -o OUTPUT` without this module,
+as argh takes longer to import than small forms take to compile.
+"""
+
+import os
+import sys
+import time
+
+import argh
+
+from honeybee.comb_to_xlsform import compile_file, make_session
+from honeybee.comb_to_xlsform.profile import profiling
+from honeybee.comb_to_xlsform.survey import PARSERS
+from honeybee.comb_to_xlsform.watch import Watcher
+from honeybee.comb_to_xlsform.writers import WRITERS
+
+
+@argh.arg("input_filename", nargs="?")
+@argh.arg("-o", "--output-filename", type=str,
+          help="output file, or - for standard output; required"
+               " without --batch")
+@argh.arg("--format", choices=tuple(WRITERS),
+          help="write an XLSForm workbook, an XForm, one CSV file per"
+               " worksheet or JSON rows")
+@argh.arg("-p", "--parser", choices=PARSERS)
+@argh.arg("--packrat",
+          help="memoize the pyparsing grammars, which only pays off on"
+               " code that backtracks a lot")
+@argh.arg("--cache-dir", type=str,
+          help="directory of the compile cache (default ~/.cache/honeybee)")
+@argh.arg("--no-cache", help="do not read or write the compile cache")
+@argh.arg("--external-threshold", type=int, metavar="N",
+          help="write choice lists longer than N to CSV files for"
+               " select_one_from_file")
+@argh.arg("--watch",
+          help="rebuild whenever the input or a file it includes changes")
+@argh.arg("--stream",
+          help="write rows as they are compiled, without keeping the"
+               " compiled form in memory")
+@argh.arg("--batch", type=str, metavar="DIR_OR_GLOB",
+          help="compile every .hcs file of a directory, or every file"
+               " that matches a glob, into --out-dir")
+@argh.arg("--out-dir", type=str,
+          help="output directory of --batch, with a directory per form"
+               " with --external-threshold")
+@argh.arg("-j", "--jobs", type=int,
+          help="processes of --batch, or to parse the files that a form"
+               " includes (default: one per CPU)")
+@argh.arg("--lint",
+          help="check the compiled form like beelint, and only write it"
+               " if there are no errors")
+@argh.arg("--profile",
+          help="print the time of each phase and include to stderr")
+@argh.arg("--profile-json", type=str, metavar="FILE",
+          help="write the times of --profile to FILE as JSON")
+@argh.arg("--profile-stats", type=str, metavar="FILE",
+          help="run cProfile and write its pstats to FILE")
+@argh.arg("--profile-memory",
+          help="measure the peak memory with tracemalloc (slow)")
+def main(input_filename, output_filename=None, parser="pyparsing",
+         cache_dir=None, no_cache=False, stream=False, format="xlsx",
+         external_threshold=None, watch=False, batch=None, out_dir=None,
+         jobs=None, lint=False, packrat=False, profile=False,
+         profile_json=None, profile_stats=None, profile_memory=False):
+    profile = (profile or profile_json or profile_stats
+               or profile_memory)
+
+    if packrat:
+        if parser != "pyparsing":
+            raise argh.CommandError("--packrat only applies to pyparsing.")
+
+        from honeybee.comb_to_xlsform.grammar import enable_packrat
+
+        enable_packrat()
+
+    if profile and (batch is not None or watch):
+        raise argh.CommandError(
+            "--profile only applies to the compile of one form.")
+
+    if batch is not None:
+        if input_filename or output_filename or watch or stream or lint:
+            raise argh.CommandError(
+                "--batch takes no input file, -o, --watch, --stream or"
+                " --lint.")
+
+        return main_batch(batch, out_dir, format, parser, cache_dir,
+                          no_cache, external_threshold, jobs, packrat)
+
+    if input_filename is None or output_filename is None:
+        raise argh.CommandError(
+            "An input file and -o are needed without --batch.")
+
+    if stream and format != "xlsx":
+        raise argh.CommandError("--stream only applies to --format=xlsx.")
+
+    if format == "csv" and output_filename == "-":
+        raise argh.CommandError(
+            "--format=csv writes a file per worksheet, and needs an"
+            " output filename instead of -.")
+
+    if stream and lint:
+        raise argh.CommandError(
+            "--lint checks the whole form before writing it, which"
+            " --stream does not keep in memory.")
+
+    if watch and (no_cache or cache_dir is not None):
+        raise argh.CommandError(
+            "--watch keeps its cache in memory, and takes no --no-cache"
+            " or --cache-dir.")
+
+    session = make_session(parser, cache_dir, no_cache, jobs, watch, stream)
+
+    def build():
+        diagnostics = compile_file(
+            input_filename, output_filename, format, session, stream,
+            external_threshold, lint)
+
+        if diagnostics:
+            from honeybee.comb_to_xlsform.check import report
+
+            return report(diagnostics, output_filename)
+
+        return 0
+
+    if watch:
+        Watcher(input_filename, build, session).run()
+        return
+
+    if profile:
+        with profiling(memory=profile_memory,
+                       stats_filename=profile_stats) as stats:
+            status = build()
+
+        print(stats.table(), file=sys.stderr)
+
+        if profile_json is not None:
+            stats.write_json(profile_json)
+    else:
+        status = build()
+
+    if status:
+        sys.exit(status)
+
+
+def main_batch(pattern, out_dir, format, parser, cache_dir, no_cache,
+               external_threshold, jobs, packrat=False):
+    from honeybee.comb_to_xlsform.batch import (
+        batch_inputs, batch_outputs, compile_batch)
+
+    if out_dir is None:
+        raise argh.CommandError("--batch needs --out-dir.")
+
+    input_filenames = batch_inputs(pattern)
+
+    if not input_filenames:
+        raise argh.CommandError(f"No input files: {pattern}.")
+
+    try:
+        outputs = batch_outputs(input_filenames, out_dir, format,
+                                directories=external_threshold is not None)
+    except ValueError as error:
+        raise argh.CommandError(str(error))
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+
+    results = compile_batch(
+        outputs, format, parser, cache_dir, no_cache, external_threshold,
+        jobs, packrat=packrat)
+
+    failed = [filename for filename, (_, error) in results.items()
+              if error is not None]
+
+    print(f"Compiled {len(results) - len(failed)} of {len(results)} forms"
+          f" in {time.perf_counter() - start:.2f} s.")
+
+    if failed:
+        raise argh.CommandError(
+            f"{len(failed)} failed: {', '.join(sorted(failed))}")
+
+
+def run(argv):
+    "Run beepile with the arguments `argv`."
+
+    if argv[:1] == ["serve"]:
+        from honeybee.comb_to_xlsform.server import serve
+
+        argh.dispatch_command(serve, argv=argv[1:])
+    else:
+        argh.dispatch_command(main, argv=argv)
@@ -16,8 +16,23 @@
 # <https://www.gnu.org/licenses/>.
 
 import re
-import copy
 import os.path
+import sys
+import functools
+
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+from honeybee.comb_to_xlsform.model import (
+    Comparison, Relevance, conjunction)
+
+
+def cached_grammar(function):
+    """Build a grammar on first use and return the same one afterwards.
+    Grammar functions import pyparsing themselves, so that it is only
+    loaded when a grammar is needed."""
+
+    return functools.lru_cache(maxsize=None)(function)
 
 
 def new_path_and_filename(path, filename):
@@ -31,6 +46,18 @@ def new_path_and_filename(path, filename):
     return path, filename
 
 
+@contextmanager
+def open_output(filename, mode="w", **kwargs):
+    "Open `filename` for writing, or standard output if it is `-`."
+
+    if filename == "-":
+        yield sys.stdout.buffer if "b" in mode else sys.stdout
+        sys.stdout.flush()
+    else:
+        with open(filename, mode, **kwargs) as f:
+            yield f
+
+
 def pairwise(iterable):
     a = iter(iterable)
     return zip(a, a)
@@ -38,14 +65,14 @@ def pairwise(iterable):
 
 def if_cond_to_relevance(cond):
     if isinstance(cond, str):
-        return cond
+        return Relevance((cond,))
 
     if isinstance(cond[0], list):
         left_expr = "".join(str(element) for element in cond[0])
     else:
         left_expr = cond[0]
 
-    return f"{left_expr} {cond[1]} {cond[2]}"
+    return Relevance((Comparison(left_expr, cond[1], cond[2]),))
 
 
 def args_to_params(args):
@@ -59,11 +86,11 @@ def args_to_params(args):
 
 
 def merge_relevance(cond_1, cond_2):
-    return f"({cond_1}) and ({cond_2})"
+    return conjunction(cond_1, cond_2)
 
 
 def merge_params(params_1, params_2):
-    params = copy.deepcopy(params_1)
+    params = params_1.copy()
     params.update(params_2)
 
     if "relevance" in params_1 and "relevance" in params_2:
@@ -73,6 +100,109 @@ def merge_params(params_1, params_2):
     return params
 
 
+class Block:
+    "A block of statements waiting on the stack of an expander."
+
+    __slots__ = ("statements", "params", "include_path", "include",
+                 "close")
+
+    def __init__(self, tree, params, include_path, include=None,
+                 close=None):
+        self.statements = iter(tree)
+        self.params = params
+        self.include_path = include_path
+        self.include = include
+        self.close = close
+
+
+def check_include_cycle(stack, include):
+    """Raise an error if the (key, filename) pair `include` is already
+    being expanded further down the stack."""
+
+    chain = [block.include for block in stack
+             if block.include is not None]
+    keys = [key for key, _ in chain]
+
+    if include[0] in keys:
+        filenames = [filename for _, filename
+                     in chain[keys.index(include[0]):]]
+
+        raise ValueError(
+            "Include cycle: {}.".format(
+                " -> ".join(filenames + [include[1]])))
+
+
+macro_re = re.compile(r"\$\{!([^}]+)\}")
+
+
+def check_macros(string, macros):
+    "Raise the error that substitute_macros would raise, if any."
+
+    for match in macro_re.finditer(string):
+        if match.group(1) not in macros:
+            raise NameError(f"Unknown macro: {match.group(1)}.")
+
+
+class Scope(Mapping):
+    """Parameters inherited by the rows of a block.
+
+    A scope holds the parameters set by its own block and shares the
+    rest with its parent, so entering a block or compiling a row
+    never copies the parameters of the blocks around it.  Scopes are
+    not modified once created; `merge` and `set` return new ones.
+    """
+
+    __slots__ = ("params", "parent", "flat")
+
+    def __init__(self, params=None, parent=None):
+        self.params = params or dict()
+        self.parent = parent
+        self.flat = None
+
+    def resolve(self):
+        "Return every parameter in scope as a dict, computed once."
+
+        if self.flat is None:
+            if self.parent is None:
+                self.flat = self.params
+            else:
+                self.flat = {**self.parent.resolve(), **self.params}
+
+        return self.flat
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __contains__(self, key):
+        return key in self.resolve()
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def copy(self):
+        return dict(self.resolve())
+
+    def set(self, key, value):
+        return Scope({key: value}, self)
+
+    def merge(self, params):
+        "Return the scope of a block with `params`, as merge_params."
+
+        if "relevance" in params and "relevance" in self:
+            params = {**params,
+                      "relevance": merge_relevance(
+                          self["relevance"], params["relevance"])}
+
+        return Scope(params, self)
+
+    def without(self, *keys):
+        return Scope({key: value for key, value in self.items()
+                      if key not in keys})
+
+
 def substitute_macros(string, macros):
     def callback(match):
         macro_name = match.group(1)
@@ -82,4 +212,4 @@ def substitute_macros(string, macros):
 
         return macros[macro_name]
 
-    return re.sub(r"\$\{!([^}]+)\}", callback, string)
+    return macro_re.sub(callback, string)
@@ -0,0 +1,222 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""External choice lists.
+
+Choice lists longer than a threshold are written to a CSV file of
+their own, `choices-<list_name>.csv`, instead of the choices sheet,
+and the questions that use them become `select_one_from_file` or
+`select_multiple_from_file` questions.  pyxform has no `or_other` for
+a list from a file, so the lists of `or_other` selects stay on the
+choices sheet.
+"""
+
+import csv
+import os
+
+from honeybee.comb_to_xlsform.model import Survey, Table, render
+
+
+SELECTS = ("select_one", "select_multiple")
+
+
+def external_filename(list_name):
+    return f"choices-{list_name}.csv"
+
+
+def external_type(question_type, lists):
+    "Return the type of a question with the lists in `lists` external."
+
+    words = question_type.split()
+
+    if len(words) == 2 and words[0] in SELECTS and words[1] in lists:
+        return f"{words[0]}_from_file {external_filename(words[1])}"
+
+    return question_type
+
+
+def other_list(row):
+    "Return the list of the `or_other` select in `row`, or None."
+
+    words = str(row.get("type", "")).split()
+
+    if len(words) == 3 and words[0] in SELECTS and words[2] == "or_other":
+        return words[1]
+
+    return None
+
+
+def external_row(row, lists):
+    if not lists or "type" not in row:
+        return row
+
+    question_type = external_type(row["type"], lists)
+
+    if question_type == row["type"]:
+        return row
+
+    return {**row, "type": question_type}
+
+
+class ChoiceLists:
+    """The size and columns of each list in a sequence of choices, and
+    the lists of the `or_other` selects in a sequence of questions."""
+
+    __slots__ = ("sizes", "columns", "count", "layouts", "others")
+
+    def __init__(self, rows=(), questions=()):
+        self.sizes = dict()
+        self.columns = dict()
+        self.count = 0
+        self.layouts = set()
+        self.others = set()
+
+        for row in rows:
+            self.add(row)
+
+        for row in questions:
+            self.add_question(row)
+
+    def add(self, row):
+        list_name = row.get("list_name")
+
+        self.sizes[list_name] = self.sizes.get(list_name, 0) + 1
+        self.count += 1
+
+        layout = getattr(row, "layout", None)
+
+        if layout is not None:
+            if (list_name, layout) in self.layouts:
+                return
+
+            self.layouts.add((list_name, layout))
+
+        columns = self.columns.setdefault(list_name, dict())
+
+        # Each column keeps the index of the first row that used it.
+        #
+        for name in row:
+            columns.setdefault(name, self.count)
+
+    def add_question(self, row):
+        list_name = other_list(row)
+
+        if list_name is not None:
+            self.others.add(list_name)
+
+    def external(self, threshold):
+        """Return the names of the lists longer than `threshold`, but
+        for the lists of `or_other` selects and choices without a
+        list."""
+
+        if threshold is None:
+            return set()
+
+        return {list_name for list_name, size in self.sizes.items()
+                if size > threshold and list_name is not None
+                and list_name not in self.others}
+
+    def column_names(self, exclude=()):
+        """Return the columns of the lists not in `exclude`, in order of
+        first use."""
+
+        first = dict()
+
+        for list_name, columns in self.columns.items():
+            if list_name in exclude:
+                continue
+
+            for name, index in columns.items():
+                if index < first.get(name, self.count + 1):
+                    first[name] = index
+
+        return sorted(first, key=first.get)
+
+
+class ExternalWriter:
+    "Write the rows of external lists to a CSV file per list."
+
+    def __init__(self, directory, lists, names):
+        self.files = []
+        self.writers = dict()
+
+        try:
+            for list_name in names:
+                columns = ["value", "label"] + [
+                    name for name in lists.columns[list_name]
+                    if name not in ("list_name", "value", "label")]
+
+                f = open(
+                    os.path.join(directory, external_filename(list_name)),
+                    "w", newline="", encoding="utf-8")
+                self.files.append(f)
+
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(["name"] + columns[1:])
+
+                self.writers[list_name] = writer, columns
+        except BaseException:
+            self.close()
+            raise
+
+    def write(self, row):
+        writer, columns = self.writers[row["list_name"]]
+        writer.writerow(render(row.get(name)) for name in columns)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def output_directory(filename):
+    "Return the directory of the external lists of output `filename`."
+
+    if filename == "-":
+        return "."
+
+    return os.path.dirname(filename) or "."
+
+
+def split_external_choices(survey, threshold, directory):
+    """Write the lists of `survey` longer than `threshold` to CSV files
+    in `directory`, and return the survey without them."""
+
+    lists = ChoiceLists(survey.choices, survey.survey)
+    names = lists.external(threshold)
+
+    if not names:
+        return survey
+
+    choices = Table()
+
+    with ExternalWriter(directory, lists, names) as writer:
+        for row in survey.choices:
+            if row.get("list_name") in names:
+                writer.write(row)
+            else:
+                choices.append(row)
+
+    return Survey(
+        survey=Table(external_row(row, names) for row in survey.survey),
+        choices=choices,
+        settings=survey.settings)
@@ -0,0 +1,436 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Hand-written parser for Honeycomb.
+
+This is an alternative to the pyparsing grammars in survey.py and
+choices.py.  It joins continuation lines with preprocess_lines,
+splits each line into tokens, and parses the tokens by recursive
+descent.  The trees are the same nested lists that the pyparsing
+grammars return.
+"""
+
+import re
+import sys
+
+from honeybee.comb_to_xlsform.preprocess import preprocess_lines
+
+
+KEYWORDS = ("if", "group", "repeat")
+
+survey_token_re = re.compile(
+    r"""[ \t\r]+
+      | (?P<comment>\#.*)
+      | (?P<identifier>[A-Za-z][A-Za-z0-9_]*)
+      | (?P<number>[0-9]+)
+      | (?P<string>"(?:\\.|[^"\n\r\\])*"|'(?:\\.|[^'\n\r\\])*')
+      | (?P<punctuation>\$\{|!=|>=|<=|[=><@:}.])
+      | (?P<error>.)
+    """,
+    re.VERBOSE)
+
+choices_token_re = re.compile(
+    r"""[ \t\r]+
+      | (?P<comment>\#.*)
+      | (?P<identifier>[A-Za-z][A-Za-z0-9_]*)
+      | (?P<number>[0-9]+)
+      | (?P<string>"(?:\\.|[^"\n\r\\])*")
+      | (?P<punctuation>[@:])
+      | (?P<error>.)
+    """,
+    re.VERBOSE)
+
+unescape_re = re.compile(r"\\(.)")
+
+ESCAPES = {"t": "\t", "n": "\n", "f": "\f", "r": "\r", "0": "\0"}
+COMPARISONS = ("=", "!=", ">=", ">", "<=", "<")
+
+
+class ParseError(ValueError):
+    "Raised when Honeycomb source cannot be parsed."
+
+    def __init__(self, message, line):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+def parse_errors():
+    """Return the exceptions that a failed parse raises with either
+    parser.  pyparsing is only imported to build its grammars, so its
+    exception cannot be raised before then."""
+
+    pyparsing = sys.modules.get("pyparsing")
+
+    if pyparsing is None:
+        return (ParseError,)
+
+    return (ParseError, pyparsing.ParseException)
+
+
+class Backtrack(Exception):
+    pass
+
+
+def unquote(string):
+    "Strip the quotes and resolve escapes like pyparsing's QuotedString."
+
+    string = string[1:-1]
+
+    if "\\" not in string:
+        return string
+
+    return unescape_re.sub(
+        lambda match: ESCAPES.get(match.group(1), match.group(1)),
+        string)
+
+
+def tokenize(lines, token_re):
+    """Split lines into (kind, value, line, column, line number)
+    tuples, where `line` counts the lines that were passed in and
+    `line number` refers to the original source."""
+
+    tokens = []
+
+    for index, (number, line) in enumerate(lines):
+        for match in token_re.finditer(line):
+            kind = match.lastgroup
+
+            if kind is None:
+                continue
+            elif kind == "comment":
+                value = match.group()[1:]
+            elif kind == "string":
+                value = unquote(match.group())
+            else:
+                value = match.group()
+
+            tokens.append(
+                (kind, value, index, match.start() + 1, number))
+
+    return tokens
+
+
+class Parser:
+    "Recursive-descent parser over the tokens of one file."
+
+    def __init__(self, tokens, indents):
+        self.tokens = tokens
+        self.indents = indents
+        self.position = 0
+        self.furthest = 0
+
+    def fail(self, message="unexpected input"):
+        self.furthest = max(self.furthest, self.position)
+        raise Backtrack(message)
+
+    def peek(self, offset=0):
+        position = self.position + offset
+        if position < len(self.tokens):
+            return self.tokens[position]
+        return None
+
+    def at_kind(self, kind, value=None, offset=0):
+        token = self.peek(offset)
+        return (token is not None
+                and token[0] == kind
+                and (value is None or token[1] == value))
+
+    def take(self, kind, value=None):
+        if not self.at_kind(kind, value):
+            self.fail(f"expected {value or kind}")
+
+        token = self.tokens[self.position]
+        self.position += 1
+        return token[1]
+
+    def at_line_end(self):
+        "The equivalent of pyparsing's stopOn=LineEnd()."
+
+        return (self.position == len(self.tokens)
+                or (self.tokens[self.position][2]
+                    != self.tokens[self.position - 1][2]))
+
+    def at_value(self, offset=0):
+        return (self.at_kind("number", offset=offset)
+                or self.at_kind("string", offset=offset))
+
+    def value(self):
+        if not self.at_value():
+            self.fail("expected a number or a string")
+
+        return self.take(self.tokens[self.position][0])
+
+    def param(self):
+        "Return a `name value` pair, or None if there is none."
+
+        if (self.at_kind("identifier")
+                and (self.at_kind("identifier", offset=1)
+                     or self.at_value(offset=1))):
+            pair = [self.tokens[self.position][1],
+                    self.tokens[self.position + 1][1]]
+            self.position += 2
+            return pair
+
+        return None
+
+    def params(self):
+        params = []
+
+        while not self.at_line_end():
+            pair = self.param()
+            if pair is None:
+                break
+            params.extend(pair)
+
+        return params
+
+    def command(self):
+        tokens = [self.take("punctuation", "@"),
+                  self.take("identifier")]
+
+        if self.at_line_end():
+            self.fail("expected command arguments")
+
+        while True:
+            if self.at_kind("identifier"):
+                tokens.append(self.take("identifier"))
+            else:
+                tokens.append(self.value())
+
+            if (self.at_line_end()
+                    or not (self.at_kind("identifier")
+                            or self.at_value())):
+                return tokens
+
+    def block(self):
+        "Parse the statements indented under the line just read."
+
+        header_col = self.indents[self.tokens[self.position - 1][2]]
+
+        token = self.peek()
+        if token is None or token[3] <= header_col:
+            self.fail("expected an indented block")
+
+        block_col = token[3]
+        statements = [self.statement()]
+
+        while True:
+            token = self.peek()
+            if token is None:
+                return statements
+
+            if token[3] != block_col:
+                break
+
+            start = self.position
+
+            try:
+                statements.append(self.statement())
+            except Backtrack:
+                self.position = start
+                break
+
+        if token[3] != block_col and token[3] > header_col:
+            self.fail("unexpected indentation")
+
+        return statements
+
+    def try_parse(self, method):
+        "Run `method`, or return None and rewind if it fails."
+
+        start = self.position
+
+        try:
+            return method()
+        except Backtrack:
+            self.position = start
+            return None
+
+    def parse(self):
+        statements = []
+
+        while self.position < len(self.tokens):
+            start = self.position
+
+            try:
+                statements.append(self.statement())
+            except Backtrack:
+                self.position = start
+                break
+
+        if not statements or self.position < len(self.tokens):
+            self.position = max(self.position, self.furthest)
+            token = self.peek()
+
+            if token is None:
+                raise ParseError(
+                    "unexpected end of file",
+                    self.tokens[-1][4] if self.tokens else 1)
+
+            raise ParseError(f"unexpected {token[1]!r}", token[4])
+
+        return statements
+
+
+class SurveyParser(Parser):
+    def statement(self):
+        kind, value = self.tokens[self.position][:2]
+
+        if kind == "comment":
+            self.position += 1
+            return ["#", value]
+        elif kind == "punctuation" and value == "@":
+            return self.command()
+        elif kind == "identifier" and value in KEYWORDS:
+            block = self.try_parse(
+                getattr(self, f"{value}_block"))
+            if block is not None:
+                return block
+
+        return self.question()
+
+    def condition(self):
+        if self.at_kind("punctuation", "${"):
+            left = [self.take("punctuation", "${"),
+                    self.take("identifier"),
+                    self.take("punctuation", "}")]
+        elif self.at_kind("punctuation", "."):
+            left = self.take("punctuation", ".")
+        else:
+            return self.value()
+
+        token = self.peek()
+        if token is None or token[1] not in COMPARISONS:
+            self.fail("expected a comparison")
+
+        self.position += 1
+        return [left, token[1], self.value()]
+
+    def if_cond(self):
+        return [self.take("identifier", "if"), self.condition()]
+
+    def if_block(self):
+        tokens = self.if_cond()
+        self.take("punctuation", ":")
+        return tokens + [self.block()]
+
+    def group_name(self):
+        name = [self.take("identifier")]
+        if self.at_kind("string"):
+            name.append(self.take("string"))
+        return name
+
+    def group_params(self):
+        params = self.params()
+
+        if self.at_kind("identifier", "if"):
+            params.extend(self.try_parse(self.if_cond) or [])
+
+        return params
+
+    def group_block(self):
+        tokens = [self.take("identifier", "group"),
+                  self.group_name(),
+                  self.group_params()]
+
+        if self.at_kind("identifier", "if"):
+            tokens.extend(self.try_parse(self.if_cond) or [])
+
+        self.take("punctuation", ":")
+        return tokens + [self.block()]
+
+    def repeat_block(self):
+        tokens = [self.take("identifier", "repeat"),
+                  self.group_name(),
+                  self.group_params()]
+        self.take("punctuation", ":")
+        return tokens + [self.block()]
+
+    def question(self):
+        tokens = [self.take("identifier"),
+                  [self.take("identifier")]]
+
+        while self.at_kind("identifier"):
+            tokens[1].append(self.take("identifier"))
+
+        self.take("punctuation", ":")
+
+        if self.at_kind("string"):
+            tokens.append(self.take("string"))
+
+        return tokens + self.params()
+
+
+class ChoicesParser(Parser):
+    def statement(self):
+        kind, value = self.tokens[self.position][:2]
+
+        if kind == "comment":
+            self.position += 1
+            return ["#", value]
+        elif kind == "punctuation" and value == "@":
+            return self.command()
+        elif kind == "identifier" and value == "list":
+            return self.list_block()
+
+        return [self.value(), self.value(), self.params()]
+
+    def list_block(self):
+        tokens = [self.take("identifier", "list"),
+                  self.take("identifier"),
+                  self.params()]
+        self.take("punctuation", ":")
+        return tokens + [self.block()]
+
+
+def expand_tabs(lines):
+    """Expand the tabs of each line to spaces, as pyparsing does with
+    the whole code before parsing it, which changes the tabs inside
+    strings too."""
+
+    return [(number, line.expandtabs()) for number, line in lines]
+
+
+def line_indents(lines):
+    return [len(line) - len(line.lstrip(" \t")) + 1
+            for _, line in lines]
+
+
+def parse_survey_tree(code):
+    "Parse survey code into the tree that expand_survey takes."
+
+    lines = preprocess_lines(code)
+
+    if "\t" in code:
+        lines = expand_tabs(lines)
+
+    return SurveyParser(
+        tokenize(lines, survey_token_re),
+        line_indents(lines)).parse()
+
+
+def parse_choices_tree(code):
+    "Parse choices code into the tree that expand_choices takes."
+
+    lines = list(enumerate(code.split("\n"), start=1))
+
+    if "\t" in code:
+        lines = expand_tabs(lines)
+
+    return ChoicesParser(
+        tokenize(lines, choices_token_re),
+        line_indents(lines)).parse()
@@ -0,0 +1,112 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+import pyparsing as pp
+from pyparsing import (
+    Group, LineEnd, ParseException, Suppress, col)
+
+
+WHITESPACE = " \t\r\n"
+
+
+def enable_packrat(cache_size_limit=128):
+    """Turn on pyparsing's packrat memoization for every grammar.
+
+    The grammars are built once per process and no element keeps
+    state between parses, so memoization cannot change the parse
+    tree.  It is off by default because the Honeycomb grammars
+    rarely backtrack on valid input, and the bookkeeping costs more
+    than it saves there.
+    """
+
+    pp.ParserElement.enablePackrat(cache_size_limit)
+
+
+def skip_whitespace(string, loc):
+    while loc < len(string) and string[loc] in WHITESPACE:
+        loc += 1
+
+    return loc
+
+
+def line_indent(string, loc):
+    "Column of the first non-blank character on the line of `loc`."
+
+    start = string.rfind("\n", 0, loc) + 1
+
+    while start < loc and string[start] in " \t":
+        start += 1
+
+    return col(start, string)
+
+
+class IndentedBody(pp.ParseElementEnhance):
+    """Statements indented under the line that opens the block.
+
+    Unlike pyparsing's indentedBlock, the indentation levels are
+    read off the input rather than kept on a shared stack, so the
+    result only depends on the location and packrat memoization
+    cannot return a result computed at another nesting level.
+    """
+
+    def __init__(self, expr):
+        super().__init__(expr)
+        self.skipWhitespace = False
+        self.expr.ignore(Suppress("\\") + LineEnd())
+
+    def parseImpl(self, instring, loc, doActions=True):
+        header_col = line_indent(instring, loc)
+
+        loc = skip_whitespace(instring, loc)
+        block_col = col(loc, instring)
+
+        if loc >= len(instring) or block_col <= header_col:
+            raise ParseException(instring, loc, "not a subentry", self)
+
+        loc, tokens = self.expr._parse(instring, loc, doActions)
+        tokens = tokens.copy()
+
+        while True:
+            next_loc = skip_whitespace(instring, loc)
+
+            if next_loc >= len(instring):
+                return loc, tokens
+
+            next_col = col(next_loc, instring)
+
+            if next_col != block_col:
+                break
+
+            try:
+                loc, statement = self.expr._parse(
+                    instring, next_loc, doActions)
+            except ParseException:
+                break
+
+            tokens += statement
+
+        if next_col != block_col and next_col > header_col:
+            raise ParseException(
+                instring, next_loc, "not an unindent", self)
+
+        return loc, tokens
+
+
+def indented_block(statement):
+    "Match one or more `statement`s indented under the current line."
+
+    return Group(IndentedBody(Group(pp.ungroup(statement))))
@@ -0,0 +1,232 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Compiled forms.
+
+A compiled form is a Survey of three Tables, one per worksheet.  The
+rows of a table are read-only mappings that store their values in a
+tuple, and rows with the same columns share one Layout, so a row
+costs two slots and a tuple instead of a dict.  Column names and the
+values of columns that repeat across many rows are interned.
+
+Relevance conditions are kept as a Relevance, a conjunction of
+conditions that is turned into XPath when a row is written.
+"""
+
+import sys
+
+from collections import namedtuple
+from collections.abc import Mapping
+
+
+Survey = namedtuple("Survey", ("survey", "choices", "settings"))
+
+
+class Comparison(namedtuple("Comparison", ("left", "operator", "right"))):
+    "A condition of an if block, like `${age} >= 18`."
+
+    __slots__ = ()
+
+    def __str__(self):
+        return f"{self.left} {self.operator} {self.right}"
+
+
+class Relevance:
+    """A conjunction of conditions, each a Comparison or an XPath
+    string, without duplicates."""
+
+    __slots__ = ("terms", "text")
+
+    def __init__(self, terms):
+        self.terms = tuple(dict.fromkeys(terms))
+        self.text = None
+
+    def __str__(self):
+        if self.text is None:
+            if len(self.terms) == 1:
+                self.text = str(self.terms[0])
+            else:
+                self.text = " and ".join(
+                    f"({term})" for term in self.terms)
+
+        return self.text
+
+    def __repr__(self):
+        return f"Relevance({self.terms!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, Relevance):
+            return self.terms == other.terms
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.terms)
+
+    def __getstate__(self):
+        return self.terms
+
+    def __setstate__(self, terms):
+        self.terms = terms
+        self.text = None
+
+
+def conjunction(*conditions):
+    "Return a Relevance of all the terms of `conditions`."
+
+    return Relevance(
+        term for condition in conditions
+        for term in (condition.terms if isinstance(condition, Relevance)
+                     else (condition,)))
+
+
+def render(value):
+    "Return a cell value as it is written to a worksheet."
+
+    if isinstance(value, Relevance):
+        return str(value)
+
+    return value
+
+
+INTERNED_COLUMNS = frozenset((
+    "type", "list_name", "required", "relevance", "appearance",
+    "repeat_count"))
+
+layouts = dict()
+
+
+class Layout:
+    "The column names shared by rows with the same keys."
+
+    __slots__ = ("names", "index", "interned")
+
+    def __init__(self, names):
+        self.names = tuple(sys.intern(name) for name in names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.interned = tuple(name in INTERNED_COLUMNS
+                              for name in self.names)
+
+
+def get_layout(names):
+    layout = layouts.get(names)
+
+    if layout is None:
+        layout = layouts[names] = Layout(names)
+
+    return layout
+
+
+def make_row(names, values):
+    layout = get_layout(names)
+
+    return Row(layout, tuple(
+        sys.intern(value) if interned and isinstance(value, str)
+        else value
+        for value, interned in zip(values, layout.interned)))
+
+
+class Row(Mapping):
+    "A read-only row of a worksheet."
+
+    __slots__ = ("layout", "values")
+
+    def __init__(self, layout, values):
+        self.layout = layout
+        self.values = values
+
+    def __getitem__(self, key):
+        return self.values[self.layout.index[key]]
+
+    def get(self, key, default=None):
+        i = self.layout.index.get(key)
+        return default if i is None else self.values[i]
+
+    def __contains__(self, key):
+        return key in self.layout.index
+
+    def __iter__(self):
+        return iter(self.layout.names)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Row({dict(self)!r})"
+
+    def __reduce__(self):
+        return make_row, (self.layout.names, self.values)
+
+
+class Table:
+    "The rows of a worksheet and their column names in order of use."
+
+    __slots__ = ("rows", "columns")
+
+    def __init__(self, rows=()):
+        self.rows = []
+        self.columns = dict()
+        self.extend(rows)
+
+    def append(self, row):
+        if not isinstance(row, Row):
+            row = make_row(tuple(row), tuple(row.values()))
+
+        for name in row.layout.names:
+            if name not in self.columns:
+                self.columns[name] = None
+
+        self.rows.append(row)
+
+    def extend(self, rows):
+        if isinstance(rows, Table):
+            self.columns.update(dict.fromkeys(rows.columns))
+            self.rows.extend(rows.rows)
+        else:
+            for row in rows:
+                self.append(row)
+
+    def truncate(self, length):
+        "Drop the rows after the first `length`."
+
+        if length < len(self.rows):
+            del self.rows[length:]
+            self.columns = dict.fromkeys(
+                name for layout in dict.fromkeys(
+                    row.layout for row in self.rows)
+                for name in layout.names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Table(self.rows[index])
+
+        return self.rows[index]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __eq__(self, other):
+        if isinstance(other, Table):
+            return self.rows == other.rows
+
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Table({self.rows!r})"
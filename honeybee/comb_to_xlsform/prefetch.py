@@ -0,0 +1,185 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Parse the files of a form in parallel before expanding it.
+
+Expansion reads each @include and @choices file when it reaches the
+command, and parsing is most of its time.  Before expanding, the
+parse tree of the form is scanned for the files it names, these are
+parsed on a pool of processes, and the files that they name are
+parsed in turn.  The trees go into the session, where expansion
+finds them, so the output is the same as without prefetching.
+
+Files are parsed as `Session.instantiate` would parse them: as their
+slotted template if they have macros.  Files whose names depend on
+macros, and files that fail to parse, are left to expansion.  The
+code of each file is kept in the session for expansion to reuse.
+"""
+
+import concurrent.futures
+import functools
+import os
+import time
+
+from honeybee.comb_to_xlsform import profile
+from honeybee.comb_to_xlsform.common import new_path_and_filename
+from honeybee.comb_to_xlsform.fastparse import parse_errors
+from honeybee.comb_to_xlsform.template import SLOT, slotted_code
+
+
+# The code to parse, in characters, below which a pool of processes
+# costs more than it saves.
+#
+PARALLEL_MIN_SIZE = {"pyparsing": 16 * 1024, "fast": 256 * 1024}
+
+
+def try_parse(parse, code, parser):
+    "Return `parse(code, parser)`, or None if it fails."
+
+    try:
+        return parse(code, parser)
+    except parse_errors() + (ValueError,):
+        return None
+
+
+def timed(function, *args):
+    "Return `function(*args)` and the seconds that it took."
+
+    start = time.perf_counter()
+    result = function(*args)
+
+    return result, time.perf_counter() - start
+
+
+def find_commands(tree):
+    "Yield each command node of `tree`, in blocks or not."
+
+    for node in tree:
+        if isinstance(node, list):
+            if node[:1] == ["@"]:
+                yield node
+            else:
+                yield from find_commands(node)
+
+
+def included_files(kind, tree, include_path):
+    """Yield (kind, include path, filename) for each file that a tree
+    of `kind` includes."""
+
+    for command in find_commands(tree):
+        if len(command) < 3 or not isinstance(command[2], str):
+            continue
+
+        if command[1] == "include":
+            included_kind = kind
+        elif command[1] == "choices" and kind == "survey":
+            included_kind = "choices"
+        else:
+            continue
+
+        if SLOT in command[2] or "${" in command[2]:
+            continue
+
+        yield (included_kind,
+               *new_path_and_filename(include_path, command[2]))
+
+
+def prefetch(tree, include_path, session, parsers):
+    """Parse the files that the survey `tree` includes, directly or
+    not, on `session.jobs` processes.  `parsers` has the parse
+    function of each kind of file."""
+
+    seen = set()
+    pool = None
+    files = list(included_files("survey", tree, include_path))
+    session.prefetched.clear()
+
+    # The seconds that parsing each code took.
+    #
+    seconds = dict()
+
+    def parallel_map(function, codes, parser_names):
+        nonlocal pool
+
+        function = functools.partial(timed, function)
+
+        if (len(codes) < 2
+                or sum(map(len, codes)) < PARALLEL_MIN_SIZE.get(
+                    session.parser, 0)):
+            results = map(function, codes, parser_names)
+        else:
+            if pool is None:
+                pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=session.jobs)
+
+            results = pool.map(function, codes, parser_names)
+
+        for code, (tree, code_seconds) in zip(codes, results):
+            seconds[code] = code_seconds
+            yield tree
+
+    try:
+        while files:
+            # The codes of each kind to parse, with the include path
+            # of each file that has this code, and its first filename.
+            #
+            codes = {"survey": dict(), "choices": dict()}
+            filenames = dict()
+
+            for kind, path, filename in files:
+                if (kind, os.path.abspath(filename)) in seen:
+                    continue
+
+                seen.add((kind, os.path.abspath(filename)))
+
+                try:
+                    code = session.read(filename, prefetch=True)
+                except (OSError, UnicodeDecodeError, ValueError):
+                    continue
+
+                slotted = slotted_code(code)
+
+                if slotted is not None:
+                    code = slotted[0]
+
+                codes[kind].setdefault(code, []).append(path)
+                filenames.setdefault((kind, code), filename)
+
+            files = []
+
+            for kind, paths in codes.items():
+                session.parse_many(
+                    kind, list(paths),
+                    functools.partial(try_parse, parsers[kind]),
+                    parallel_map)
+
+                for code, code_paths in paths.items():
+                    if profile.active is not None and code in seconds:
+                        profile.active.parse(
+                            kind, os.path.normpath(filenames[kind, code]),
+                            seconds.pop(code))
+
+                    tree = session.trees.get((kind, code))
+
+                    if tree is None:
+                        continue
+
+                    for path in code_paths:
+                        files.extend(included_files(kind, tree, path))
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -18,8 +18,86 @@
 import re
 
 
+word_re = re.compile(r"\w")
+keyword_re = re.compile(r"(?:if|group|repeat)\s")
+continuation_re = re.compile(r"""[ \t]+["\w]""")
+whitespace_re = re.compile(r"[ \t\n]+")
+
+
 def remove_whitespace(string):
-    return re.sub(r"[ \t\n]+", " ", string).strip()
+    return whitespace_re.sub(" ", string).strip()
+
+
+def line_head(content):
+    """Return the part of a line, without its indentation, that
+    continuation lines are appended to, or None if there is none.
+
+    Those are "@" commands and lines that start with a word and end
+    with a colon, like question definitions, except for lines that
+    start with a keyword.
+    """
+
+    if content.startswith("@"):
+        return content
+
+    if not word_re.match(content) or keyword_re.match(content):
+        return None
+
+    head = content.rstrip(" ")
+
+    if len(head) > 1 and head.endswith(":"):
+        return head
+
+    return None
+
+
+def join_continuations(lines):
+    """Yield (line number, line) for each line of the source, with
+    continuation lines appended to the line that they continue.
+
+    Continuation lines are the lines right below a question
+    definition or command that are indented deeper than it and
+    start with a word or a quote.  No line is scanned more than
+    twice, so this takes time linear in the size of the source.
+    """
+
+    count = len(lines)
+    index = 0
+
+    while index < count:
+        line = lines[index]
+        content = line.lstrip(" \t")
+        head = line_head(content)
+        end = index + 1
+
+        if head is not None:
+            depth = len(line) - len(content)
+            indent = line[:depth]
+
+            while (end < count
+                   and lines[end].startswith(indent)
+                   and continuation_re.match(lines[end], depth)):
+                end += 1
+
+        if end == index + 1:
+            yield end, line
+        else:
+            yield index + 1, "{}{} {}".format(
+                indent, head,
+                remove_whitespace("\n".join(lines[index + 1:end])))
+
+        index = end
+
+
+def preprocess_lines(code):
+    """Join continuation lines, and return a list of (line number,
+    line) that maps each joined line to where it starts in `code`."""
+
+    return list(join_continuations(code.split("\n")))
+
+
+def preprocess_indent(code):
+    return "\n".join(line for _, line in preprocess_lines(code))
 
 
 def remove_indent(match):
@@ -30,6 +108,10 @@ def remove_indent(match):
         remove_whitespace(match.group(4)))
 
 
+# The regular expression that preprocess_indent used to apply.  It
+# backtracks on long lines and is only kept to check and benchmark
+# join_continuations against.
+#
 indent_re = re.compile(
     r"""# Beginning of file or new line:
         #
@@ -54,5 +136,5 @@ indent_re = re.compile(
     re.VERBOSE)
 
 
-def preprocess_indent(code):
+def preprocess_indent_regex(code):
     return indent_re.sub(remove_indent, code)
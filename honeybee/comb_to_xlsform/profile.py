@@ -0,0 +1,269 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Time the phases of a compile and the files that it includes.
+
+While a Profile is active, `phase(name, size)` measures a phase of
+the compile: reading, preprocessing, parsing, filling in macros,
+the compile cache, expansion and writing.  Phases nest, and each
+phase is only charged the time that its nested phases do not take,
+so the times of all phases add up to the time of the compile.
+
+Each @include and @choices file is timed from the start to the end
+of its expansion, with the files that it includes in turn, and is
+identified by its path and macro arguments.  An include that comes
+from the cache is counted as cached.  Files parsed ahead of time with
+--jobs add their parse time to their first include.  With --stream,
+rows are written as they are expanded, so their writing is counted in
+"expand and write" and in the time of their include.
+
+Hooks are called with a dict for each phase and include as it ends:
+{"event": "phase", "name", "seconds", "bytes"} or {"event":
+"include", "kind", "file", "macros", "seconds", "bytes", "rows",
+"cached"}.
+"""
+
+import contextlib
+import json
+import time
+
+
+active = None
+
+NO_PHASE = contextlib.nullcontext()
+
+
+def phase(name, size=0):
+    """Return a context manager that measures the phase `name` with
+    `size` bytes of input, if a Profile is active."""
+
+    if active is None:
+        return NO_PHASE
+
+    return active.measure(name, size)
+
+
+class PhaseStats:
+    __slots__ = ("seconds", "calls", "bytes")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.bytes = 0
+
+
+class IncludeStats:
+    __slots__ = ("seconds", "calls", "cached", "bytes", "rows")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.cached = 0
+        self.bytes = 0
+        self.rows = 0
+
+
+class Profile:
+    "Statistics of the phases and includes of one or more compiles."
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.phases = dict()
+        self.includes = dict()
+        self.parsed = dict()
+        self.seconds = 0.0
+        self.peak_memory = None
+
+        # The start and the time of nested phases of each phase in
+        # progress.
+        #
+        self.stack = []
+
+    @contextlib.contextmanager
+    def measure(self, name, size=0):
+        """Measure the phase `name` with `size` bytes of input.  Yield
+        [size], which may be changed once the size is known."""
+
+        self.stack.append([time.perf_counter(), 0.0])
+        sizes = [size]
+
+        try:
+            yield sizes
+        finally:
+            size = sizes[0]
+            start, nested = self.stack.pop()
+            seconds = time.perf_counter() - start
+
+            if self.stack:
+                self.stack[-1][1] += seconds
+
+            stats = self.phases.get(name)
+
+            if stats is None:
+                stats = self.phases[name] = PhaseStats()
+
+            stats.seconds += seconds - nested
+            stats.calls += 1
+            stats.bytes += size
+
+            for hook in self.hooks:
+                hook({"event": "phase", "name": name,
+                      "seconds": seconds - nested, "bytes": size})
+
+    def parse(self, kind, filename, seconds):
+        """Record the time that parsing an included file took before its
+        expansion, which its next include is charged."""
+
+        key = (kind, filename)
+        self.parsed[key] = self.parsed.get(key, 0.0) + seconds
+
+    def include(self, kind, filename, macros, seconds, size, rows,
+                cached=False):
+        "Record the expansion of an included file."
+
+        seconds += self.parsed.pop((kind, filename), 0.0)
+        key = (kind, filename, tuple(macros))
+        stats = self.includes.get(key)
+
+        if stats is None:
+            stats = self.includes[key] = IncludeStats()
+
+        stats.seconds += seconds
+        stats.calls += 1
+        stats.cached += cached
+        stats.bytes += size
+        stats.rows += rows
+
+        for hook in self.hooks:
+            hook({"event": "include", "kind": kind, "file": filename,
+                  "macros": dict(macros), "seconds": seconds,
+                  "bytes": size, "rows": rows, "cached": cached})
+
+    def as_dict(self):
+        return {
+            "seconds": self.seconds,
+            "peak_memory": self.peak_memory,
+            "phases": {
+                name: {"seconds": stats.seconds, "calls": stats.calls,
+                       "bytes": stats.bytes}
+                for name, stats in self.phases.items()},
+            "includes": [
+                {"kind": kind, "file": filename, "macros": dict(macros),
+                 "seconds": stats.seconds, "calls": stats.calls,
+                 "cached": stats.cached, "bytes": stats.bytes,
+                 "rows": stats.rows}
+                for (kind, filename, macros), stats
+                in self.includes.items()]}
+
+    def write_json(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write("\n")
+
+    def table(self, includes=20):
+        """Return the phases and the `includes` slowest includes as a
+        table."""
+
+        total = self.seconds or sum(
+            stats.seconds for stats in self.phases.values())
+        lines = [f"{'phase':<24}{'ms':>10}{'%':>7}{'calls':>8}"
+                 f"{'bytes':>12}"]
+
+        for name, stats in sorted(self.phases.items(),
+                                  key=lambda item: -item[1].seconds):
+            share = 100 * stats.seconds / total if total else 0
+            lines.append(
+                f"{name:<24}{stats.seconds * 1000:10.1f}{share:7.1f}"
+                f"{stats.calls:8}{stats.bytes:12}")
+
+        other = total - sum(
+            stats.seconds for stats in self.phases.values())
+
+        if other > 0:
+            lines.append(f"{'other':<24}{other * 1000:10.1f}"
+                         f"{100 * other / total:7.1f}")
+
+        lines.append(f"{'total':<24}{total * 1000:10.1f}")
+
+        if self.peak_memory is not None:
+            lines.append(
+                f"{'peak memory':<24}"
+                f"{self.peak_memory / 1024 / 1024:10.1f} MB")
+
+        if self.includes:
+            lines.extend([
+                "",
+                f"{'ms':>10}{'calls':>7}{'cached':>7}{'bytes':>10}"
+                f"{'rows':>8}  include"])
+
+            slowest = sorted(self.includes.items(),
+                             key=lambda item: -item[1].seconds)
+
+            for (kind, filename, macros), stats in slowest[:includes]:
+                name = " ".join(
+                    [filename] + [f"{key}={value!r}"
+                                  for key, value in macros])
+                lines.append(
+                    f"{stats.seconds * 1000:10.1f}{stats.calls:7}"
+                    f"{stats.cached:7}{stats.bytes:10}{stats.rows:8}"
+                    f"  {name}")
+
+            if len(slowest) > includes:
+                lines.append(f"... and {len(slowest) - includes} more")
+
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profiling(profile=None, memory=False, stats_filename=None):
+    """Activate `profile`, or a new Profile, and yield it.  With
+    `memory`, record the peak memory that tracemalloc sees.  With
+    `stats_filename`, also run cProfile and dump its pstats there."""
+
+    global active
+
+    if profile is None:
+        profile = Profile()
+
+    if memory:
+        import tracemalloc
+
+        tracemalloc.start()
+
+    if stats_filename is not None:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    previous = active
+    active = profile
+    start = time.perf_counter()
+
+    try:
+        yield profile
+    finally:
+        profile.seconds += time.perf_counter() - start
+        active = previous
+
+        if stats_filename is not None:
+            profiler.disable()
+            profiler.dump_stats(stats_filename)
+
+        if memory:
+            profile.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
@@ -0,0 +1,365 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""A local compile server: `beepile serve`.
+
+POST /compile takes a JSON object with the Honeycomb `code`, the
+`include_path` of its files relative to the root of the server, and
+an optional output `format` and form `name`, and returns the compiled
+form.  The form and its includes may only read files under the root.
+GET /stats returns the counters of the server.
+
+Compiles run on a pool of worker processes.  Each worker keeps its
+grammars, parse trees and expanded includes in memory between
+requests, and checks the digests of the files that an include read
+before reusing it, as with --watch.
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import argh
+
+from honeybee.comb_to_xlsform.cache import MemoryCache
+from honeybee.comb_to_xlsform.choices import parse_choices
+from honeybee.comb_to_xlsform.fastparse import parse_errors
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import (
+    PARSERS, compile_survey, parse_survey)
+from honeybee.comb_to_xlsform.writers import WRITERS
+
+
+CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument"
+            ".spreadsheetml.sheet",
+    "xform": "application/xml",
+    "ndjson": "application/x-ndjson"}
+
+# Parse trees kept by the session of a worker before it starts over.
+# Parse trees also stay in the MemoryCache.
+#
+MAX_TREES = 1024
+
+# Latencies kept for the percentiles in /stats.
+#
+LATENCY_WINDOW = 1000
+
+session = None
+
+
+def init_worker(parser, root):
+    """Build the grammars and the session of a worker process, which
+    only reads files under `root`."""
+
+    global session
+
+    parse_survey()
+    parse_choices()
+
+    session = Session(parser=parser, cache=MemoryCache(), root=root)
+
+
+def compile_request(code, include_path, format, name):
+    """Compile a form in a worker and return its bytes, with the hits
+    and misses of the cache."""
+
+    global session
+
+    if len(session.trees) > MAX_TREES:
+        session = Session(parser=session.parser, cache=session.cache,
+                          root=session.root)
+
+    # Files may have changed since the last request.
+    #
+    session.digests.clear()
+
+    hits, misses = session.cache.hits, session.cache.misses
+
+    survey = compile_survey(code, include_path, session)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, f"{name}.{format}")
+        WRITERS[format](survey, filename)
+
+        with open(filename, "rb") as f:
+            output = f.read()
+
+    return (output,
+            session.cache.hits - hits,
+            session.cache.misses - misses)
+
+
+def content_length(headers):
+    "Return the Content-Length of a request, which must be given."
+
+    length = headers.get("Content-Length")
+
+    if length is None:
+        raise ValueError("Content-Length is missing.")
+
+    try:
+        length = int(length)
+    except ValueError:
+        length = -1
+
+    if length < 0:
+        raise ValueError("Content-Length must be a non-negative integer.")
+
+    return length
+
+
+class Stats:
+    "Counters of a server, safe to update from many threads."
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds, error=False, hits=0, misses=0):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.cache_hits += hits
+            self.cache_misses += misses
+            self.latencies.append(seconds)
+
+    def as_dict(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stats = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "active": self.active,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses}
+
+        for percentile in (50, 95, 99):
+            if latencies:
+                index = min(len(latencies) - 1,
+                            len(latencies) * percentile // 100)
+                stats[f"latency_p{percentile}_ms"] = round(
+                    latencies[index] * 1000, 1)
+
+        return stats
+
+
+class CompileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body, content_type="application/json",
+             headers=()):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+
+        for header in headers:
+            self.send_header(*header)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send(200, self.server.stats.as_dict())
+        else:
+            self.send(404, {"error": "Not found."})
+
+    def do_POST(self):
+        if self.path != "/compile":
+            self.send(404, {"error": "Not found."})
+            return
+
+        start = time.perf_counter()
+        length = None
+
+        try:
+            length = content_length(self.headers)
+            request = json.loads(self.rfile.read(length))
+            arguments = self.server.arguments(request)
+        except ValueError as error:
+            # Without a length, the rest of the request can't be told
+            # from the next one.
+            #
+            if length is None:
+                self.close_connection = True
+
+            self.server.stats.record(
+                time.perf_counter() - start, error=True)
+            self.send(400, {"error": str(error)})
+            return
+
+        status = 200
+
+        with self.server.slots:
+            with self.server.stats.lock:
+                self.server.stats.active += 1
+
+            try:
+                output, hits, misses = self.server.pool.submit(
+                    compile_request, *arguments).result()
+            except parse_errors() + (ValueError, NameError,
+                                     OSError) as error:
+                status, output = 422, error
+            except Exception as error:
+                status, output = 500, error
+            finally:
+                with self.server.stats.lock:
+                    self.server.stats.active -= 1
+
+        seconds = time.perf_counter() - start
+
+        if status != 200:
+            self.server.stats.record(seconds, error=True)
+            self.send(status, {
+                "error": str(output) or type(output).__name__})
+        else:
+            self.server.stats.record(seconds, hits=hits, misses=misses)
+            self.send(200, output, CONTENT_TYPES[arguments[2]],
+                      [("X-Compile-Time", f"{seconds * 1000:.1f} ms")])
+
+
+class CompileServer:
+    """What the request handlers share: the worker pool, the limit on
+    requests in flight and the counters."""
+
+    def __init__(self, root, workers, parser):
+        self.root = os.path.realpath(root)
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(parser, self.root))
+        self.slots = threading.BoundedSemaphore(2 * workers)
+        self.stats = Stats()
+
+    def arguments(self, request):
+        """Return the arguments of compile_request for a request, or
+        raise ValueError if they are not valid."""
+
+        if not isinstance(request, dict):
+            raise ValueError("The request must be a JSON object.")
+
+        if "code" not in request:
+            raise ValueError("code is missing.")
+
+        code = request["code"]
+        include_path = request.get("include_path", ".")
+        format = request.get("format", "xlsx")
+        name = request.get("name", "form")
+
+        for field, value in (("code", code), ("include_path", include_path),
+                             ("format", format), ("name", name)):
+            if not isinstance(value, str):
+                raise ValueError(f"{field} must be a string.")
+
+        if format not in CONTENT_TYPES:
+            raise ValueError(f"Unknown format: {format}.")
+
+        if not name.isidentifier():
+            raise ValueError(f"Invalid name: {name}.")
+
+        include_path = os.path.realpath(
+            os.path.join(self.root, include_path))
+
+        if os.path.commonpath([self.root, include_path]) != self.root:
+            raise ValueError("include_path is outside the root.")
+
+        return code, include_path, format, name
+
+
+class HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn,
+                     socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(compile_server, host="127.0.0.1", port=8765, socket=None):
+    """Return an HTTP server on `host:port`, or on the Unix `socket`,
+    which replaces a socket left by an earlier server but no other
+    kind of file."""
+
+    if socket is None:
+        server = HTTPServer((host, port), CompileHandler)
+    else:
+        if os.path.lexists(socket):
+            if not stat.S_ISSOCK(os.lstat(socket).st_mode):
+                raise ValueError(f"{socket} exists and is not a socket.")
+
+            os.remove(socket)
+
+        server = UnixHTTPServer(socket, CompileHandler)
+
+    server.pool = compile_server.pool
+    server.slots = compile_server.slots
+    server.stats = compile_server.stats
+    server.arguments = compile_server.arguments
+
+    return server
+
+
+@argh.arg("--root", help="directory that include paths are relative to")
+@argh.arg("--port", type=int, help="TCP port on --host")
+@argh.arg("--socket", type=str, help="serve on this Unix socket instead")
+@argh.arg("--host", help="address to listen on")
+@argh.arg("--workers", type=int, help="number of compile processes")
+@argh.arg("--parser", choices=PARSERS)
+def serve(root=".", host="127.0.0.1", port=8765, socket=None, workers=None,
+          parser="pyparsing"):
+    compile_server = CompileServer(root, workers or os.cpu_count(), parser)
+
+    try:
+        server = make_server(compile_server, host, port, socket)
+    except ValueError as error:
+        compile_server.pool.shutdown()
+        raise argh.CommandError(error)
+
+    print(f"Serving on {socket or f'http://{host}:{server.server_port}'}",
+          flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        compile_server.pool.shutdown()
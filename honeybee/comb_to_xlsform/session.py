@@ -0,0 +1,291 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+import os
+import contextlib
+
+from honeybee.comb_to_xlsform.cache import digest
+from honeybee.comb_to_xlsform.common import check_macros, substitute_macros
+from honeybee.comb_to_xlsform.profile import phase
+from honeybee.comb_to_xlsform.template import make_template
+
+
+class Session:
+    """Options and caches shared by every file that one compilation
+    reads.
+
+    Included files are parsed once per session as templates, and
+    each @include only fills in its macros.  With a DiskCache or a
+    MemoryCache, parse trees are stored under the hash of the
+    code that was parsed, and expanded includes under the hash of
+    their code, parameters and include path.  Each expanded include
+    also records the files it read in turn, and is only reused while
+    all of them are unchanged.
+
+    With `jobs` above 1, the files that a form includes are parsed
+    on that many processes before it is expanded.
+
+    With a `root`, reading a file outside that directory raises
+    ValueError.
+
+    With a `memo_size`, only that many parse trees and templates are
+    kept in memory, and the oldest are parsed again, or read from the
+    cache, when they are needed again.
+    """
+
+    def __init__(self, parser="pyparsing", cache=None, jobs=1, root=None,
+                 memo_size=None):
+        self.parser = parser
+        self.cache = cache
+        self.jobs = jobs
+        self.root = root
+        self.memo_size = memo_size
+        self.used = None
+        self.digests = dict()
+        self.trees = dict()
+        self.templates = dict()
+        self.dependencies = []
+
+        # The code of files read ahead of their expansion.
+        #
+        self.prefetched = dict()
+
+    def read(self, filename, prefetch=False):
+        """Read a source file and record it as a dependency.  With
+        `prefetch`, keep its code for the next read."""
+
+        filename = os.path.abspath(filename)
+
+        if self.root is not None:
+            real = os.path.realpath(filename)
+
+            if os.path.commonpath([self.root, real]) != self.root:
+                raise ValueError(f"{filename} is outside the root.")
+
+        code = self.prefetched.pop(filename, None)
+
+        if code is None:
+            with phase("read") as sizes:
+                with open(filename) as f:
+                    code = f.read()
+
+                if sizes:
+                    sizes[0] = len(code)
+
+            self.digests[filename] = digest(code)
+        elif filename not in self.digests:
+            self.digests[filename] = digest(code)
+
+        if prefetch:
+            self.prefetched[filename] = code
+
+        if self.dependencies:
+            self.dependencies[-1][1].add(
+                (filename, self.digests[filename]))
+
+        return code
+
+    def forget(self, filenames):
+        "Read `filenames` again the next time they are checked."
+
+        for filename in filenames:
+            self.digests.pop(os.path.abspath(filename), None)
+            self.prefetched.pop(os.path.abspath(filename), None)
+
+    def unchanged(self, dependencies):
+        for filename, file_digest in dependencies:
+            if filename not in self.digests:
+                try:
+                    with open(filename) as f:
+                        self.digests[filename] = digest(f.read())
+                except OSError:
+                    return False
+
+            if self.digests[filename] != file_digest:
+                return False
+
+        return True
+
+    def sweep(self):
+        """Drop the parse trees and templates that were not used since
+        the last sweep, and track the ones used from now on."""
+
+        if self.used is not None:
+            for memo in (self.trees, self.templates):
+                for key in [key for key in memo if key not in self.used]:
+                    del memo[key]
+
+        self.used = set()
+
+    def remember(self, memo, key, value):
+        "Store `value` in `memo`, dropping the oldest over memo_size."
+
+        memo[key] = value
+
+        if self.memo_size is not None:
+            while len(memo) > self.memo_size:
+                del memo[next(iter(memo))]
+
+    def parse(self, kind, code, parse):
+        "Return `parse(code, parser)`, from the caches if possible."
+
+        if self.used is not None:
+            self.used.add((kind, code))
+
+        if (kind, code) in self.trees:
+            return self.trees[kind, code]
+
+        if self.cache is None:
+            with phase("parse", len(code)):
+                tree = parse(code, self.parser)
+        else:
+            key = self.cache.key("parse", kind, self.parser, code)
+            tree = self.cache.get(key)
+
+            if tree is None:
+                with phase("parse", len(code)):
+                    tree = parse(code, self.parser)
+                self.cache.put(key, tree)
+
+        self.remember(self.trees, (kind, code), tree)
+
+        return tree
+
+    def parse_many(self, kind, codes, parse, map=map):
+        """Parse the `codes` that are not in the caches yet, calling
+        `parse(code, parser)` through `map`, which may run them in
+        parallel.  Codes that `parse` returns None for are left for
+        `parse` to fail on."""
+
+        missing = []
+
+        for code in dict.fromkeys(codes):
+            if self.used is not None:
+                self.used.add((kind, code))
+
+            if (kind, code) in self.trees:
+                continue
+
+            if self.cache is not None:
+                tree = self.cache.get(
+                    self.cache.key("parse", kind, self.parser, code))
+
+                if tree is not None:
+                    self.remember(self.trees, (kind, code), tree)
+                    continue
+
+            missing.append(code)
+
+        trees = map(parse, missing, [self.parser] * len(missing))
+
+        for code, tree in zip(missing, trees):
+            if tree is None:
+                continue
+
+            if self.cache is not None:
+                self.cache.put(
+                    self.cache.key("parse", kind, self.parser, code), tree)
+
+            self.remember(self.trees, (kind, code), tree)
+
+    def instantiate(self, kind, code, macros, parse):
+        """Return the tree of `code` with `macros` substituted, parsing
+        it as a template only the first time."""
+
+        check_macros(code, macros)
+
+        if self.used is not None:
+            self.used.add((kind, code))
+
+        if (kind, code) in self.templates:
+            template = self.templates[kind, code]
+        else:
+            template = make_template(
+                code, lambda code: self.parse(kind, code, parse))
+            self.remember(self.templates, (kind, code), template)
+
+        if template is not None:
+            with phase("macros", len(code)):
+                tree = template.instantiate(macros)
+            if tree is not None:
+                return tree
+
+        with phase("macros", len(code)):
+            code = substitute_macros(code, macros)
+
+        return self.parse(kind, code, parse)
+
+    def begin(self, kind, parts):
+        """Start expanding an include.  Return its cached expansion if
+        the files that it read last time are unchanged, or else None,
+        in which case `end` must be called once it is expanded."""
+
+        if self.cache is None:
+            return None
+
+        key = self.cache.key("expand", kind, self.parser, *parts)
+        entry = self.cache.get(key)
+
+        if entry is not None:
+            dependencies, result = entry
+
+            if self.unchanged(dependencies):
+                if self.dependencies:
+                    self.dependencies[-1][1].update(dependencies)
+                return result
+
+        self.dependencies.append((key, set()))
+
+        return None
+
+    def end(self, result):
+        "Store `result()` as the expansion started by the last `begin`."
+
+        if self.cache is None:
+            return
+
+        key, dependencies = self.dependencies.pop()
+
+        if self.dependencies:
+            self.dependencies[-1][1].update(dependencies)
+
+        self.cache.put(key, (sorted(dependencies), result()))
+
+    @contextlib.contextmanager
+    def expanding(self):
+        "Forget the expansions that an error cuts short."
+
+        depth = len(self.dependencies)
+
+        try:
+            yield
+        except BaseException:
+            del self.dependencies[depth:]
+            raise
+
+    def expand(self, kind, parts, expand):
+        """Return `expand()`, from the cache if the files that it
+        read last time are unchanged."""
+
+        result = self.begin(kind, parts)
+
+        if result is None:
+            with self.expanding():
+                result = expand()
+            self.end(lambda: result)
+
+        return result
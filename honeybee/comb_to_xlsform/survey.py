@@ -15,27 +15,37 @@
 # Public License along with Honeybee.  If not, see
 # <https://www.gnu.org/licenses/>.
 
-import copy
+import os
+import time
 import datetime
 
-from collections import namedtuple
-
-import pyparsing as pp
-from pyparsing import (
-    Forward, Group, LineEnd, restOfLine,
-    indentedBlock, QuotedString, Optional,
-    Word, oneOf, OneOrMore, ZeroOrMore, Literal, Suppress,
-    alphas, alphanums, nums)
-
 from honeybee.comb_to_xlsform.common import (
     new_path_and_filename, if_cond_to_relevance,
-    args_to_params, merge_params, substitute_macros)
+    args_to_params, merge_params, Scope, Block, check_include_cycle,
+    cached_grammar)
 from honeybee.comb_to_xlsform.preprocess import preprocess_indent
-from honeybee.comb_to_xlsform.choices import parse_choices, expand_choices
+from honeybee.comb_to_xlsform.choices import (
+    parse_choices_code, expand_choices, unique_choices)
+from honeybee.comb_to_xlsform.fastparse import parse_errors, parse_survey_tree
+from honeybee.comb_to_xlsform.model import Survey, Table
+from honeybee.comb_to_xlsform.prefetch import prefetch
+from honeybee.comb_to_xlsform import profile
+from honeybee.comb_to_xlsform.session import Session
+
+
+PARSERS = ("pyparsing", "fast")
 
 
+@cached_grammar
 def parse_survey():
-    indent_stack = [1]
+    from pyparsing import (
+        Forward, Group, LineEnd, restOfLine,
+        QuotedString, Optional,
+        Word, oneOf, OneOrMore, ZeroOrMore, Literal, Suppress,
+        alphas, alphanums, nums)
+
+    from honeybee.comb_to_xlsform.grammar import indented_block
+
     stmt = Forward()
 
     identifier = Word(alphas, alphanums + "_")
@@ -57,7 +67,7 @@ def parse_survey():
     dot = Literal(".")
     expr = Group((variable | dot) + comp_op + value)
     if_cond = "if" + (expr | value)
-    if_body = indentedBlock(pp.ungroup(stmt), indent_stack)
+    if_body = indented_block(stmt)
     if_block = Group(if_cond + Suppress(":") + if_body)
 
     q_name = identifier
@@ -71,7 +81,7 @@ def parse_survey():
 
     group_label = string
     group_def = "group" + Group(identifier + Optional(group_label)) + group_params + Optional(if_cond) + Suppress(":")
-    group_body = indentedBlock(pp.ungroup(stmt), indent_stack)
+    group_body = indented_block(stmt)
     group_block = Group(group_def + group_body)
 
     repeat_def = "repeat" + Group(identifier + Optional(group_label)) + group_params + Suppress(":")
@@ -84,6 +94,20 @@ def parse_survey():
     return stmts
 
 
+def parse_survey_code(code, parser="pyparsing"):
+    "Parse survey code with the pyparsing grammar or the fast parser."
+
+    if parser == "fast":
+        return parse_survey_tree(code)
+    elif parser == "pyparsing":
+        with profile.phase("preprocess", len(code)):
+            code = preprocess_indent(code)
+
+        return parse_survey().parseString(code, parseAll=True).asList()
+
+    raise ValueError(f"Unknown parser: {parser}.")
+
+
 def execute_form_settings(form_id, form_version, form_title, args):
     "Generate the 'settings' worksheet based on a @form command."
 
@@ -102,7 +126,7 @@ def execute_form_settings(form_id, form_version, form_title, args):
     return form_settings
 
 
-def execute_choices(filename, args, include_path):
+def execute_choices(filename, args, include_path, session):
     "Generate a choice list based on a @choices command."
 
     include_path, filename = new_path_and_filename(
@@ -110,39 +134,82 @@ def execute_choices(filename, args, include_path):
 
     choices_macros = args_to_params(args)
 
-    with open(filename) as f:
+    start = time.perf_counter()
+    code = session.read(filename)
+    expanded = []
+
+    def expand():
+        expanded.append(True)
+
         return expand_choices(
-            parse_choices().parseString(
-                substitute_macros(
-                    f.read(),
-                    choices_macros),
-                parseAll=True).asList(),
-            dict(),
-            include_path)
+            session.instantiate(
+                "choices", code, choices_macros, parse_choices_code),
+            Scope(),
+            include_path,
+            session)
+
+    rows = session.expand(
+        "choices",
+        (code, sorted(choices_macros.items()),
+         os.path.abspath(include_path)),
+        expand)
+
+    if profile.active is not None:
+        profile.active.include(
+            "choices", os.path.normpath(filename),
+            sorted(choices_macros.items()), time.perf_counter() - start,
+            len(code), len(rows), cached=not expanded)
+
+    return rows
 
 
-def execute_include(filename, args, params, include_path):
-    """Generate 'survey' and 'choices' worksheets based on an
-    @include command."""
+def execute_include(filename, args, params, include_path, stack,
+                    session):
+    """Push the block of an @include command onto `stack` and return
+    None, or return its cached expansion."""
 
     include_path, filename = new_path_and_filename(
         include_path, filename)
 
     include_macros = args_to_params(args)
 
-    with open(filename) as f:
-        try:
-            include_tree = parse_survey().parseString(
-                               preprocess_indent(
-                                   substitute_macros(
-                                       f.read(),
-                                       include_macros)),
-                               parseAll=True).asList()
-        except pp.ParseException:
-            raise ValueError(
-                f"Error when parsing {filename}.")
+    start = time.perf_counter()
+    code = session.read(filename)
 
-    return expand_survey(include_tree, params, include_path)
+    include = ((os.path.abspath(filename),
+                sorted(include_macros.items())),
+               os.path.normpath(filename))
+    check_include_cycle(stack, include)
+
+    cached = session.begin(
+        "include",
+        (code, sorted(include_macros.items()), sorted(params.items()),
+         os.path.abspath(include_path)))
+
+    if cached is not None:
+        if profile.active is not None:
+            profile.active.include(
+                "survey", include[1], include[0][1],
+                time.perf_counter() - start, len(code), len(cached[0]),
+                cached=True)
+
+        return cached
+
+    try:
+        include_tree = session.instantiate(
+            "survey", code, include_macros, parse_survey_code)
+    except parse_errors():
+        raise ValueError(
+            f"Error when parsing {filename}.")
+
+    block = SurveyBlock(include_tree, params, include_path, include)
+
+    if profile.active is not None:
+        block.profile = [start, len(code)]
+
+    stack.append(block)
+
+    return None
 
 
 def compile_question(name, args, params):
@@ -168,92 +235,267 @@ def compile_question(name, args, params):
     return question
 
 
-def expand_survey(tree, params, include_path):
-    rows = []
-    choices = []
-    settings = None
+class SurveyBlock(Block):
+    """A block of survey statements.  The choices added in if, group
+    and repeat blocks have always been left out of the compiled form,
+    so those blocks `drop_choices`."""
+
+    __slots__ = ("drop_choices", "end_row", "origin", "recording",
+                 "profile")
+
+    def __init__(self, tree, params, include_path, include=None,
+                 drop_choices=False, end_row=None, origin=None):
+        super().__init__(tree, params, include_path, include)
+        self.drop_choices = drop_choices
+        self.end_row = end_row
+        # Where the end row comes from, with a Locator.
+        self.origin = origin
+        self.recording = None
+
+        # The start, the size of the code and the survey rows before
+        # the block, while profiling an include.
+        #
+        self.profile = None
+
+
+def iter_survey(tree, params, include_path, session, locator=None):
+    """Yield (worksheet, row) for each row of the compiled survey in
+    order, where the worksheet is "survey", "choices" or "settings".
+
+    Rows are yielded as soon as they are compiled.  Only the includes
+    that are being stored in the cache of the session are held in
+    memory until their block ends.  A check.Locator `locator` is told
+    of each statement and include, and records where each row comes
+    from.
+    """
+
+    stack = [SurveyBlock(tree, params, include_path)]
 
-    for command, *args in tree:
-        if command == "#":
-            continue
+    # Expansions being recorded for the cache, as [number of blocks
+    # dropping choices when the include started, rows, the choices of
+    # each @choices].
+    #
+    recordings = []
+    dropping = 0
+    definitions = dict()
+    survey_rows = 0
 
-        if command == "@":
-            if args[0] == "form":
-                settings = [
-                    execute_form_settings(
+    def locate(kind, *names):
+        if locator is not None:
+            return locator.statement(kind, *names)
+
+    def add_rows(rows, origin=None):
+        nonlocal survey_rows
+
+        survey_rows += len(rows)
+
+        if locator is not None:
+            locator.survey.extend([origin] * len(rows))
+
+        for recording in recordings:
+            recording[1].extend(rows)
+
+        for row in rows:
+            yield "survey", row
+
+    def add_choices(rows, origin=None):
+        for recording in recordings:
+            if recording[0] == dropping:
+                recording[2].append(rows)
+
+        if dropping == 0:
+            for row in unique_choices(rows, definitions):
+                if locator is not None:
+                    locator.choices.append(origin(row.get("list_name")))
+
+                yield "choices", row
+
+    with session.expanding():
+        while stack:
+            block = stack[-1]
+            statement = next(block.statements, None)
+
+            if statement is None:
+                stack.pop()
+
+                if block.drop_choices:
+                    dropping -= 1
+
+                if block.end_row is not None:
+                    yield from add_rows([block.end_row], block.origin)
+
+                if locator is not None and block.include is not None:
+                    locator.end_include()
+
+                if block.recording is not None:
+                    recordings.pop()
+                    session.end(
+                        lambda: (Table(block.recording[1]),
+                                 tuple(block.recording[2])))
+
+                if block.profile is not None:
+                    start, size, rows = block.profile
+                    profile.active.include(
+                        "survey", block.include[1], block.include[0][1],
+                        time.perf_counter() - start, size,
+                        survey_rows - rows)
+                continue
+
+            command, *args = statement
+
+            if command == "#":
+                continue
+
+            if command == "@":
+                if args[0] == "form":
+                    form_settings = execute_form_settings(
                         form_id=args[1],
                         form_version=args[2],
                         form_title=args[3],
-                        args=args[4:])]
-            elif args[0] == "choices":
-                choices.extend(
-                    execute_choices(
+                        args=args[4:])
+
+                    # Only the @form of the main file counts.
+                    #
+                    if len(stack) == 1:
+                        yield "settings", form_settings
+                elif args[0] == "choices":
+                    origin = locate("choices")
+
+                    if locator is not None:
+                        origin = locator.choices_file(
+                            origin, block.include_path, args[1], args[2:])
+
+                    yield from add_choices(
+                        execute_choices(
+                            filename=args[1],
+                            args=args[2:],
+                            include_path=block.include_path,
+                            session=session),
+                        origin)
+                elif args[0] == "include":
+                    origin = locate("include")
+                    cached = execute_include(
                         filename=args[1],
                         args=args[2:],
-                        include_path=include_path))
-            elif args[0] == "include":
-                included_survey = execute_include(
-                    filename=args[1],
-                    args=args[2:],
-                    params=copy.deepcopy(params),
-                    include_path=include_path)
-
-                rows.extend(included_survey.survey)
-                choices.extend(included_survey.choices)
-            elif args[0] == "required":
-                params["required"] = args[1]
+                        params=block.params,
+                        include_path=block.include_path,
+                        stack=stack,
+                        session=session)
+
+                    if cached is not None:
+                        yield from add_rows(cached[0], origin)
+
+                        for choices in cached[1]:
+                            yield from add_choices(
+                                choices, lambda list_name: origin)
+                    else:
+                        if locator is not None:
+                            locator.include(stack[-1].include)
+
+                        if session.cache is not None:
+                            stack[-1].recording = [dropping, [], []]
+                            recordings.append(stack[-1].recording)
+
+                        if stack[-1].profile is not None:
+                            stack[-1].profile.append(survey_rows)
+                elif args[0] == "required":
+                    block.params = block.params.set("required", args[1])
+                else:
+                    raise NameError(f"Unknown command: @{args[0]}.")
+            elif command == "if":
+                if_params = block.params.merge(
+                    {"relevance": if_cond_to_relevance(args[0])})
+
+                dropping += 1
+                stack.append(
+                    SurveyBlock(args[1], if_params, block.include_path,
+                                drop_choices=True))
+            elif command in ("group", "repeat"):
+                group_name = args[0][0]
+                group_def = {
+                    "type": f"begin {command}",
+                    "name": group_name
+                }
+
+                if len(args[0]) > 1:
+                    group_def["label"] = args[0][1]
+
+                group_params = block.params.merge(
+                    args_to_params(args[1]))
+
+                origin = locate("block", command, group_name)
+                yield from add_rows([{**group_def, **group_params}],
+                                    origin)
+
+                dropping += 1
+                stack.append(
+                    SurveyBlock(
+                        args[2],
+                        group_params.without("relevance", "appearance"),
+                        block.include_path,
+                        drop_choices=True,
+                        end_row={"type": f"end {command}",
+                                 "name": group_name},
+                        origin=origin))
             else:
-                raise NameError(f"Unknown command: @{args[0]}.")
-        elif command == "if":
-            if_params = merge_params(
-                params,
-                {"relevance": if_cond_to_relevance(args[0])})
-
-            expanded = expand_survey(
-                args[1], if_params, include_path)
-            rows.extend(expanded.survey)
-        elif command in ("group", "repeat"):
-            group_name = args[0][0]
-            group_def = {
-                "type": f"begin {command}",
-                "name": group_name
-            }
-
-            if len(args[0]) > 1:
-                group_def["label"] = args[0][1]
-
-            group_params = merge_params(
-                params, args_to_params(args[1]))
-
-            rows.append({**group_def, **group_params})
-
-            for param_name in ("relevance", "appearance"):
-                if param_name in group_params:
-                    del group_params[param_name]
-
-            expanded = expand_survey(
-                args[2], group_params, include_path)
-            rows.extend(expanded.survey)
-
-            rows.append(
-                {"type": f"end {command}",
-                 "name": group_name})
+                yield from add_rows(
+                    [compile_question(command, args, block.params)],
+                    locate("question", command))
+
+
+def expand_survey(tree, params, include_path, session, locator=None):
+    rows = Table()
+    choices = Table()
+    settings = None
+
+    for worksheet, row in iter_survey(
+            tree, params, include_path, session, locator):
+        if worksheet == "survey":
+            rows.append(row)
+        elif worksheet == "choices":
+            choices.append(row)
         else:
-            rows.append(
-                compile_question(
-                    command, args, copy.deepcopy(params)))
+            settings = Table([row])
 
-    return namedtuple("Survey", ("survey", "choices", "settings"))(
+    return Survey(
         survey=rows,
         choices=choices,
         settings=settings)
 
 
-def compile_survey(code, include_path):
-    return expand_survey(
-        parse_survey().parseString(
-            preprocess_indent(
-                code),
-            parseAll=True).asList(),
-        dict(),
-        include_path)
+def parse_form(code, include_path, session):
+    """Parse the main file of a form, and the files that it includes
+    on `session.jobs` processes."""
+
+    tree = session.parse("survey", code, parse_survey_code)
+
+    if session.jobs > 1:
+        with profile.phase("prefetch"):
+            prefetch(tree, include_path, session,
+                     {"survey": parse_survey_code,
+                      "choices": parse_choices_code})
+
+    return tree
+
+
+def compile_survey(code, include_path, session=None):
+    if session is None:
+        session = Session()
+
+    tree = parse_form(code, include_path, session)
+
+    with profile.phase("expand"):
+        return expand_survey(tree, Scope(), include_path, session)
+
+
+def stream_survey(code, include_path, session=None):
+    "Yield the rows of a compiled survey like iter_survey."
+
+    if session is None:
+        session = Session()
+
+    return iter_survey(
+        parse_form(code, include_path, session),
+        Scope(),
+        include_path,
+        session)
@@ -0,0 +1,144 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Parse trees with slots for macros.
+
+An included file is parsed once with each `${!name}` replaced by a
+slot that parses as an identifier, and each @include fills the slots
+in a copy of the tree.  This gives the same tree as substituting the
+macros and parsing the result only when the macro values cannot
+change how the file is split into tokens, so values are restricted
+to words separated by single spaces, and a slot that made up a whole
+identifier must be filled with an identifier.  Otherwise the caller
+falls back to substituting the macros in the source.
+"""
+
+import re
+
+from honeybee.comb_to_xlsform.common import macro_re
+from honeybee.comb_to_xlsform.fastparse import parse_errors
+
+
+SLOT = "HoneybeeMacroSlot"
+
+KEYWORDS = ("if", "group", "repeat", "list")
+
+slot_re = re.compile(SLOT + r"([0-9]+)x")
+identifier_re = re.compile(r"[A-Za-z][A-Za-z0-9_]*")
+value_re = re.compile(r"\w[\w.,;!?()/-]*(?: [\w.,;!?()/-]+)*")
+
+
+class Unsafe(Exception):
+    pass
+
+
+def leaves(tree):
+    for node in tree:
+        if isinstance(node, list):
+            yield from leaves(node)
+        else:
+            yield node
+
+
+class Template:
+    "A parse tree with slots for the macros named in `names`."
+
+    def __init__(self, tree, names):
+        self.tree = tree
+        self.names = names
+
+    def fill_leaf(self, leaf, values):
+        filled = slot_re.sub(
+            lambda match: values[int(match.group(1))], leaf)
+
+        if (identifier_re.fullmatch(leaf)
+                and not (identifier_re.fullmatch(filled)
+                         and filled not in KEYWORDS)):
+            raise Unsafe()
+
+        return filled
+
+    def fill(self, tree, values):
+        return [self.fill(node, values) if isinstance(node, list)
+                else self.fill_leaf(node, values) if SLOT in node
+                else node
+                for node in tree]
+
+    def instantiate(self, macros):
+        """Return the tree with the slots filled from `macros`, or None
+        if the values could have been parsed differently."""
+
+        values = [macros[name] for name in self.names]
+
+        if not all(isinstance(value, str) and value_re.fullmatch(value)
+                   for value in values):
+            return None
+
+        try:
+            return self.fill(self.tree, values)
+        except Unsafe:
+            return None
+
+
+def slotted_code(code):
+    """Return `code` with slots in place of its macros and the names of
+    the macros, or None if it has no macros or already has slots."""
+
+    if SLOT in code:
+        return None
+
+    names = []
+
+    def slot(match):
+        if match.group(1) not in names:
+            names.append(match.group(1))
+
+        return f"{SLOT}{names.index(match.group(1))}x"
+
+    template_code = macro_re.sub(slot, code)
+
+    if not names:
+        return None
+
+    return template_code, names
+
+
+def make_template(code, parse):
+    """Parse `code` with slots in place of its macros, or return None
+    if it has none or the slotted code cannot stand in for it."""
+
+    slotted = slotted_code(code)
+
+    if slotted is None:
+        return None
+
+    template_code, names = slotted
+
+    try:
+        tree = parse(template_code)
+    except parse_errors() + (ValueError,):
+        return None
+
+    # Every slot has to end up in the tree for the filled tree to
+    # match the source.
+    #
+    slots = sum(len(slot_re.findall(leaf)) for leaf in leaves(tree))
+
+    if slots != len(slot_re.findall(template_code)):
+        return None
+
+    return Template(tree, names)
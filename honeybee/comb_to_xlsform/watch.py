@@ -0,0 +1,120 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Rebuild a form whenever one of its files changes.
+
+The files are the input file and every file that the last build
+read through the session, so the watched set follows @include and
+@choices as they are added and removed.  The session keeps its parse
+trees and a MemoryCache of expanded includes between builds, and
+forgets the digests of the changed files only, so a rebuild parses
+the changed files and expands only the includes that read them.
+After each build, the trees and templates of code that the build did
+not use, such as older versions of the changed files, are dropped.
+"""
+
+import os
+import sys
+import time
+
+
+POLL_INTERVAL = 0.25
+
+
+def file_state(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Watcher:
+    "Run `build()` again whenever a file it read changes."
+
+    def __init__(self, input_filename, build, session):
+        self.input_filename = os.path.abspath(input_filename)
+        self.build_function = build
+        self.session = session
+        self.states = dict()
+
+        session.sweep()
+
+    def files(self):
+        return {self.input_filename} | set(self.session.digests)
+
+    def changed(self):
+        "Return the files that changed since they were last seen."
+
+        return sorted(filename for filename in self.files()
+                      if file_state(filename) != self.states.get(filename))
+
+    def build(self, changed=()):
+        "Build the form and return the seconds that it took."
+
+        for filename in changed:
+            self.states[filename] = file_state(filename)
+
+        self.session.forget(changed)
+
+        start = time.perf_counter()
+
+        try:
+            self.build_function()
+            self.session.sweep()
+        finally:
+            # Files seen for the first time are watched from now on.
+            #
+            for filename in self.files():
+                if filename not in self.states:
+                    self.states[filename] = file_state(filename)
+
+        return time.perf_counter() - start
+
+    def rebuild(self, changed, log):
+        hits, misses = self.session.cache.hits, self.session.cache.misses
+
+        try:
+            seconds = self.build(changed)
+        except Exception as error:
+            print(f"Error: {error}", file=log)
+            return
+
+        names = ", ".join(os.path.relpath(filename) for filename in changed)
+
+        print(f"Built in {seconds * 1000:.0f} ms"
+              + (f" after changes to {names}" if changed else "")
+              + f" ({self.session.cache.hits - hits} cache hits,"
+              f" {self.session.cache.misses - misses} misses).",
+              file=log, flush=True)
+
+    def run(self, interval=POLL_INTERVAL, log=sys.stderr):
+        "Build the form, then rebuild it on every change until interrupted."
+
+        self.rebuild((), log)
+
+        try:
+            while True:
+                time.sleep(interval)
+
+                changed = self.changed()
+
+                if changed:
+                    self.rebuild(changed, log)
+        except KeyboardInterrupt:
+            pass
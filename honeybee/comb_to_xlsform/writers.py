@@ -0,0 +1,105 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Output formats of beepile.
+
+Each writer takes a Survey and a filename, which is `-` for standard
+output.  The text formats write the same columns, in the same order,
+as the worksheets of the XLSForm workbook.
+"""
+
+import csv
+import json
+import os
+
+from honeybee.comb_to_xlsform.common import open_output
+from honeybee.comb_to_xlsform.model import render
+from honeybee.comb_to_xlsform.xlsx import iter_sheets, write_xlsx
+
+
+def csv_filenames(filename):
+    """Return the file of each worksheet for the CSV output `filename`,
+    like `form.survey.csv` for `form.csv`."""
+
+    stem, extension = os.path.splitext(filename)
+
+    if extension.lower() != ".csv":
+        stem = filename
+
+    return {worksheet: f"{stem}.{worksheet}.csv"
+            for worksheet in ("survey", "choices", "settings")}
+
+
+def write_csv(survey, filename):
+    "Write one CSV file per worksheet."
+
+    if filename == "-":
+        raise ValueError(
+            "CSV output needs a filename, as each worksheet is written"
+            " to its own file.")
+
+    filenames = csv_filenames(filename)
+
+    for worksheet, rows, column_names in iter_sheets(survey):
+        with open(filenames[worksheet], "w", newline="",
+                  encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(column_names)
+
+            for row in rows:
+                writer.writerow(
+                    render(row.get(name)) for name in column_names)
+
+
+def write_ndjson(survey, filename):
+    """Write a JSON object per line for each row, as {"sheet": name,
+    "row": {column: value}} without empty cells."""
+
+    with open_output(filename, "w", encoding="utf-8") as f:
+        for worksheet, rows, column_names in iter_sheets(survey):
+            for row in rows:
+                values = {name: render(row[name])
+                          for name in column_names
+                          if row.get(name) is not None}
+
+                f.write(json.dumps(
+                    {"sheet": worksheet, "row": values},
+                    ensure_ascii=False))
+                f.write("\n")
+
+
+def write_xform(survey, filename):
+    "Write an XForm, importing xform.py and its XML modules only now."
+
+    from honeybee.comb_to_xlsform import xform
+
+    xform.write_xform(survey, filename)
+
+
+# The extension of the output file of each format, for --batch.
+#
+EXTENSIONS = {
+    "xlsx": ".xlsx",
+    "xform": ".xml",
+    "csv": ".csv",
+    "ndjson": ".ndjson"}
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "xform": write_xform,
+    "csv": write_csv,
+    "ndjson": write_ndjson}
@@ -0,0 +1,506 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Write a compiled form as an XForm.
+
+This is the XForm that pyxform makes from the workbook of the form,
+written straight from the Survey with a streaming XML writer.  Only
+the question types and columns that Honeybee forms use are covered,
+without translations or media.
+"""
+
+import os
+import re
+
+from xml.sax.saxutils import XMLGenerator
+
+from honeybee.comb_to_xlsform.common import open_output
+from honeybee.comb_to_xlsform.model import render
+
+
+NAMESPACES = {
+    "xmlns": "http://www.w3.org/2002/xforms",
+    "xmlns:h": "http://www.w3.org/1999/xhtml",
+    "xmlns:ev": "http://www.w3.org/2001/xml-events",
+    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
+    "xmlns:jr": "http://openrosa.org/javarosa",
+    "xmlns:orx": "http://openrosa.org/xforms",
+    "xmlns:odk": "http://www.opendatakit.org/xforms"}
+
+XFORMS_VERSION = "1.0.0"
+
+# The bind attributes and body element of each question type.
+#
+TYPES = {
+    "text": ({"type": "string"}, "input"),
+    "integer": ({"type": "int"}, "input"),
+    "decimal": ({"type": "decimal"}, "input"),
+    "date": ({"type": "date"}, "input"),
+    "time": ({"type": "time"}, "input"),
+    "dateTime": ({"type": "dateTime"}, "input"),
+    "note": ({"readonly": "true()", "type": "string"}, "input"),
+    "calculate": ({"type": "string"}, None),
+    "acknowledge": ({"type": "string"}, "trigger"),
+    "geopoint": ({"type": "geopoint"}, "input"),
+    "geotrace": ({"type": "geotrace"}, "input"),
+    "geoshape": ({"type": "geoshape"}, "input"),
+    "barcode": ({"type": "barcode"}, "input"),
+    "image": ({"type": "binary"}, "upload"),
+    "audio": ({"type": "binary"}, "upload"),
+    "video": ({"type": "binary"}, "upload"),
+    "select_one": ({"type": "string"}, "select1"),
+    "select_multiple": ({"type": "string"}, "select"),
+    "select_one_from_file": ({"type": "string"}, "select1"),
+    "select_multiple_from_file": ({"type": "string"}, "select"),
+    "start": ({"jr:preload": "timestamp", "type": "dateTime",
+               "jr:preloadParams": "start"}, None),
+    "end": ({"jr:preload": "timestamp", "type": "dateTime",
+             "jr:preloadParams": "end"}, None),
+    "today": ({"jr:preload": "date", "type": "date",
+               "jr:preloadParams": "today"}, None),
+    "deviceid": ({"jr:preload": "property", "type": "string",
+                  "jr:preloadParams": "deviceid"}, None)}
+
+MEDIA_TYPES = {
+    "image": "image/*",
+    "audio": "audio/*",
+    "video": "video/*"}
+
+# Columns of the survey sheet that become bind attributes, and whether
+# their ${references} are replaced with paths.
+#
+BIND_COLUMNS = (
+    ("readonly", "readonly", True),
+    ("constraint", "constraint", True),
+    ("constraint_message", "jr:constraintMsg", False),
+    ("calculation", "calculate", True),
+    ("required", "required", True),
+    ("required_message", "jr:requiredMsg", False),
+    ("relevance", "relevant", True))
+
+BOOLEANS = {
+    "yes": "true()", "Yes": "true()", "YES": "true()",
+    "true": "true()", "True": "true()", "TRUE": "true()",
+    "no": "false()", "No": "false()", "NO": "false()",
+    "false": "false()", "False": "false()", "FALSE": "false()"}
+
+# The choice and the question that pyxform adds for `or_other`.
+#
+OTHER_CHOICE = {"value": "other", "label": "Other"}
+OTHER_LABEL = "Specify other."
+
+reference_re = re.compile(r"\$\{([A-Za-z_][\w.-]*)\}")
+
+
+class Element:
+    "A question, group or repeat at `path` in the primary instance."
+
+    __slots__ = ("row", "kind", "path", "children")
+
+    def __init__(self, row, kind, path, children=None):
+        self.row = row
+        self.kind = kind
+        self.path = path
+        self.children = children
+
+
+def question_kind(row):
+    """Return the question type of `row`, the list of its choices,
+    which is the name of the file for a select from a file, and whether
+    the select has `or_other`."""
+
+    words = row["type"].split()
+
+    if words[0] not in TYPES:
+        raise ValueError(
+            f"Unknown question type for the XForm: {row['type']}.")
+
+    if words[0].startswith("select_"):
+        other = words[2:] == ["or_other"]
+
+        if len(words) != 2 and not other:
+            raise ValueError(f"Select without a list: {row['name']}.")
+
+        if other and words[0].endswith("_from_file"):
+            raise ValueError(
+                f"or_other with a list from a file: {row['name']}.")
+
+        return words[0], words[1], other
+
+    return words[0], None, False
+
+
+def other_row(row):
+    """Return the row of the question for the other choice of an
+    `or_other` select, which pyxform adds after it."""
+
+    return {
+        "name": f"{row['name']}_other",
+        "type": "text",
+        "label": OTHER_LABEL,
+        "relevance": f"selected(../{row['name']}, 'other')"}
+
+
+def get_elements(rows, root):
+    """Nest the rows of the survey sheet in Elements under their groups
+    and repeats, and return the Element of the instance root."""
+
+    stack = [Element(None, "group", (root,), [])]
+
+    for row in rows:
+        kind = row["type"]
+
+        if kind in ("begin group", "begin repeat"):
+            element = Element(
+                row, kind.split()[1], stack[-1].path + (row["name"],), [])
+            stack[-1].children.append(element)
+            stack.append(element)
+        elif kind in ("end group", "end repeat"):
+            if len(stack) == 1 or stack[-1].kind != kind.split()[1]:
+                raise ValueError(f"Unmatched {kind}: {row['name']}.")
+
+            stack.pop()
+        else:
+            element = Element(
+                row, question_kind(row), stack[-1].path + (row["name"],))
+            stack[-1].children.append(element)
+
+            if element.kind[2]:
+                row = other_row(row)
+                stack[-1].children.append(Element(
+                    row, question_kind(row),
+                    stack[-1].path + (row["name"],)))
+
+    if len(stack) > 1:
+        raise ValueError(
+            f"Unclosed {stack[-1].kind}: {stack[-1].path[-1]}.")
+
+    return stack[0]
+
+
+def iter_elements(element):
+    for child in element.children:
+        yield child
+
+        if child.children is not None:
+            yield from iter_elements(child)
+
+
+class XFormWriter:
+    "Write the XForm of a Survey into an XMLGenerator."
+
+    def __init__(self, out, survey, form_id, root="data"):
+        self.out = out
+        self.survey = survey
+        self.settings = survey.settings[0] if survey.settings else {}
+        self.form_id = self.settings.get("form_id") or form_id
+        self.root = get_elements(survey.survey, root)
+
+        self.paths = dict()
+        self.repeats = set()
+
+        for element in iter_elements(self.root):
+            self.paths[element.path[-1]] = element.path
+
+            if element.kind == "repeat":
+                self.repeats.add(element.path)
+
+    def start(self, tag, attributes=None):
+        self.out.startElement(tag, attributes or {})
+
+    def end(self, tag):
+        self.out.endElement(tag)
+
+    def leaf(self, tag, text=None, attributes=None):
+        self.start(tag, attributes)
+
+        if text is not None:
+            self.out.characters(text)
+
+        self.end(tag)
+
+    def reference(self, name, context):
+        """Return the path to question `name` from the element at path
+        `context`, relative if they share a repeat, like pyxform."""
+
+        target = self.paths.get(name)
+
+        if target is None:
+            raise NameError(f"Unknown question: ${{{name}}}.")
+
+        common = 0
+
+        while (common < min(len(target), len(context)) - 1
+               and target[common] == context[common]):
+            common += 1
+
+        if any(target[:i] in self.repeats for i in range(2, common + 1)):
+            steps = "/".join(".." for _ in range(len(context) - common))
+            return f" {steps}/{'/'.join(target[common:])} "
+
+        return f" /{'/'.join(target)} "
+
+    def xpath(self, text, context):
+        return reference_re.sub(
+            lambda match: self.reference(match.group(1), context),
+            str(render(text)))
+
+    def write_text(self, tag, text, context):
+        """Write a label or hint, with an output for each reference.
+        Like pyxform, text with outputs is padded with spaces."""
+
+        if reference_re.search(text):
+            text = f" {text} "
+
+        self.start(tag)
+
+        position = 0
+
+        for match in reference_re.finditer(text):
+            self.out.characters(text[position:match.start()])
+            self.leaf("output", attributes={
+                "value": self.reference(match.group(1), context)})
+            position = match.end()
+
+        self.out.characters(text[position:])
+        self.end(tag)
+
+    def write(self):
+        title = self.settings.get("form_title") or self.form_id
+
+        self.out.startDocument()
+        self.start("h:html", NAMESPACES)
+        self.start("h:head")
+        self.leaf("h:title", title)
+        self.start("model", {"odk:xforms-version": XFORMS_VERSION})
+        self.write_instance()
+        self.write_choices()
+        self.write_binds(self.root)
+        self.leaf("bind", attributes={
+            "nodeset": f"/{self.root.path[0]}/meta/instanceID",
+            "type": "string",
+            "readonly": "true()",
+            "jr:preload": "uid"})
+        self.end("model")
+        self.end("h:head")
+        self.start("h:body")
+        self.write_body(self.root)
+        self.end("h:body")
+        self.end("h:html")
+        self.out.endDocument()
+
+    def write_instance(self):
+        attributes = {"id": self.form_id}
+
+        if self.settings.get("version"):
+            attributes["version"] = str(self.settings["version"])
+
+        self.start("instance")
+        self.start(self.root.path[0], attributes)
+
+        for child in self.root.children:
+            self.write_instance_element(child)
+
+        self.start("meta")
+        self.leaf("instanceID")
+        self.end("meta")
+        self.end(self.root.path[0])
+        self.end("instance")
+
+    def write_instance_element(self, element):
+        tag = element.path[-1]
+
+        if element.children is None:
+            default = element.row.get("default")
+            self.leaf(tag, None if default is None else str(default))
+            return
+
+        # A repeat has a template for new instances and one instance.
+        #
+        if element.kind == "repeat":
+            copies = ({"jr:template": ""}, None)
+        else:
+            copies = (None,)
+
+        for attributes in copies:
+            self.start(tag, attributes)
+
+            for child in element.children:
+                self.write_instance_element(child)
+
+            self.end(tag)
+
+    def write_choices(self):
+        # Lists in files come first, as in pyxform.
+        #
+        files = dict.fromkeys(
+            element.kind[1] for element in iter_elements(self.root)
+            if element.children is None
+            and element.kind[0].endswith("_from_file"))
+
+        for filename in files:
+            stem, extension = os.path.splitext(filename)
+            scheme = "file-csv" if extension == ".csv" else "file"
+
+            self.leaf("instance", attributes={
+                "id": stem, "src": f"jr://{scheme}/{filename}"})
+
+        others = set(
+            element.kind[1] for element in iter_elements(self.root)
+            if element.children is None and element.kind[2])
+
+        lists = dict()
+
+        for row in self.survey.choices:
+            lists.setdefault(row["list_name"], []).append(row)
+
+        for list_name in others:
+            if list_name in lists:
+                lists[list_name].append(OTHER_CHOICE)
+
+        for list_name, rows in lists.items():
+            self.start("instance", {"id": list_name})
+            self.start("root")
+
+            for row in rows:
+                self.start("item")
+                self.leaf("name", str(row["value"]))
+
+                if row.get("label") is not None:
+                    self.leaf("label", str(row["label"]))
+
+                for name, value in row.items():
+                    if (name not in ("list_name", "value", "label")
+                            and value is not None):
+                        self.leaf(name, str(value))
+
+                self.end("item")
+
+            self.end("root")
+            self.end("instance")
+
+    def write_binds(self, parent):
+        for element in parent.children:
+            if element.children is None:
+                attributes = dict(TYPES[element.kind[0]][0])
+            else:
+                attributes = {}
+
+            for column, attribute, xpath in BIND_COLUMNS:
+                value = element.row.get(column)
+
+                if value is None:
+                    continue
+
+                value = str(render(value))
+
+                if column in ("required", "readonly"):
+                    value = BOOLEANS.get(value, value)
+
+                attributes[attribute] = (
+                    self.xpath(value, element.path) if xpath else value)
+
+            if attributes:
+                self.leaf("bind", attributes={
+                    "nodeset": "/" + "/".join(element.path),
+                    **attributes})
+
+            if element.children is not None:
+                self.write_binds(element)
+
+    def write_body(self, parent):
+        for element in parent.children:
+            if element.children is None:
+                self.write_control(element)
+            else:
+                self.write_group(element)
+
+    def control_attributes(self, element, ref="ref"):
+        attributes = {ref: "/" + "/".join(element.path)}
+
+        if element.row.get("appearance") is not None:
+            attributes["appearance"] = str(element.row["appearance"])
+
+        if element.row.get("repeat_count") is not None:
+            attributes["jr:count"] = self.xpath(
+                element.row["repeat_count"], element.path)
+
+        return attributes
+
+    def write_labels(self, element):
+        for column in ("label", "hint"):
+            text = element.row.get(column)
+
+            if text is not None:
+                self.write_text(column, str(text), element.path)
+
+    def write_control(self, element):
+        kind, list_name, _ = element.kind
+        tag = TYPES[kind][1]
+
+        if tag is None:
+            return
+
+        attributes = self.control_attributes(element)
+
+        if kind in MEDIA_TYPES:
+            attributes["mediatype"] = MEDIA_TYPES[kind]
+
+        self.start(tag, attributes)
+        self.write_labels(element)
+
+        if list_name is not None:
+            if kind.endswith("_from_file"):
+                list_name = os.path.splitext(list_name)[0]
+
+            self.start("itemset", {
+                "nodeset": f"instance('{list_name}')/root/item"})
+            self.leaf("value", attributes={"ref": "name"})
+            self.leaf("label", attributes={"ref": "label"})
+            self.end("itemset")
+
+        self.end(tag)
+
+    def write_group(self, element):
+        if element.kind == "repeat":
+            self.start("group", {"ref": "/" + "/".join(element.path)})
+            self.write_labels(element)
+            self.start("repeat", self.control_attributes(
+                element, "nodeset"))
+            self.write_body(element)
+            self.end("repeat")
+            self.end("group")
+        else:
+            self.start("group", self.control_attributes(element))
+            self.write_labels(element)
+            self.write_body(element)
+            self.end("group")
+
+
+def write_xform(survey, filename, form_id=None):
+    """Write the XForm of `survey` to `filename`.  Without @form, the
+    form id is `form_id` or else the name of the file, like pyxform."""
+
+    if form_id is None:
+        form_id = ("data" if filename == "-" else
+                   os.path.splitext(os.path.basename(filename))[0])
+
+    with open_output(filename, "w", encoding="utf-8") as f:
+        XFormWriter(
+            XMLGenerator(f, "utf-8", short_empty_elements=True),
+            survey,
+            form_id).write()
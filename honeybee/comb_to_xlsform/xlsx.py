@@ -15,7 +15,10 @@
 # Public License along with Honeybee.  If not, see
 # <https://www.gnu.org/licenses/>.
 
-import openpyxl
+from honeybee.comb_to_xlsform.common import open_output
+from honeybee.comb_to_xlsform.external import (
+    ChoiceLists, ExternalWriter, external_row, output_directory)
+from honeybee.comb_to_xlsform.model import Table, render
 
 
 SURVEY_ORDER = (
@@ -29,6 +32,11 @@ CHOICES_ORDER = (
 SETTINGS_ORDER = (
     "form_title", "form_id", "version")
 
+ORDERS = {
+    "survey": SURVEY_ORDER,
+    "choices": CHOICES_ORDER,
+    "settings": SETTINGS_ORDER}
+
 
 def column_key(order, value):
     try:
@@ -38,8 +46,32 @@ def column_key(order, value):
 
 
 def get_column_names(rows):
-    return set(name for row in rows
-                    for name in row.keys())
+    "Return the column names of `rows` in order of first use."
+
+    if isinstance(rows, Table):
+        return list(rows.columns)
+
+    return list(dict.fromkeys(name for row in rows
+                                   for name in row.keys()))
+
+
+def sort_column_names(worksheet, column_names):
+    "Sort the column names of a worksheet in the order of XLSForm."
+
+    order = ORDERS[worksheet]
+
+    return sorted(column_names, key=lambda x: column_key(order, x))
+
+
+def iter_sheets(survey):
+    """Yield the name, rows and sorted column names of each worksheet
+    of `survey`."""
+
+    for worksheet, rows in zip(ORDERS, survey):
+        rows = rows or ()
+
+        yield (worksheet, rows,
+               sort_column_names(worksheet, get_column_names(rows)))
 
 
 def write_sheet(sheet, rows, column_key):
@@ -50,10 +82,12 @@ def write_sheet(sheet, rows, column_key):
 
     for row in rows:
         sheet.append(
-            tuple(row.get(name) for name in column_names))
+            tuple(render(row.get(name)) for name in column_names))
 
 
 def write_xlsx(survey, filename):
+    import openpyxl
+
     workbook = openpyxl.Workbook()
 
     survey_sheet = workbook.active
@@ -72,7 +106,96 @@ def write_xlsx(survey, filename):
         lambda x: column_key(CHOICES_ORDER, x))
     write_sheet(
         settings_sheet,
-        survey.settings,
+        survey.settings or (),
         lambda x: column_key(SETTINGS_ORDER, x))
 
-    workbook.save(filename)
+    with open_output(filename, "wb") as f:
+        workbook.save(f)
+
+
+def get_stream_column_names(rows):
+    """Return the column names of each worksheet in the (worksheet,
+    row) pairs of `rows`, in order of first use, and the ChoiceLists of
+    the choices and questions."""
+
+    columns = {worksheet: dict() for worksheet in ORDERS}
+    layouts = set()
+    lists = ChoiceLists()
+
+    for worksheet, row in rows:
+        if worksheet == "settings":
+            # Only the last @form is written.
+            #
+            columns["settings"] = dict.fromkeys(row)
+            continue
+
+        if worksheet == "choices":
+            lists.add(row)
+            continue
+
+        lists.add_question(row)
+
+        layout = getattr(row, "layout", None)
+
+        if layout is not None:
+            if layout in layouts:
+                continue
+
+            layouts.add(layout)
+
+        for name in row:
+            if name not in columns[worksheet]:
+                columns[worksheet][name] = None
+
+    return columns, lists
+
+
+def write_xlsx_stream(rows, filename, external_threshold=None):
+    """Write the (worksheet, row) pairs from a call to `rows` into a
+    write-only workbook.  `rows` is called twice, first to find the
+    column names, so the rows are never all in memory.  Choice lists
+    longer than `external_threshold` are written to CSV files."""
+
+    columns, lists = get_stream_column_names(rows())
+    external = lists.external(external_threshold)
+    columns["choices"] = lists.column_names(exclude=external)
+
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheets = {}
+
+    for worksheet in ORDERS:
+        column_names = sort_column_names(worksheet, columns[worksheet])
+
+        sheet = workbook.create_sheet(title=worksheet)
+        sheet.append(column_names)
+
+        sheets[worksheet] = sheet, column_names
+
+    settings = None
+
+    with ExternalWriter(
+            output_directory(filename), lists, external) as writer:
+        for worksheet, row in rows():
+            if worksheet == "settings":
+                settings = row
+                continue
+
+            if worksheet == "survey":
+                row = external_row(row, external)
+            elif row.get("list_name") in external:
+                writer.write(row)
+                continue
+
+            sheet, column_names = sheets[worksheet]
+            sheet.append(
+                tuple(render(row.get(name)) for name in column_names))
+
+    if settings is not None:
+        sheet, column_names = sheets["settings"]
+        sheet.append(
+            tuple(render(settings.get(name)) for name in column_names))
+
+    with open_output(filename, "wb") as f:
+        workbook.save(f)
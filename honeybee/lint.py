@@ -15,46 +15,105 @@
 # Public License along with Honeybee.  If not, see
 # <https://www.gnu.org/licenses/>.
 
+"""Check an XLSForm for mistakes.
+
+Each check is a rule that registers the worksheet, the row types and
+the columns that it needs.  lint_workbook reads each worksheet once,
+and for each row it updates the indexes that the rules share (the
+names defined so far, the row spans of each choice list and the
+references of the row) and runs the rules that want the row.  Rules
+return a message, which is collected as a Diagnostic.
+"""
+
+import itertools
 import re
+import sys
+
+from collections import namedtuple
+
+from honeybee.xlsx_reader import header_rows
+
+
+Diagnostic = namedtuple(
+    "Diagnostic", ("severity", "rule", "sheet", "row", "message"))
+
+REFERENCE = re.compile(r"\${([^}]+)}")
+
+# The columns that can hold expressions or text with references, also
+# with a language like label::English.
+#
+EXPRESSION_COLUMNS = frozenset((
+    "label", "hint", "guidance_hint", "constraint", "constraint_message",
+    "relevant", "relevance", "calculation", "required",
+    "required_message", "read_only", "readonly", "default",
+    "choice_filter", "repeat_count", "trigger", "parameters"))
+
+REQUIRED_COLUMNS = {
+    "survey": ("name", "type", "label"),
+    "choices": ()}
+
+
+class Rule:
+    "A check of the rows of one worksheet."
 
-import argh
-import openpyxl
+    __slots__ = ("name", "sheet", "severity", "types", "columns", "check")
 
+    def __init__(self, name, sheet, severity, types, columns, check):
+        self.name = name
+        self.sheet = sheet
+        self.severity = severity
+        self.types = types
+        self.columns = columns
+        self.check = check
+
+
+RULES = []
+SHEET_RULES = []
+
+# The descriptions of the diagnostics that are not made by rules.
+#
+OTHER_RULES = {
+    "missing-columns": "A worksheet is missing core columns."}
 
-def dict_rows(sheet):
-    rows = sheet.iter_rows()
-    header = tuple(cell.value for cell in next(rows))
 
-    for row in rows:
-        yield {key: str(cell.value or "")
-               for key, cell in zip(header, row)}
+def rule(sheet, severity, types=None, columns=()):
+    """Register `check(row, index)` for the rows of `sheet` whose type
+    starts with one of `types`, or all rows if `types` is None, in
+    sheets that have `columns`."""
 
+    def register(check):
+        RULES.append(Rule(check.__name__.replace("_", "-"), sheet,
+                          severity, types, columns, check))
+        return check
 
-def check_choices(choices):
-    list_names = set()
-    last_list_name = None
+    return register
 
-    for row in dict_rows(choices):
-        list_name = row.get("list_name")
 
-        if last_list_name is None:
-            last_list_name = list_name
-            continue
+def sheet_rule(sheet, severity):
+    """Register `check(index)`, which yields (row, message) pairs after
+    `sheet` is read."""
 
-        if list_name in list_names and list_name != last_list_name:
-            print(f"Warning: Choice list {list_name} is defined in multiple places.")
+    def register(check):
+        SHEET_RULES.append(Rule(check.__name__.replace("_", "-"), sheet,
+                                severity, None, (), check))
+        return check
 
+    return register
 
-def choices_list_names(choices):
-    return set(row.get("list_name") for row in dict_rows(choices))
 
+class Index:
+    "What the rules know about the worksheets read so far."
 
-def missing_survey_columns(survey):
-    rows = survey.iter_rows()
-    header = tuple(cell.value for cell in next(rows))
+    __slots__ = ("names", "lists", "last_list", "references")
 
-    return tuple(col for col in ("name", "type", "label")
-                     if col not in header)
+    def __init__(self):
+        # The row where each name is first defined.
+        self.names = dict()
+        # The [first, last] row spans of each choice list.
+        self.lists = dict()
+        self.last_list = None
+        # The variables that the row being checked refers to.
+        self.references = ()
 
 
 def defines_variable(row):
@@ -97,73 +156,222 @@ def non_required_question(row):
 
 
 def extract_variables(string):
-    return tuple(re.findall(r"\${([^}]+)}", string))
+    return tuple(REFERENCE.findall(string))
+
+
+def expression_columns(header):
+    "Return the positions of the columns of `header` with expressions."
+
+    return tuple(i for i, name in enumerate(header)
+                 if name.partition("::")[0] in EXPRESSION_COLUMNS)
+
+
+def index_choices(row, index, columns):
+    list_name = row.get("list_name")
+
+    if not list_name:
+        return
+
+    spans = index.lists.setdefault(list_name, [])
+
+    if spans and index.last_list == list_name:
+        spans[-1][1] = row.number
+    else:
+        spans.append([row.number, row.number])
+
+    index.last_list = list_name
+
+
+def index_survey(row, index, columns):
+    if defines_variable(row) or defines_repeat(row):
+        index.names.setdefault(row["name"], row.number)
+
+    cells = row.cells
+    index.references = tuple(
+        variable for i in columns if i < len(cells)
+        for variable in REFERENCE.findall(cells[i]))
+
+
+INDEXERS = {
+    "choices": index_choices,
+    "survey": index_survey}
+
 
+@rule("survey", "warning")
+def duplicate_name(row, index):
+    "A name is defined by more than one row."
 
-def undefined_references(row, names):
-    return tuple(variable for col in row
-                          for variable in extract_variables(row.get(col))
-                          if variable not in names)
+    if defines_variable(row) or defines_repeat(row):
+        first = index.names[row["name"]]
 
+        if first != row.number:
+            return (f"{row['name']} is defined more than once, first on"
+                    f" row {first}.")
 
-def undefined_choice_lists(row, choices):
-    return tuple(list_name for list_name in extract_list_names(row)
-                           if list_name not in choices)
 
+@rule("survey", "error", types=("select_one", "select_multiple"))
+def undefined_choice_lists(row, index):
+    "A select question uses a choice list that is not defined."
 
-def missing_calculation(row):
-    return row.get("calculation").strip() == ""
+    lists = tuple(list_name for list_name in extract_list_names(row)
+                  if list_name not in index.lists)
 
+    if lists:
+        return (f"{row['name']} refers to undefined choice lists:"
+                f" {', '.join(lists)}.")
 
-def check_survey(survey, choices):
-    names = set()
-    list_names = choices_list_names(choices)
 
-    cols = missing_survey_columns(survey)
-    if cols:
-        print("Error: The survey worksheet is missing core columns ",
-              ", ".join(cols),
-              ".",
-              sep="")
+@rule("survey", "warning")
+def not_required(row, index):
+    "A question is not required."
+
+    if non_required_question(row):
+        return f"{row['name']} is not required."
+
+
+@rule("survey", "error", types=("calculate", "calculate_here"),
+      columns=("calculation",))
+def empty_calculation(row, index):
+    "A calculate row has no calculation."
+
+    if row["calculation"].strip() == "":
+        return f"{row['name']} has empty calculation."
+
+
+@rule("survey", "error")
+def undefined_references(row, index):
+    "A row refers to a name that no earlier row defines."
+
+    refs = tuple(variable for variable in index.references
+                 if variable not in index.names)
+
+    if refs:
+        return (f"{row['name']} has undefined references:"
+                f" {', '.join(refs)}.")
+
+
+@sheet_rule("choices", "warning")
+def duplicate_choice_list(index):
+    "The rows of a choice list are not next to each other."
+
+    for list_name, spans in index.lists.items():
+        if len(spans) > 1:
+            rows = ", ".join(f"{first}" if first == last
+                             else f"{first}-{last}"
+                             for first, last in spans)
+            yield (spans[1][0],
+                   f"Choice list {list_name} is defined in multiple"
+                   f" places: rows {rows}.")
+
+
+def check_sheet(sheet, name, index, diagnostics):
+    "Run the rules of worksheet `name` on its rows."
+
+    rows = iter(sheet)
+    header = next(rows, ())
+
+    missing = tuple(column for column in REQUIRED_COLUMNS[name]
+                    if column not in header)
+
+    if missing:
+        diagnostics.append(Diagnostic(
+            "error", "missing-columns", name, 1,
+            f"The {name} worksheet is missing core columns"
+            f" {', '.join(missing)}."))
         return
 
-    for row in dict_rows(survey):
-        if defines_variable(row) or defines_repeat(row):
-            if row.get("name") in names:
-                print("Warning: %(name)s is defined more than once." % row)
-            else:
-                names.add(row.get("name"))
+    rules = [rule for rule in RULES
+             if rule.sheet == name
+             and all(column in header for column in rule.columns)]
+    rules_by_type = dict()
+    columns = expression_columns(header)
+    index_row = INDEXERS[name]
 
-        if defines_select(row):
-            lists = undefined_choice_lists(row, list_names)
-            if lists:
-                print("Error: %(name)s refers to undefined choice lists: " % row, end="")
-                print("%s." % ", ".join(lists))
+    for row in header_rows(itertools.chain((header,), rows)):
+        index_row(row, index, columns)
 
-        if non_required_question(row):
-            print("Warning: %(name)s is not required." % row)
+        word = row.get("type", "").split(" ", 1)[0]
+        wanted = rules_by_type.get(word)
 
-        if defines_calculate(row) and missing_calculation(row):
-            print("Error: %(name)s has empty calculation." % row)
+        if wanted is None:
+            wanted = rules_by_type[word] = [
+                rule for rule in rules
+                if rule.types is None or word in rule.types]
 
-        refs = undefined_references(row, names)
-        if refs:
-            print("Error: %(name)s has undefined references: " % row, end="")
-            print("%s." % ", ".join(refs))
+        for rule in wanted:
+            message = rule.check(row, index)
 
+            if message:
+                diagnostics.append(Diagnostic(
+                    rule.severity, rule.name, name, row.number, message))
 
-def main(filename):
-    form = openpyxl.load_workbook(filename)
+    for rule in SHEET_RULES:
+        if rule.sheet == name:
+            diagnostics.extend(
+                Diagnostic(rule.severity, rule.name, name, number, message)
+                for number, message in rule.check(index))
 
-    choices = form.get_sheet_by_name("choices")
-    survey = form.get_sheet_by_name("survey")
 
-    check_choices(choices)
-    check_survey(survey, choices)
+def lint_workbook(workbook):
+    "Return the Diagnostics of a workbook opened with open_workbook."
+
+    index = Index()
+    diagnostics = []
+
+    for name in ("choices", "survey"):
+        check_sheet(workbook.sheet(name), name, index, diagnostics)
+
+    return diagnostics
+
+
+def format_diagnostic(diagnostic, filename=None):
+    location = "".join(f"{part}:" for part in (
+        filename, diagnostic.sheet, diagnostic.row) if part is not None)
+
+    return (f"{location} {diagnostic.severity.capitalize()}:"
+            f" {diagnostic.message}").lstrip()
+
+
+def main(*filenames, format="text", output=None, jobs=None):
+    """Check XLSForm workbooks: files, directories of .xlsx files and
+    globs.  The exit status is 1 if there are warnings and 2 if there
+    are errors."""
+
+    from honeybee.lint_batch import (
+        REPORTERS, exit_status, lint_files, lint_inputs)
+
+    try:
+        filenames = lint_inputs(filenames)
+    except ValueError as error:
+        print(f"beelint: {error}", file=sys.stderr)
+        sys.exit(2)
+
+    results = lint_files(filenames, jobs)
+
+    if output is None:
+        REPORTERS[format](results, sys.stdout)
+    else:
+        with open(output, "w") as f:
+            REPORTERS[format](results, f)
+
+    status = exit_status(results)
+
+    if status:
+        sys.exit(status)
 
 
 def dispatch():
-    argh.dispatch_command(main)
+    # `beelint FILE...` runs without argh, which takes longer to import
+    # than a small form takes to check.
+    #
+    arguments = sys.argv[1:]
+
+    if arguments and not any(arg.startswith("-") for arg in arguments):
+        main(*arguments)
+    else:
+        from honeybee.lint_command import run
+
+        run(arguments)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Check many workbooks at once, and report in JSON or SARIF.
+
+`beelint` takes files, directories and globs.  The workbooks are
+checked on a pool of processes, each reading its workbook by
+streaming, and the diagnostics of every file are reported together.
+The exit status is that of the worst diagnostic: 0 without any, 1
+with warnings and 2 with errors.
+"""
+
+import concurrent.futures
+import glob
+import json
+import os
+import pathlib
+import time
+
+from honeybee.lint import (
+    OTHER_RULES, RULES, SHEET_RULES, Diagnostic, format_diagnostic,
+    lint_workbook)
+from honeybee.xlsx_reader import open_workbook
+
+
+EXIT_STATUS = {"warning": 1, "error": 2}
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+def lint_inputs(patterns):
+    """Return the files named in `patterns`: files, directories, whose
+    .xlsx files are found recursively, and globs, in order."""
+
+    filenames = dict()
+
+    for pattern in patterns:
+        if os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            if os.path.isdir(pattern):
+                pattern = os.path.join(pattern, "**", "*.xlsx")
+
+            # Excel leaves ~$ files next to open workbooks.
+            matches = sorted(
+                filename
+                for filename in glob.glob(pattern, recursive=True)
+                if os.path.isfile(filename)
+                and not os.path.basename(filename).startswith("~$"))
+
+        if not matches:
+            raise ValueError(f"No files match {pattern}.")
+
+        filenames.update(dict.fromkeys(matches))
+
+    return list(filenames)
+
+
+def lint_file(filename):
+    """Return (seconds, diagnostics) of one workbook.  A workbook that
+    cannot be read has one unreadable-file diagnostic."""
+
+    start = time.perf_counter()
+
+    try:
+        with open_workbook(filename) as workbook:
+            diagnostics = lint_workbook(workbook)
+    except Exception as error:
+        diagnostics = [Diagnostic("error", "unreadable-file", None, None,
+                                  f"{type(error).__name__}: {error}")]
+
+    return time.perf_counter() - start, diagnostics
+
+
+def lint_files(filenames, jobs=None):
+    "Return {filename: (seconds, diagnostics)} in the order of `filenames`."
+
+    jobs = min(jobs or os.cpu_count(), len(filenames))
+
+    if jobs <= 1:
+        return {filename: lint_file(filename) for filename in filenames}
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        return dict(zip(filenames, pool.map(
+            lint_file, filenames,
+            chunksize=max(1, len(filenames) // (4 * jobs)))))
+
+
+def exit_status(results):
+    "Return the exit status of the worst diagnostic of `results`."
+
+    return max((EXIT_STATUS.get(diagnostic.severity, 0)
+                for _, diagnostics in results.values()
+                for diagnostic in diagnostics),
+               default=0)
+
+
+def report_text(results, f):
+    for filename, (_, diagnostics) in results.items():
+        for diagnostic in diagnostics:
+            f.write(format_diagnostic(
+                diagnostic, filename if len(results) > 1 else None))
+            f.write("\n")
+
+
+def report_json(results, f):
+    json.dump(
+        {"files": [
+            {"filename": filename,
+             "seconds": round(seconds, 6),
+             "diagnostics": [diagnostic._asdict()
+                             for diagnostic in diagnostics]}
+            for filename, (seconds, diagnostics) in results.items()]},
+        f, indent=2)
+    f.write("\n")
+
+
+def sarif_rules():
+    descriptions = {rule.name: (rule.check.__doc__, rule.severity)
+                    for rule in RULES + SHEET_RULES}
+    descriptions.update((name, (text, "error"))
+                        for name, text in OTHER_RULES.items())
+    descriptions["unreadable-file"] = (
+        "A workbook cannot be read.", "error")
+
+    return [{"id": name,
+             "shortDescription": {"text": text},
+             "defaultConfiguration": {"level": severity}}
+            for name, (text, severity) in descriptions.items()]
+
+
+def artifact_uri(filename):
+    if os.path.isabs(filename):
+        return pathlib.Path(filename).as_uri()
+
+    return pathlib.PurePath(filename).as_posix()
+
+
+def sarif_result(filename, diagnostic):
+    location = {"physicalLocation": {
+        "artifactLocation": {"uri": artifact_uri(filename)}}}
+
+    if diagnostic.row is not None:
+        location["physicalLocation"]["region"] = {
+            "startLine": diagnostic.row}
+
+    if diagnostic.sheet is not None:
+        location["logicalLocations"] = [
+            {"name": diagnostic.sheet, "kind": "worksheet"}]
+
+    return {"ruleId": diagnostic.rule,
+            "level": diagnostic.severity,
+            "message": {"text": diagnostic.message},
+            "locations": [location]}
+
+
+def report_sarif(results, f):
+    json.dump(
+        {"$schema": SARIF_SCHEMA,
+         "version": "2.1.0",
+         "runs": [{
+             "tool": {"driver": {"name": "beelint",
+                                 "rules": sarif_rules()}},
+             "artifacts": [
+                 {"location": {"uri": artifact_uri(filename)},
+                  "properties": {"seconds": round(seconds, 6)}}
+                 for filename, (seconds, _) in results.items()],
+             "results": [
+                 sarif_result(filename, diagnostic)
+                 for filename, (_, diagnostics) in results.items()
+                 for diagnostic in diagnostics]}]},
+        f, indent=2)
+    f.write("\n")
+
+
+REPORTERS = {
+    "text": report_text,
+    "json": report_json,
+    "sarif": report_sarif}
@@ -0,0 +1,48 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""The command line of beelint, with argh.
+
+beelint checks `beelint FILE...` without this module, as argh takes
+longer to import than small forms take to check.
+"""
+
+import argh
+
+from honeybee.lint import main
+from honeybee.lint_batch import REPORTERS
+
+
+@argh.arg("filenames", nargs="+", metavar="FILE_DIR_OR_GLOB",
+          help="workbooks to check")
+@argh.arg("--format", choices=tuple(REPORTERS),
+          help="print lines of text, JSON or SARIF 2.1.0")
+@argh.arg("-o", "--output", type=str, help="write the report to this file")
+@argh.arg("-j", "--jobs", type=int,
+          help="processes that check workbooks (default: one per CPU)")
+def command(*filenames, format="text", output=None, jobs=None):
+    """Check XLSForm workbooks: files, directories of .xlsx files and
+    globs.  The exit status is 1 if there are warnings and 2 if there
+    are errors."""
+
+    main(*filenames, format=format, output=output, jobs=jobs)
+
+
+def run(argv):
+    "Run beelint with the arguments `argv`."
+
+    argh.dispatch_command(command, argv=argv)
@@ -0,0 +1,456 @@
+# This file is part of Honeybee.
+#
+# Honeybee is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later
+# version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General
+# Public License along with Honeybee.  If not, see
+# <https://www.gnu.org/licenses/>.
+
+"""Read the worksheets of an xlsx file one row at a time.
+
+An xlsx file is a zip file of XML parts.  XlsxWorkbook feeds the part
+of a worksheet to an expat parser in chunks and yields each row as a
+tuple of strings as soon as it ends, so only the shared strings and
+one chunk of rows are in memory, whatever the length of the sheet.
+Cell values are read as openpyxl reads them, except that numbers in
+a date format stay numbers.  Files that it cannot read are read with
+openpyxl in read-only mode instead.
+"""
+
+import functools
+import posixpath
+import zipfile
+
+from collections.abc import Mapping
+from xml.parsers import expat
+
+
+CHUNK_SIZE = 1 << 16
+
+OFFICE_DOCUMENT = "xl/workbook.xml"
+
+
+@functools.lru_cache(maxsize=None)
+def local_name(name):
+    return name.rpartition(":")[2]
+
+
+def cell_string(value):
+    "Return a cell value as a string, with empty cells as ''."
+
+    return str(value or "")
+
+
+def number(text):
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+
+    return int(text)
+
+
+def column_number(reference):
+    "Return the column of a cell reference like 'AB12', from 1."
+
+    column = 0
+
+    for char in reference:
+        if char.isdigit():
+            break
+
+        column = column * 26 + ord(char.upper()) - 64
+
+    return column
+
+
+def elements(data):
+    "Return the local name and attributes of each element of `data`."
+
+    found = []
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = (
+        lambda name, attributes:
+            found.append((local_name(name), attributes)))
+    parser.Parse(data, True)
+
+    return found
+
+
+def relationships(archive, part):
+    "Return the targets of the relationships of `part` by id and type."
+
+    directory, name = posixpath.split(part)
+
+    try:
+        data = archive.read(posixpath.join(directory, "_rels",
+                                           name + ".rels"))
+    except KeyError:
+        return {}
+
+    targets = dict()
+
+    for tag, attributes in elements(data):
+        if tag == "Relationship":
+            target = attributes["Target"]
+
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(
+                    posixpath.join(directory, target))
+
+            targets[attributes["Id"]] = target
+            targets[attributes["Type"].rpartition("/")[2]] = target
+
+    return targets
+
+
+class TextParser:
+    """The text of the <t> elements of shared strings and inline
+    strings, without phonetic runs."""
+
+    __slots__ = ("parts", "depth", "phonetic")
+
+    def __init__(self):
+        self.parts = None
+        self.depth = 0
+        self.phonetic = False
+
+    def start(self, tag):
+        if tag == "t" and not self.phonetic:
+            self.parts = []
+        elif tag == "rPh":
+            self.phonetic = True
+
+    def end(self, tag, collected):
+        if tag == "t" and self.parts is not None:
+            collected.append("".join(self.parts))
+            self.parts = None
+        elif tag == "rPh":
+            self.phonetic = False
+
+    def data(self, text):
+        if self.parts is not None:
+            self.parts.append(text)
+
+
+def read_shared_strings(archive, part):
+    "Return the shared strings of a workbook as a list."
+
+    strings = []
+
+    try:
+        source = archive.open(part)
+    except KeyError:
+        return strings
+
+    text = TextParser()
+    runs = []
+
+    def start(name, attributes):
+        tag = local_name(name)
+
+        if tag == "si":
+            runs.clear()
+        else:
+            text.start(tag)
+
+    def end(name):
+        tag = local_name(name)
+
+        if tag == "si":
+            strings.append("".join(runs))
+        else:
+            text.end(tag, runs)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text.data
+
+    with source:
+        parser.ParseFile(source)
+
+    return strings
+
+
+class SheetParser:
+    "Turn the XML of a worksheet into tuples of cell strings."
+
+    __slots__ = ("strings", "rows", "cells", "row_number", "last_row",
+                 "column", "type", "value", "formula", "field",
+                 "inline", "text")
+
+    def __init__(self, strings):
+        self.strings = strings
+        self.rows = []
+        self.cells = dict()
+        self.row_number = 0
+        self.last_row = 0
+        self.column = 0
+        self.type = None
+        self.value = self.formula = self.field = None
+        self.inline = []
+        self.text = TextParser()
+
+    def start(self, name, attributes):
+        tag = local_name(name)
+
+        if tag == "c":
+            reference = attributes.get("r")
+            self.column = (column_number(reference) if reference
+                           else self.column + 1)
+            self.type = attributes.get("t", "n")
+            self.value = self.formula = None
+            self.inline = []
+        elif tag == "v" or tag == "f":
+            self.field = []
+        elif tag == "row":
+            reference = attributes.get("r")
+            self.row_number = (int(reference) if reference
+                               else self.row_number + 1)
+            self.column = 0
+            self.cells.clear()
+        elif self.type == "inlineStr":
+            self.text.start(tag)
+
+    def end(self, name):
+        tag = local_name(name)
+
+        if tag == "c":
+            value = self.cell_value()
+
+            if value:
+                self.cells[self.column] = value
+
+            self.type = None
+        elif tag == "v":
+            self.value = "".join(self.field)
+            self.field = None
+        elif tag == "f":
+            self.formula = "=" + "".join(self.field)
+            self.field = None
+        elif tag == "row":
+            if self.cells:
+                self.end_row()
+        elif self.type == "inlineStr":
+            self.text.end(tag, self.inline)
+
+    def data(self, text):
+        if self.field is not None:
+            self.field.append(text)
+        elif self.type == "inlineStr":
+            self.text.data(text)
+
+    def cell_value(self):
+        if self.formula is not None:
+            return self.formula
+
+        value = self.value or None
+
+        if self.type == "inlineStr":
+            value = "".join(self.inline) if self.inline else None
+        elif value is None:
+            pass
+        elif self.type == "n":
+            value = number(value)
+        elif self.type == "s":
+            value = self.strings[int(value)]
+        elif self.type == "b":
+            value = bool(int(value))
+
+        return cell_string(value)
+
+    def end_row(self):
+        # Rows without cells are left out of the XML, and are empty
+        # rows of the sheet.
+        #
+        for _ in range(self.last_row + 1, self.row_number):
+            self.rows.append(())
+
+        self.last_row = self.row_number
+
+        cells = [""] * max(self.cells)
+
+        for column, value in self.cells.items():
+            cells[column - 1] = value
+
+        self.rows.append(tuple(cells))
+
+
+class XlsxWorkbook:
+    "An xlsx file whose worksheets are streamed out of the zip file."
+
+    def __init__(self, filename):
+        self.archive = zipfile.ZipFile(filename)
+
+        try:
+            self.sheets = self.find_sheets()
+        except BaseException:
+            self.archive.close()
+            raise
+
+        self.strings = None
+
+    def find_sheets(self):
+        workbook = relationships(self.archive, "").get(
+            "officeDocument", OFFICE_DOCUMENT)
+        targets = relationships(self.archive, workbook)
+        self.strings_part = targets.get(
+            "sharedStrings", posixpath.join(
+                posixpath.dirname(workbook), "sharedStrings.xml"))
+
+        return {attributes["name"]: targets[attributes[key]]
+                for tag, attributes in elements(
+                    self.archive.read(workbook))
+                if tag == "sheet"
+                for key in attributes
+                if local_name(key) == "id"}
+
+    def sheet(self, name):
+        "Return the rows of a worksheet, which can be iterated over again."
+
+        if name not in self.sheets:
+            raise KeyError(f"Worksheet {name} does not exist.")
+
+        return Sheet(self, self.sheets[name])
+
+    def rows(self, part):
+        if self.strings is None:
+            self.strings = read_shared_strings(
+                self.archive, self.strings_part)
+
+        sheet = SheetParser(self.strings)
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = sheet.start
+        parser.EndElementHandler = sheet.end
+        parser.CharacterDataHandler = sheet.data
+        parser.buffer_text = True
+
+        with self.archive.open(part) as source:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                parser.Parse(chunk, not chunk)
+
+                yield from sheet.rows
+                sheet.rows.clear()
+
+                if not chunk:
+                    break
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class OpenpyxlWorkbook:
+    "An xlsx file read with openpyxl in read-only mode."
+
+    def __init__(self, filename):
+        import openpyxl
+
+        self.workbook = openpyxl.load_workbook(filename, read_only=True)
+
+    def sheet(self, name):
+        return Sheet(self, self.workbook[name])
+
+    def rows(self, worksheet):
+        for row in worksheet.iter_rows(values_only=True):
+            yield tuple(cell_string(value) for value in row)
+
+    def close(self):
+        self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class Sheet:
+    "The rows of a worksheet, the header first, as tuples of strings."
+
+    __slots__ = ("workbook", "source")
+
+    def __init__(self, workbook, source):
+        self.workbook = workbook
+        self.source = source
+
+    def __iter__(self):
+        return self.workbook.rows(self.source)
+
+
+def open_workbook(filename):
+    """Open an xlsx file for streaming, or with openpyxl if its
+    structure is not one that XlsxWorkbook can read."""
+
+    try:
+        return XlsxWorkbook(filename)
+    except (zipfile.BadZipFile, KeyError, ValueError, expat.ExpatError):
+        return OpenpyxlWorkbook(filename)
+
+
+def header_index(header):
+    "Return the position of each column name of `header`."
+
+    return {name: i for i, name in enumerate(header)}
+
+
+class Row(Mapping):
+    """A row of a worksheet: a tuple of cell strings, the index of the
+    header and the row number in the sheet."""
+
+    __slots__ = ("index", "cells", "number")
+
+    def __init__(self, index, cells, number):
+        self.index = index
+        self.cells = cells
+        self.number = number
+
+    def __getitem__(self, key):
+        i = self.index[key]
+        return self.cells[i] if i < len(self.cells) else ""
+
+    def get(self, key, default=None):
+        i = self.index.get(key)
+
+        if i is None:
+            return default
+
+        return self.cells[i] if i < len(self.cells) else ""
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        return f"Row({dict(self)!r})"
+
+
+def header_rows(sheet):
+    "Yield the rows of `sheet` after the header as Rows."
+
+    rows = iter(sheet)
+    index = header_index(next(rows, ()))
+
+    for number, cells in enumerate(rows, 2):
+        yield Row(index, cells, number)
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+
+
+class ProjectTestCase(unittest.TestCase):
+    """A test case with a temporary project directory, `self.path`,
+    that holds the files of FILES, a dict of name and code."""
+
+    FILES = {}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+        for filename, code in self.FILES.items():
+            self.write(filename, code)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, filename, code):
+        "Write `code` to `filename` in the project and return its path."
+
+        filename = os.path.join(self.path, filename)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        with open(filename, "w") as f:
+            f.write(code)
+
+        return filename
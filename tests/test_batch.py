@@ -0,0 +1,83 @@
+import os
+
+from honeybee.comb_to_xlsform.batch import (
+    batch_inputs, batch_outputs, compile_batch)
+
+from project import ProjectTestCase
+
+
+MODULE = 'member_${!member}_name text: "Name of member ${!member}"\n'
+
+FORM = (
+    'intro note: "Form {index}"\n'
+    '@include "module.inc" member "1"\n'
+    '@include "module.inc" member "2"\n')
+
+
+class TestBatch(ProjectTestCase):
+    FILES = {
+        "module.inc": MODULE,
+        **{f"form{index}.hcs": FORM.format(index=index)
+           for index in range(3)},
+        "broken.hcs": '@include "missing.inc"\n',
+    }
+
+    def test_inputs(self):
+        names = ["broken.hcs", "form0.hcs", "form1.hcs", "form2.hcs"]
+
+        self.assertEqual(
+            batch_inputs(self.path),
+            [os.path.join(self.path, name) for name in names])
+        self.assertEqual(
+            batch_inputs(os.path.join(self.path, "form*.hcs")),
+            [os.path.join(self.path, name) for name in names[1:]])
+
+    def test_same_output(self):
+        with self.assertRaisesRegex(ValueError, "same file"):
+            batch_outputs(["a/form.hcs", "b/form.hcs"], "out", "xlsx")
+
+    def test_compile(self):
+        out_dir = os.path.join(self.path, "out")
+        os.mkdir(out_dir)
+
+        for jobs in (1, 2):
+            lines = []
+            outputs = batch_outputs(batch_inputs(self.path), out_dir, "xform")
+            results = compile_batch(
+                outputs, "xform", no_cache=True, jobs=jobs,
+                log=lines.append)
+
+            self.assertEqual(len(lines), 4)
+            self.assertEqual(
+                sorted(filename for filename, (_, error) in results.items()
+                       if error is not None),
+                [os.path.join(self.path, "broken.hcs")])
+            self.assertIn("FileNotFoundError",
+                          results[os.path.join(self.path, "broken.hcs")][1])
+            self.assertEqual(
+                sorted(os.listdir(out_dir)),
+                ["form0.xml", "form1.xml", "form2.xml"])
+
+    def test_external(self):
+        out_dir = os.path.join(self.path, "out")
+
+        self.write("choices.hcc", 'list yes_no:\n    1 "Yes"\n    0 "No"\n')
+
+        for index in range(2):
+            self.write(f"form{index}.hcs",
+                       '@choices "choices.hcc"\nq select_one yes_no: "Q"\n')
+
+        outputs = batch_outputs(
+            batch_inputs(os.path.join(self.path, "form[01].hcs")),
+            out_dir, "xlsx", directories=True)
+        results = compile_batch(outputs, "xlsx", no_cache=True,
+                                external_threshold=1, jobs=1,
+                                log=lambda line: None)
+
+        self.assertEqual(
+            [error for _, error in results.values()], [None, None])
+
+        for index in range(2):
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(out_dir, f"form{index}"))),
+                ["choices-yes_no.csv", f"form{index}.xlsx"])
@@ -0,0 +1,85 @@
+import os
+
+from honeybee.comb_to_xlsform.cache import DiskCache
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import compile_survey
+
+from project import ProjectTestCase
+
+
+MAIN = '@include "outer.hcs" name "x"\n'
+OUTER = 'outer_${!name} text: "Outer"\n@include "inner.hcs"\n'
+
+
+class TestCache(ProjectTestCase):
+    FILES = {
+        "outer.hcs": OUTER,
+        "inner.hcs": 'inner text: "Inner"\n',
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.path, "cache")
+
+    def compile(self, parser="pyparsing"):
+        session = Session(parser, DiskCache(self.cache_dir))
+        survey = compile_survey(MAIN, self.path, session)
+        return [row["name"] for row in survey.survey], session.cache
+
+    def test_round_trip(self):
+        cache = DiskCache(self.cache_dir)
+        key = cache.key("parse", "survey", "code")
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, [["a", ["text"], "A"]])
+        self.assertEqual(cache.get(key), [["a", ["text"], "A"]])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_bad_entry(self):
+        cache = DiskCache(self.cache_dir)
+        os.mkdir(self.cache_dir)
+
+        for index, data in enumerate((b"", b"\x80\x05garbage",
+                                      b"cbuiltins\nno_such_name\n.")):
+            key = cache.key(index)
+
+            with open(cache.path(key), "wb") as f:
+                f.write(data)
+
+            self.assertIsNone(cache.get(key))
+            self.assertFalse(os.path.exists(cache.path(key)))
+
+    def test_eviction(self):
+        cache = DiskCache(self.cache_dir, max_size=1000)
+
+        for index in range(10):
+            key = cache.key(index)
+            cache.put(key, "x" * 200)
+            os.utime(cache.path(key), (index, index))
+
+        self.assertLessEqual(cache.size, 1000)
+        self.assertIsNotNone(cache.get(cache.key(9)))
+        self.assertIsNone(cache.get(cache.key(0)))
+
+    def test_hit(self):
+        names, cache = self.compile()
+        self.assertEqual(names, ["outer_x", "inner"])
+        self.assertEqual(cache.hits, 0)
+
+        cached_names, cache = self.compile()
+        self.assertEqual(cached_names, names)
+        self.assertGreater(cache.hits, 0)
+
+    def test_parser_in_key(self):
+        self.compile()
+        names, cache = self.compile(parser="fast")
+
+        self.assertEqual(names, ["outer_x", "inner"])
+        self.assertEqual(cache.hits, 0)
+
+    def test_nested_change(self):
+        self.compile()
+        self.write("inner.hcs", 'changed text: "Changed"\n')
+
+        names, _ = self.compile()
+        self.assertEqual(names, ["outer_x", "changed"])
@@ -0,0 +1,116 @@
+import os
+
+from honeybee.comb_to_xlsform import compile_file, quick_arguments
+from honeybee.comb_to_xlsform.cache import MemoryCache
+from honeybee.comb_to_xlsform.check import (
+    check_form, format_located, locate_rows)
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import compile_survey
+from honeybee.lint_batch import lint_file
+
+from project import ProjectTestCase
+
+
+FILES = {
+    "main.hcs": (
+        '@choices "lists.hcc"\n'
+        '@required yes\n'
+        '\n'
+        '@include "person.hcs" who "mother"\n'
+        '@include "person.hcs" who "father"\n'
+        'group extra "Extra":\n'
+        '    colour select_one yes_no: "Colour?"\n'
+        '    notes text: "Notes about ${MISSING}"\n'),
+    "person.hcs": (
+        '# A person\n'
+        '${!who}_name text: "Name of the ${!who}"\n'
+        'if ${${!who}_name} != "":\n'
+        '    ${!who}_age integer: "Age" required no\n'
+        '@include "more.hcs" who "${!who}"\n'),
+    "more.hcs": '${!who}_job text: "Job of ${${!who}_name}"\n',
+    "lists.hcc": 'list yes_no:\n    1 "Yes"\n    0 "No"\n'}
+
+
+class TestCheck(ProjectTestCase):
+    def write_form(self, missing):
+        "Write FILES with `missing` as the name that main.hcs refers to."
+
+        for name, code in FILES.items():
+            self.write(name, code.replace("MISSING", missing))
+
+        return os.path.join(self.path, "main.hcs")
+
+    def test_origins(self):
+        filename = self.write_form("missing")
+
+        with open(filename) as f:
+            code = f.read()
+
+        locator = locate_rows(code, filename, self.path, Session())
+        main = os.path.normpath(filename)
+        person = os.path.join(self.path, "person.hcs")
+        more = os.path.join(self.path, "more.hcs")
+
+        self.assertEqual(
+            locator.survey[:4],
+            [((main, 4), (person, 2)),
+             ((main, 4), (person, 4)),
+             ((main, 4), (person, 5), (more, 1)),
+             ((main, 5), (person, 2))])
+        self.assertEqual(
+            locator.survey[-4:],
+            [((main, 6),), ((main, 7),), ((main, 8),), ((main, 6),)])
+        self.assertEqual(
+            locator.choices,
+            [((main, 1), (os.path.join(self.path, "lists.hcc"), 1))] * 2)
+
+    def test_check_form(self):
+        filename = self.write_form("missing")
+        session = Session(cache=MemoryCache())
+
+        with open(filename) as f:
+            code = f.read()
+
+        # The second compile reuses the expanded includes.
+        #
+        for _ in range(2):
+            survey = compile_survey(code, self.path, session)
+
+        lines = [format_located(located).replace(self.path + os.sep, "")
+                 for located in check_form(survey, code, filename, session)]
+
+        self.assertEqual(
+            lines,
+            ["person.hcs:4: Warning: mother_age is not required."
+             " (survey row 3; included from main.hcs:4)",
+             "person.hcs:4: Warning: father_age is not required."
+             " (survey row 6; included from main.hcs:5)",
+             "main.hcs:8: Error: notes has undefined references: missing."
+             " (survey row 10)"])
+
+    def test_compile_file(self):
+        output = os.path.join(self.path, "main.xlsx")
+
+        diagnostics = compile_file(self.write_form("missing"), output, "xlsx",
+                                   Session(), lint=True)
+
+        self.assertEqual(len(diagnostics), 3)
+        self.assertFalse(os.path.exists(output))
+
+        diagnostics = compile_file(self.write_form("colour"), output, "xlsx",
+                                   Session(), lint=True)
+
+        self.assertEqual(
+            [located.diagnostic for located in diagnostics],
+            lint_file(output)[1])
+        self.assertEqual(
+            {located.diagnostic.severity for located in diagnostics},
+            {"warning"})
+
+    def test_quick_arguments(self):
+        self.assertTrue(
+            quick_arguments(["form.hcs", "-o", "form.xlsx", "--lint"])
+            ["lint"])
+        self.assertIsNone(
+            quick_arguments(["form.hcs", "-o", "form.xlsx", "--lint",
+                             "-s"]))
@@ -0,0 +1,65 @@
+import unittest
+
+from honeybee.comb_to_xlsform.common import (
+    merge_params, merge_relevance, if_cond_to_relevance, Scope)
+
+
+class TestScope(unittest.TestCase):
+    def test_merge(self):
+        outer = {"required": "yes", "relevance": "${a} = 1"}
+        inner = {"relevance": "${b} = 2", "appearance": "minimal"}
+
+        scope = Scope(dict(outer)).merge(inner)
+
+        self.assertEqual(dict(scope), merge_params(outer, inner))
+        self.assertEqual(
+            list(scope), list(merge_params(outer, inner)))
+        self.assertEqual(
+            str(scope["relevance"]), "(${a} = 1) and (${b} = 2)")
+
+    def test_unchanged_parent(self):
+        parent = Scope({"required": "yes"})
+        child = parent.set("required", "no").merge({"relevance": "x"})
+
+        self.assertEqual(dict(parent), {"required": "yes"})
+        self.assertEqual(
+            dict(child), {"required": "no", "relevance": "x"})
+
+    def test_without(self):
+        scope = Scope({"required": "yes"}).merge(
+            {"relevance": "x", "appearance": "minimal"})
+
+        self.assertEqual(
+            dict(scope.without("relevance", "appearance")),
+            {"required": "yes"})
+
+    def test_merge_params_scope(self):
+        scope = Scope({"relevance": "a"})
+        params = merge_params(scope, {"relevance": "b"})
+
+        self.assertEqual(str(params["relevance"]), "(a) and (b)")
+        self.assertEqual(dict(scope), {"relevance": "a"})
+
+
+class TestRelevance(unittest.TestCase):
+    def test_condition(self):
+        self.assertEqual(
+            str(if_cond_to_relevance([["${", "a", "}"], ">=", "18"])),
+            "${a} >= 18")
+        self.assertEqual(
+            str(if_cond_to_relevance("selected(${b}, 'x')")),
+            "selected(${b}, 'x')")
+
+    def test_flat(self):
+        relevance = "a"
+
+        for term in ("b", "c or d", "a", "b"):
+            relevance = merge_relevance(relevance, term)
+
+        self.assertEqual(str(relevance), "(a) and (b) and (c or d)")
+
+    def test_duplicate(self):
+        condition = if_cond_to_relevance([".", "=", "1"])
+
+        self.assertEqual(
+            str(merge_relevance(condition, condition)), ". = 1")
@@ -0,0 +1,112 @@
+import os
+
+from honeybee.comb_to_xlsform.cache import DiskCache
+from honeybee.comb_to_xlsform.choices import unique_choices
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import compile_survey
+
+from project import ProjectTestCase
+
+
+class TestExpand(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = os.path.join(self.path, "cache")
+
+    def test_deep_includes(self):
+        depth = 2000
+
+        for index in range(depth):
+            self.write(
+                f"f{index}.hcs",
+                f'q{index} text: "Q"\n'
+                f'@include "f{index + 1}.hcs"\n'
+                if index + 1 < depth else f'q{index} text: "Q"\n')
+
+        survey = compile_survey('@include "f0.hcs"\n', self.path)
+
+        self.assertEqual(len(survey.survey), depth)
+
+    def test_include_cycle(self):
+        self.write("a.hcs", '@include "b.hcs"\n')
+        self.write("b.hcs", 'b text: "B"\n@include "a.hcs"\n')
+
+        with self.assertRaisesRegex(
+                ValueError, r"^Include cycle: .*a\.hcs -> .*b\.hcs"
+                            r" -> .*a\.hcs\.$"):
+            compile_survey('@include "a.hcs"\n', self.path)
+
+    def test_choices_cycle(self):
+        self.write("a.hcc", 'list a:\n    @include "b.hcc"\n')
+        self.write("b.hcc", '1 "one"\n@include "a.hcc"\n')
+
+        with self.assertRaisesRegex(ValueError, r"^Include cycle: "):
+            compile_survey('@choices "a.hcc"\n', self.path)
+
+    def test_macros_in_chain(self):
+        self.write("a.hcs", 'a_${!n} text: "A"\n')
+        self.write("b.hcs", '@include "a.hcs" n "1"\n'
+                            '@include "a.hcs" n "2"\n')
+
+        survey = compile_survey(
+            '@include "b.hcs"\n@include "b.hcs"\n', self.path)
+
+        self.assertEqual(
+            [row["name"] for row in survey.survey],
+            ["a_1", "a_2", "a_1", "a_2"])
+
+    def test_nested_choices_dropped(self):
+        self.write("c.hcc", 'list c:\n    1 "one" extra "e"\n')
+
+        survey = compile_survey(
+            'if ${a} = 1:\n    @choices "c.hcc"\n'
+            '    b text: "B"\n', self.path)
+
+        self.assertEqual(len(survey.survey), 1)
+        self.assertEqual(len(survey.choices), 0)
+        self.assertEqual(list(survey.choices.columns), [])
+
+    def test_duplicate_choices(self):
+        self.write("c.hcc", 'list c:\n    1 "one"\n    2 "two"\n')
+        self.write("m.hcs", '@choices "c.hcc"\nq_${!n} select_one c:\n')
+
+        code = ('@choices "c.hcc"\n'
+                + "".join(f'@include "m.hcs" n "{index}"\n'
+                          for index in range(3)))
+
+        for session in (None, Session(cache=DiskCache(self.cache)),
+                        Session(cache=DiskCache(self.cache))):
+            survey = compile_survey(code, self.path, session)
+
+            self.assertEqual(len(survey.survey), 3)
+            self.assertEqual(
+                [row["value"] for row in survey.choices], ["1", "2"])
+
+    def test_conflicting_choices(self):
+        self.write("c.hcc", 'list c:\n    1 "one"\n')
+        self.write("d.hcc", 'list c:\n    1 "uno"\n')
+
+        with self.assertRaisesRegex(
+                ValueError, r"^Conflicting definitions of choice list: c\.$"):
+            compile_survey('@choices "c.hcc"\n@choices "d.hcc"\n', self.path)
+
+    def test_choices_without_list(self):
+        rows = [{"value": "1"}, {"list_name": "a", "value": "1"}]
+        definitions = dict()
+
+        self.assertEqual(list(unique_choices(rows, definitions)), rows)
+        self.assertEqual(
+            list(unique_choices(rows, definitions)), rows[:1])
+        self.assertEqual(list(definitions), ["a"])
+
+    def test_split_choices(self):
+        self.write("c.hcc", 'list a:\n    1 "one"\n'
+                            'list b:\n    1 "one"\n'
+                            'list a:\n    2 "two"\n')
+
+        survey = compile_survey('@choices "c.hcc"\n@choices "c.hcc"\n',
+                                self.path)
+
+        self.assertEqual(
+            [(row["list_name"], row["value"]) for row in survey.choices],
+            [("a", "1"), ("b", "1"), ("a", "2")])
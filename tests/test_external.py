@@ -0,0 +1,145 @@
+import csv
+import os
+
+import openpyxl
+
+from honeybee.comb_to_xlsform import comb_to_xlsx
+from honeybee.comb_to_xlsform.external import (
+    ChoiceLists, external_type, split_external_choices)
+from honeybee.comb_to_xlsform.model import Survey, Table
+
+from project import ProjectTestCase
+
+
+SURVEY = (
+    '@choices "lists.hcc"\n'
+    'village select_one village: "Village"\n'
+    'crops select_multiple crop: "Crops"\n'
+    'ok select_one yes_no: "OK?"\n')
+
+CHOICES = (
+    'list yes_no:\n'
+    '    1 "Yes"\n'
+    '    0 "No"\n'
+    'list crop:\n'
+    '    1 "Maize"\n'
+    '    2 "Rice"\n'
+    '    3 "Beans"\n'
+    'list village:\n'
+    + "".join(f'    {index} "Village {index}"\n' for index in range(10)))
+
+
+class TestExternal(ProjectTestCase):
+    FILES = {"lists.hcc": CHOICES}
+
+    def compile(self, stream, threshold):
+        filename = os.path.join(self.path, "form.xlsx")
+        comb_to_xlsx(SURVEY, self.path, filename, None, stream, threshold)
+
+        workbook = openpyxl.load_workbook(filename)
+
+        return {title: [list(row) for row in workbook[title].values]
+                for title in ("survey", "choices")}
+
+    def read_csv(self, list_name):
+        filename = os.path.join(self.path, f"choices-{list_name}.csv")
+
+        with open(filename, newline="") as f:
+            return list(csv.reader(f))
+
+    def test_threshold(self):
+        sheets = self.compile(False, 2)
+
+        self.assertEqual(
+            [row[0] for row in sheets["survey"][1:]],
+            ["select_one_from_file choices-village.csv",
+             "select_multiple_from_file choices-crop.csv",
+             "select_one yes_no"])
+        self.assertEqual(
+            sheets["choices"],
+            [["list_name", "value", "label"],
+             ["yes_no", "1", "Yes"],
+             ["yes_no", "0", "No"]])
+
+        self.assertEqual(self.read_csv("crop")[0], ["name", "label"])
+        self.assertEqual(
+            self.read_csv("village")[:2],
+            [["name", "label"], ["0", "Village 0"]])
+        self.assertEqual(len(self.read_csv("village")), 11)
+
+    def test_extra_columns(self):
+        survey = Survey(
+            survey=Table([{"type": "select_one v", "name": "v"}]),
+            choices=Table([{"list_name": "v", "value": str(index),
+                            "label": "V", "district": "d"}
+                           for index in range(3)]),
+            settings=None)
+
+        survey = split_external_choices(survey, 2, self.path)
+
+        self.assertEqual(len(survey.choices), 0)
+        self.assertEqual(
+            self.read_csv("v"),
+            [["name", "label", "district"]]
+            + [[str(index), "V", "d"] for index in range(3)])
+
+    def test_stream(self):
+        for threshold in (2, 5, 100):
+            self.assertEqual(
+                self.compile(True, threshold),
+                self.compile(False, threshold))
+
+    def test_column_order(self):
+        rows = [{"list_name": "a", "value": "1", "x": "1"},
+                {"list_name": "b", "value": "1", "y": "1"},
+                {"list_name": "a", "value": "2", "z": "1"}]
+        lists = ChoiceLists(rows)
+
+        self.assertEqual(
+            lists.column_names(), list(Table(rows).columns))
+        self.assertEqual(
+            lists.column_names(exclude={"b"}),
+            ["list_name", "value", "x", "z"])
+        self.assertEqual(lists.external(1), {"a"})
+
+    def test_type(self):
+        self.assertEqual(
+            external_type("select_one  a", {"a"}),
+            "select_one_from_file choices-a.csv")
+        self.assertEqual(external_type("text", {"a"}), "text")
+        self.assertEqual(external_type("select_one b", {"a"}),
+                         "select_one b")
+        self.assertEqual(
+            external_type("select_multiple a or_other", {"a"}),
+            "select_multiple a or_other")
+        self.assertEqual(external_type("select_one a b", {"a"}),
+                         "select_one a b")
+
+    def test_or_other(self):
+        survey = Survey(
+            survey=Table([{"type": "select_one v or_other", "name": "v"},
+                          {"type": "select_one w", "name": "w"}]),
+            choices=Table([{"list_name": name, "value": str(index)}
+                           for name in "vw" for index in range(3)]),
+            settings=None)
+
+        survey = split_external_choices(survey, 2, self.path)
+
+        self.assertEqual(
+            [row["type"] for row in survey.survey],
+            ["select_one v or_other",
+             "select_one_from_file choices-w.csv"])
+        self.assertEqual(
+            [row["list_name"] for row in survey.choices], ["v"] * 3)
+
+    def test_without_list(self):
+        choices = [{"value": str(index)} for index in range(3)]
+        survey = Survey(
+            survey=Table([{"type": "text", "name": "a"}]),
+            choices=Table(choices),
+            settings=None)
+
+        self.assertEqual(ChoiceLists(choices).external(2), set())
+        self.assertEqual(
+            list(split_external_choices(survey, 2, self.path).choices),
+            choices)
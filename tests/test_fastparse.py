@@ -0,0 +1,153 @@
+import os
+import unittest
+
+import pyparsing as pp
+
+from honeybee.comb_to_xlsform.common import substitute_macros
+from honeybee.comb_to_xlsform.fastparse import (
+    ParseError, parse_survey_tree, parse_choices_tree)
+from honeybee.comb_to_xlsform.preprocess import preprocess_indent
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import parse_survey, compile_survey
+from honeybee.comb_to_xlsform.choices import parse_choices
+
+
+EXAMPLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, "example")
+
+SURVEY_CASES = (
+    'a text: "A"\n',
+    'a text:\n    "A  b\t c"\n    required yes\n',
+    'a text:\n    "long label\n    continued"\n',
+    'a text:\n"Label on next line"\n',
+    'a text: "A" # trailing\n',
+    'if ${a} = 1: b text: "B"\nc text: "C"\n',
+    "a text: 'single \\'quoted\\''\n",
+    'a text: "esc \\t \\n \\0 \\q"\n',
+    'group g "G" appearance "field-list" if ${a} != 2:\n    b text: "B"\n',
+    'group g if "x":\n    b text: "B"\n',
+    'repeat r "R" repeat_count "${n}":\n    b text: "B"\n',
+    'if . >= 3:\n    b text: "B"\n',
+    'if "selected(${a}, \'1\')":\n    b text: "B"\n',
+    '@form x auto "Title"\n@required yes\n',
+    '@form x\n    1\n    "Title"\n',
+    'if text: "question named if"\n',
+    'group text: "question named group"\n',
+    'a select_one yes_no or_other:\n    "A"\n',
+    '\n\n# only comment\n',
+    'a text: "A"\r\nb text: "B"\r\n',
+    'a text:\r\n    "A"\r\n',
+    'a\ttext:\n    "A  b"\n',
+    '@form x 1\r\n    "T"\r\n',
+    'if ${a} = 1:\n\n    b text: "B"\n\n    c text: "C"\n\nd text: "D"\n',
+    'if ${a} = 1:\n    if ${b} = 2:\n        c text: "C"\n    d text: "D"\n',
+    'if ${a} = 1:\n    if ${b} = 2:\n        c text: "C"\ne text: "E"\n',
+    'a text: required\n  yes\n',
+    'a integer: "A" constraint ". > 0" required yes\n',
+    'a calculate: calculation "x"\n',
+    '  a text: "indented top"\nb text: "B"\n',
+    'if ${a} = 1:\n\tb text: "B"\n',
+    'a text:    \n    "A"\n',
+    'a text:\n\t"A\tb"\n    hint "c"\n',
+    'a text: "x\ty"\n',
+    'a text: "\tx\ty" hint "abcdefgh\tz"\n',
+)
+
+SURVEY_ERRORS = (
+    'a text: :\n    "A"\n',
+    'a text:\n    "A"\n    # comment\n    required yes\n',
+    '',
+    'a text "A"\n',
+    'if ${a} = 1:\n    b text: "B"\n  c text: "C"\n',
+    'if ${a} = 1:\nb text: "B"\n',
+    'if ${a} = 1:\n    b text: "B"\n      c text: "C"\n',
+    'a text: "unterminated\n',
+    '@form\n',
+    'a text: "A"\n$ x\n',
+    'if ${a} = 1:\n    b text: "B"\n    ,\n',
+    'if ${a} == 1:\n    b text: "B"\n',
+    'a text: "A" b text: "B"\n',
+)
+
+CHOICES_CASES = (
+    'list a:\n    1 "one"\n    2 "two" filter x\n',
+    'list a filter "y":\n    1 "one"\n\nlist b:\n    "x" "X"\n',
+    '1 "top"\n',
+    '# c\nlist a:\n    # inner\n    1 "one"\n',
+    '@include "x.hcc" a "b"\n',
+    'list a:\n\t1 "x\ty"\n\t2 "two"\n',
+)
+
+CHOICES_ERRORS = (
+    'list a:\n    1 "x\ty"\n\t2 "two"\n',
+    'list a: 1 "one"\n    2 "two"\n',
+    'list a:\n    1 "one"\n  2 "two"\n',
+    "list a:\n    1 'one'\n",
+    'list a:\n1 "x"\n',
+    '',
+)
+
+
+def read_example(filename):
+    with open(os.path.join(EXAMPLE_PATH, filename)) as f:
+        return substitute_macros(f.read(), {"grandparent": "gm"})
+
+
+class TestFastParse(unittest.TestCase):
+    def assert_same_survey(self, code):
+        self.assertListEqual(
+            parse_survey_tree(code),
+            parse_survey().parseString(
+                preprocess_indent(code), parseAll=True).asList(),
+            code)
+
+    def assert_same_choices(self, code):
+        self.assertListEqual(
+            parse_choices_tree(code),
+            parse_choices().parseString(code, parseAll=True).asList(),
+            code)
+
+    def test_examples(self):
+        for filename in ("survey.hcs", "demog.hcs",
+                         "grandparent.hcs", "shoes.hcs"):
+            self.assert_same_survey(read_example(filename))
+
+        self.assert_same_choices(read_example("survey.hcc"))
+
+    def test_survey(self):
+        for code in SURVEY_CASES:
+            self.assert_same_survey(code)
+
+    def test_survey_errors(self):
+        for code in SURVEY_ERRORS:
+            with self.assertRaises(pp.ParseException, msg=code):
+                parse_survey().parseString(
+                    preprocess_indent(code), parseAll=True)
+            with self.assertRaises(ParseError, msg=code):
+                parse_survey_tree(code)
+
+    def test_choices(self):
+        for code in CHOICES_CASES:
+            self.assert_same_choices(code)
+
+    def test_choices_errors(self):
+        for code in CHOICES_ERRORS:
+            with self.assertRaises(pp.ParseException, msg=code):
+                parse_choices().parseString(code, parseAll=True)
+            with self.assertRaises(ParseError, msg=code):
+                parse_choices_tree(code)
+
+    def test_error_line(self):
+        with self.assertRaises(ParseError) as context:
+            parse_survey_tree('a text:\n    "A"\n\nb text "B"\n')
+
+        self.assertEqual(context.exception.line, 4)
+
+    def test_compile(self):
+        code = read_example("survey.hcs")
+
+        self.assertEqual(
+            compile_survey(
+                code, EXAMPLE_PATH, Session(parser="fast"))[:2],
+            compile_survey(code, EXAMPLE_PATH)[:2])
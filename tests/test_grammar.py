@@ -0,0 +1,63 @@
+import unittest
+
+import pyparsing as pp
+
+from honeybee.comb_to_xlsform.grammar import enable_packrat
+from honeybee.comb_to_xlsform.survey import parse_survey
+from honeybee.comb_to_xlsform.choices import parse_choices
+
+
+NESTED = """\
+a integer: "A"
+if ${a} > 1:
+    group g "G":
+        b text: "B"
+        if ${b} = "x":
+            c text: "C"
+        d text: "D"
+    e text: "E"
+# Comment
+f text: "F"
+"""
+
+
+class TestGrammar(unittest.TestCase):
+    def tearDown(self):
+        pp.ParserElement.disable_memoization()
+
+    def parse(self, code):
+        return parse_survey().parseString(code, parseAll=True).asList()
+
+    def test_grammars_are_cached(self):
+        self.assertIs(parse_survey(), parse_survey())
+        self.assertIs(parse_choices(), parse_choices())
+
+    def test_nested_blocks(self):
+        self.assertListEqual(
+            self.parse(NESTED),
+            [["a", ["integer"], "A"],
+             ["if", [["${", "a", "}"], ">", "1"],
+              [["group", ["g", "G"], [],
+                [["b", ["text"], "B"],
+                 ["if", [["${", "b", "}"], "=", "x"],
+                  [["c", ["text"], "C"]]],
+                 ["d", ["text"], "D"]]],
+               ["e", ["text"], "E"]]],
+             ["#", " Comment"],
+             ["f", ["text"], "F"]])
+
+    def test_packrat_does_not_change_tree(self):
+        tree = self.parse(NESTED)
+
+        enable_packrat()
+
+        self.assertListEqual(self.parse(NESTED), tree)
+        self.assertListEqual(self.parse(NESTED), tree)
+
+    def test_bad_unindent(self):
+        with self.assertRaises(pp.ParseException):
+            self.parse('if ${a} = 1:\n    b text: "B"\n  c text: "C"\n')
+
+    def test_body_must_be_indented(self):
+        with self.assertRaises(pp.ParseException):
+            self.parse('if ${a} = 1:\nb text: "B"\n')
@@ -1,6 +1,6 @@
 import unittest
 
-import surveykit.lint as lint
+import honeybee.lint as lint
 
 
 class TestLint(unittest.TestCase):
@@ -36,3 +36,71 @@ class TestLint(unittest.TestCase):
         self.assertTupleEqual(
             lint.extract_variables("foo ${bar}${baz}"),
             ("bar", "baz"))
+
+
+class Workbook:
+    def __init__(self, **sheets):
+        self.sheets = sheets
+
+    def sheet(self, name):
+        return self.sheets[name]
+
+
+CHOICES = [("list_name", "name", "label"),
+           ("yes_no", "1", "Yes"),
+           ("yes_no", "0", "No"),
+           ("colors", "red", "Red"),
+           (),
+           ("yes_no", "9", "Maybe"),
+           ("colors", "blue", "Blue")]
+
+
+class TestRules(unittest.TestCase):
+    def diagnostics(self, survey, choices=CHOICES[:4]):
+        return [(diagnostic.severity, diagnostic.rule, diagnostic.sheet,
+                 diagnostic.row)
+                for diagnostic in lint.lint_workbook(
+                    Workbook(survey=survey, choices=choices))]
+
+    def test_duplicate_choice_lists(self):
+        diagnostics = lint.lint_workbook(
+            Workbook(survey=[("type", "name", "label")], choices=CHOICES))
+
+        self.assertEqual(
+            [lint.format_diagnostic(diagnostic)
+             for diagnostic in diagnostics],
+            ["choices:6: Warning: Choice list yes_no is defined in"
+             " multiple places: rows 2-3, 6.",
+             "choices:7: Warning: Choice list colors is defined in"
+             " multiple places: rows 4, 7."])
+
+    def test_survey(self):
+        survey = [
+            ("type", "name", "label", "required", "calculation", "notes"),
+            ("integer", "age", "Age of ${name}", "yes", "", "${x}"),
+            ("select_one yes_no", "ok", "OK?", "yes"),
+            ("select_one sizes", "size", "Size", "yes"),
+            ("text", "age", "Again", ""),
+            ("calculate", "twice", "", "", " "),
+            ("begin group", "g", "${age} ${twice}"),
+            ("note", "n", "Notes are not checked.", "", "", "${x}")]
+
+        self.assertEqual(
+            self.diagnostics(survey),
+            [("error", "undefined-references", "survey", 2),
+             ("error", "undefined-choice-lists", "survey", 4),
+             ("warning", "duplicate-name", "survey", 5),
+             ("warning", "not-required", "survey", 5),
+             ("error", "empty-calculation", "survey", 6)])
+
+    def test_missing_columns(self):
+        self.assertEqual(
+            self.diagnostics([("type", "label"),
+                              ("calculate", "x")]),
+            [("error", "missing-columns", "survey", 1)])
+
+    def test_optional_columns(self):
+        self.assertEqual(
+            self.diagnostics([("type", "name", "label"),
+                              ("calculate", "x", "")]),
+            [])
@@ -0,0 +1,111 @@
+import io
+import json
+import os
+
+import openpyxl
+
+from honeybee.lint_batch import (
+    REPORTERS, exit_status, lint_files, lint_inputs)
+
+from project import ProjectTestCase
+
+
+def write_workbook(filename, survey):
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "survey"
+
+    for row in survey:
+        workbook["survey"].append(row)
+
+    workbook.create_sheet("choices").append(["list_name", "name", "label"])
+    workbook.save(filename)
+
+
+class TestLintBatch(ProjectTestCase):
+    FILES = {
+        "forms/broken.xlsx": "not a workbook",
+        "forms/~$lock.xlsx": "",
+    }
+
+    def setUp(self):
+        super().setUp()
+
+        self.clean = os.path.join(self.path, "clean.xlsx")
+        write_workbook(self.clean, [("type", "name", "label", "required"),
+                                    ("integer", "age", "Age", "yes")])
+
+        self.warning = os.path.join(self.path, "forms", "warning.xlsx")
+        write_workbook(self.warning, [("type", "name", "label"),
+                                      ("integer", "age", "Age")])
+
+        self.broken = os.path.join(self.path, "forms", "broken.xlsx")
+
+    def test_inputs(self):
+        self.assertEqual(
+            lint_inputs([self.path]),
+            [self.clean, self.broken, self.warning])
+        self.assertEqual(
+            lint_inputs([os.path.join(self.path, "forms", "w*.xlsx"),
+                         self.warning]),
+            [self.warning])
+
+        with self.assertRaisesRegex(ValueError, "No files match"):
+            lint_inputs([os.path.join(self.path, "missing.xlsx")])
+
+    def test_lint_files(self):
+        for jobs in (1, 2):
+            results = lint_files([self.clean, self.warning], jobs)
+
+            self.assertEqual(list(results), [self.clean, self.warning])
+            self.assertEqual(results[self.clean][1], [])
+            self.assertEqual(
+                [diagnostic.rule for diagnostic in results[self.warning][1]],
+                ["not-required"])
+            self.assertEqual(exit_status(results), 1)
+
+        results = lint_files([self.clean, self.broken])
+
+        self.assertEqual(results[self.broken][1][0].rule,
+                         "unreadable-file")
+        self.assertEqual(exit_status(results), 2)
+        self.assertEqual(exit_status(lint_files([self.clean])), 0)
+
+    def test_reports(self):
+        results = lint_files([self.warning, self.broken], 1)
+        reports = dict()
+
+        for format, report in REPORTERS.items():
+            f = io.StringIO()
+            report(results, f)
+            reports[format] = f.getvalue()
+
+        self.assertEqual(
+            reports["text"].splitlines(),
+            [f"{self.warning}:survey:2: Warning: age is not required.",
+             f"{self.broken}: Error: BadZipFile: File is not a zip file"])
+
+        files = json.loads(reports["json"])["files"]
+
+        self.assertEqual(files[0]["filename"], self.warning)
+        self.assertEqual(
+            files[0]["diagnostics"],
+            [{"severity": "warning", "rule": "not-required",
+              "sheet": "survey", "row": 2,
+              "message": "age is not required."}])
+
+        run = json.loads(reports["sarif"])["runs"][0]
+        result = run["results"][0]
+
+        self.assertEqual(len(run["artifacts"]), 2)
+        self.assertIn("seconds", run["artifacts"][0]["properties"])
+        self.assertIn("not-required",
+                      [rule["id"] for rule in run["tool"]["driver"]["rules"]])
+        self.assertEqual(
+            (result["ruleId"], result["level"]),
+            ("not-required", "warning"))
+        self.assertEqual(
+            result["locations"][0]["physicalLocation"]["region"],
+            {"startLine": 2})
+        self.assertEqual(
+            result["locations"][0]["logicalLocations"][0]["name"],
+            "survey")
@@ -0,0 +1,43 @@
+import pickle
+import unittest
+
+from honeybee.comb_to_xlsform.model import Table
+from honeybee.comb_to_xlsform.xlsx import get_column_names
+
+
+class TestModel(unittest.TestCase):
+    def test_row(self):
+        table = Table([{"type": "text", "name": "a", "label": "A"}])
+        row = table[0]
+
+        self.assertEqual(row["name"], "a")
+        self.assertEqual(row.get("hint"), None)
+        self.assertIn("label", row)
+        self.assertEqual(
+            dict(row), {"type": "text", "name": "a", "label": "A"})
+
+    def test_shared_layout(self):
+        table = Table([{"type": " ".join(["select_one", "yes_no"]),
+                        "name": name}
+                       for name in ("a", "b")])
+
+        self.assertIs(table[0].layout, table[1].layout)
+        self.assertIs(table[0]["type"], table[1]["type"])
+
+    def test_columns(self):
+        table = Table([{"type": "text", "name": "a"},
+                       {"type": "note", "name": "b", "hint": "B"}])
+        table.extend(Table([{"name": "c", "relevance": "x"}]))
+
+        self.assertEqual(
+            get_column_names(table),
+            ["type", "name", "hint", "relevance"])
+        self.assertEqual(len(table), 3)
+
+    def test_pickle(self):
+        table = Table([{"type": "text", "name": name}
+                       for name in ("a", "b")])
+        loaded = pickle.loads(pickle.dumps(table))
+
+        self.assertEqual(loaded, table)
+        self.assertIs(loaded[0].layout, table[0].layout)
@@ -0,0 +1,81 @@
+import unittest.mock
+
+from honeybee.comb_to_xlsform import prefetch
+from honeybee.comb_to_xlsform.choices import parse_choices_code
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import (
+    compile_survey, parse_survey_code)
+
+from project import ProjectTestCase
+
+
+FILES = {
+    "main.hcs": (
+        '@choices "choices.hcc"\n'
+        'intro note: "Hello"\n'
+        '@include "part1.hcs"\n'
+        'if ${intro} = 1:\n'
+        '    @include "part2.hcs"\n'
+        '@include "sub/member.hcs" member "1"\n'
+        '@include "sub/member.hcs" member "2"\n'),
+    "part1.hcs": (
+        'likes select_one yes_no: "Do you like honey?"\n'
+        '@include "sub/member.hcs" member "3"\n'),
+    "part2.hcs": 'age integer: "Age"\n',
+    "choices.hcc": (
+        'list yes_no:\n'
+        '    1 "Yes"\n'
+        '    0 "No"\n'),
+    "sub/member.hcs": (
+        'member_${!member}_name text: "Name of member ${!member}"\n'
+        '@include "more.hcs" member "${!member}"\n'),
+    "sub/more.hcs": 'more_${!member} text: "More"\n',
+}
+
+
+class TestPrefetch(ProjectTestCase):
+    FILES = FILES
+
+    def compile(self, jobs, code=FILES["main.hcs"]):
+        session = Session(jobs=jobs)
+
+        with unittest.mock.patch.dict(
+                prefetch.PARALLEL_MIN_SIZE, {"pyparsing": 0}):
+            return compile_survey(code, self.path, session), session
+
+    def test_same_output(self):
+        expected, _ = self.compile(1)
+        survey, _ = self.compile(2)
+
+        self.assertEqual(survey, expected)
+
+    def test_prefetch(self):
+        session = Session(jobs=2)
+
+        with unittest.mock.patch.dict(
+                prefetch.PARALLEL_MIN_SIZE, {"pyparsing": 0}):
+            prefetch.prefetch(
+                parse_survey_code(FILES["main.hcs"]), self.path, session,
+                {"survey": parse_survey_code,
+                 "choices": parse_choices_code})
+
+        # Included files with macros are parsed as templates.
+        #
+        self.assertEqual(
+            sorted((kind, code[:10]) for kind, code in session.trees),
+            [("choices", "list yes_n"),
+             ("survey", "age intege"),
+             ("survey", "likes sele"),
+             ("survey", "member_Hon"),
+             ("survey", "more_Honey")])
+
+    def test_errors(self):
+        code = '@include "part2.hcs"\n@include "missing.hcs"\n'
+
+        with self.assertRaises(FileNotFoundError):
+            self.compile(2, code)
+
+        self.write("part2.hcs", "age integer\n")
+
+        with self.assertRaisesRegex(ValueError, "Error when parsing"):
+            self.compile(2, code)
@@ -0,0 +1,56 @@
+import glob
+import itertools
+import os
+import unittest
+
+from honeybee.comb_to_xlsform.preprocess import (
+    preprocess_indent, preprocess_indent_regex, preprocess_lines)
+
+
+EXAMPLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, "example")
+
+LINES = (
+    "", "    ", "\t", "a text:", "a text: ", "a\ttext:", "a:", ":",
+    "if x:", "iffy x:", "group g:", "@form x", "@form x  ",
+    '    "Label"', "    hint  \"A  b\"", "\t\"Tab\"", "        word",
+    "    # comment", "    :", "a text:\r", "  b text:", '      "B"')
+
+
+class TestPreprocess(unittest.TestCase):
+    def test_examples(self):
+        for filename in glob.glob(os.path.join(EXAMPLE_PATH, "*.hc?")):
+            with open(filename) as f:
+                code = f.read()
+
+            self.assertEqual(
+                preprocess_indent(code),
+                preprocess_indent_regex(code),
+                msg=filename)
+
+    def test_same_as_regex(self):
+        for lines in itertools.product(LINES, repeat=3):
+            code = "\n".join(lines)
+
+            self.assertEqual(
+                preprocess_indent(code),
+                preprocess_indent_regex(code),
+                msg=repr(code))
+
+    def test_line_numbers(self):
+        code = ('a text:\n    "A"\n    hint "H"\n\n'
+                '@form x\n    1 "F"\nb text: "B"\n')
+
+        self.assertEqual(
+            preprocess_lines(code),
+            [(1, 'a text: "A" hint "H"'),
+             (4, ""),
+             (5, '@form x 1 "F"'),
+             (7, 'b text: "B"'),
+             (8, "")])
+
+    def test_long_lines(self):
+        code = f'{"n" * 3000} text "{"y" * 30000}"\n' * 10
+
+        self.assertEqual(preprocess_indent(code), code)
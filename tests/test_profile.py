@@ -0,0 +1,87 @@
+import json
+import os
+import unittest.mock
+
+from honeybee.comb_to_xlsform import prefetch, profile
+from honeybee.comb_to_xlsform.cache import MemoryCache
+from honeybee.comb_to_xlsform.profile import Profile, profiling
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import compile_survey
+
+from project import ProjectTestCase
+
+
+FORM = (
+    '@choices "choices.hcc"\n'
+    'likes select_one yes_no: "Do you like honey?"\n'
+    '@include "member.hcs" member "1"\n'
+    '@include "member.hcs" member "2"\n')
+
+FILES = {
+    "choices.hcc": 'list yes_no:\n    1 "Yes"\n    0 "No"\n',
+    "member.hcs": (
+        'member_${!member}_name text: "Name"\n'
+        'member_${!member}_age integer: "Age"\n'),
+}
+
+
+class TestProfile(ProjectTestCase):
+    FILES = FILES
+
+    def test_profile(self):
+        events = []
+        session = Session(cache=MemoryCache())
+
+        with profiling(Profile(hooks=[events.append])) as stats:
+            compile_survey(FORM, self.path, session)
+            compile_survey(FORM, self.path, session)
+
+        self.assertIsNone(profile.active)
+        self.assertTrue(
+            {"read", "parse", "macros", "expand"} <= set(stats.phases))
+        self.assertEqual(stats.phases["read"].calls, 6)
+        self.assertLessEqual(
+            sum(phase.seconds for phase in stats.phases.values()),
+            stats.seconds)
+
+        includes = {
+            (kind, os.path.basename(filename), macros): include
+            for (kind, filename, macros), include in stats.includes.items()}
+        member = includes["survey", "member.hcs", (("member", "1"),)]
+
+        self.assertEqual(
+            (member.calls, member.cached, member.rows, member.bytes),
+            (2, 1, 4, 2 * len(FILES["member.hcs"])))
+        self.assertEqual(
+            includes["choices", "choices.hcc", ()].rows, 4)
+
+        self.assertEqual(
+            sum(event["event"] == "include" for event in events), 6)
+        self.assertEqual(
+            json.loads(json.dumps(stats.as_dict()))["includes"][0]["kind"],
+            "choices")
+        self.assertIn("member.hcs member='2'", stats.table())
+
+    def test_prefetch(self):
+        with profiling(Profile()) as serial:
+            compile_survey(FORM, self.path, Session())
+
+        parsed = []
+
+        class RecordingProfile(Profile):
+            def parse(self, kind, filename, seconds):
+                parsed.append(os.path.basename(filename))
+                super().parse(kind, filename, seconds)
+
+        with unittest.mock.patch.dict(
+                prefetch.PARALLEL_MIN_SIZE, {"pyparsing": 0}):
+            with profiling(RecordingProfile()) as stats:
+                compile_survey(FORM, self.path, Session(jobs=2))
+
+        self.assertEqual(stats.phases["read"].calls,
+                         serial.phases["read"].calls)
+        self.assertEqual(sorted(parsed), sorted(FILES))
+        self.assertFalse(stats.parsed)
+
+    def test_inactive(self):
+        self.assertIs(profile.phase("parse"), profile.NO_PHASE)
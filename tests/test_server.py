@@ -0,0 +1,185 @@
+import http.client
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import openpyxl
+
+from honeybee.comb_to_xlsform.server import CompileServer, make_server
+
+
+FORM = (
+    '@choices "choices.hcc"\n'
+    'likes select_one yes_no: "Do you like honey?"\n')
+
+CHOICES = (
+    'list yes_no:\n'
+    '    1 "Yes"\n'
+    '    0 "No"\n')
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(cls.root.name, "form"))
+
+        with open(os.path.join(cls.root.name, "form", "choices.hcc"),
+                  "w") as f:
+            f.write(CHOICES)
+
+        cls.compile_server = CompileServer(cls.root.name, 1, "pyparsing")
+        cls.server = make_server(cls.compile_server, port=0)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever,
+                         daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.compile_server.pool.shutdown()
+        cls.root.cleanup()
+
+    def post(self, **request):
+        request = urllib.request.Request(
+            f"{self.url}/compile", json.dumps(request).encode("utf-8"))
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, json.load(error)
+
+    def stats(self):
+        with urllib.request.urlopen(f"{self.url}/stats") as response:
+            return json.load(response)
+
+    def test_xlsx(self):
+        status, body = self.post(code=FORM, include_path="form")
+
+        self.assertEqual(status, 200)
+
+        workbook = openpyxl.load_workbook(io.BytesIO(body))
+        self.assertEqual(
+            [row[:2] for row in workbook["choices"].values],
+            [("list_name", "value"), ("yes_no", "1"), ("yes_no", "0")])
+
+    def test_xform(self):
+        status, body = self.post(
+            code=FORM, include_path="form", format="xform", name="honey")
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'<data id="honey">', body)
+
+    def test_errors(self):
+        requests = self.stats()["requests"]
+
+        status, body = self.post(code="likes text", include_path="form")
+        self.assertEqual(status, 422)
+
+        status, body = self.post(code=FORM, include_path="..")
+        self.assertEqual(status, 400)
+        self.assertEqual(body["error"], "include_path is outside the root.")
+
+        status, body = self.post(code=FORM, format="csv")
+        self.assertEqual(status, 400)
+
+        status, body = self.post(code=FORM, include_path=["form"])
+        self.assertEqual(status, 400)
+        self.assertEqual(body["error"], "include_path must be a string.")
+
+        self.assertEqual(self.stats()["requests"], requests + 4)
+
+    def test_content_length(self):
+        errors = self.stats()["errors"]
+
+        for length in (None, "x", "-1"):
+            connection = http.client.HTTPConnection(
+                "127.0.0.1", self.server.server_port)
+            connection.putrequest("POST", "/compile")
+
+            if length is not None:
+                connection.putheader("Content-Length", length)
+
+            connection.endheaders()
+
+            with connection.getresponse() as response:
+                self.assertEqual(response.status, 400)
+                self.assertIn("Content-Length", json.load(response)["error"])
+
+            connection.close()
+
+        self.assertEqual(self.stats()["errors"], errors + 3)
+
+    def test_outside_root(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".hcc") as f:
+            f.write(CHOICES)
+            f.flush()
+
+            for filename in (os.path.relpath(f.name, os.path.join(
+                    self.root.name, "form")), f.name):
+                status, body = self.post(
+                    code=f'@choices "{filename}"\n',
+                    include_path="form")
+
+                self.assertEqual(status, 422)
+                self.assertIn("is outside the root.", body["error"])
+
+    def test_internal_error(self):
+        errors = self.stats()["errors"]
+
+        status, body = self.post(code="@form x\n")
+
+        self.assertEqual(status, 500)
+        self.assertEqual(self.stats()["errors"], errors + 1)
+
+    def test_cache(self):
+        self.post(code=FORM, include_path="form")
+        hits = self.stats()["cache_hits"]
+        self.post(code=FORM, include_path="form")
+
+        self.assertGreater(self.stats()["cache_hits"], hits)
+
+
+class TestUnixServer(unittest.TestCase):
+    def test_stats(self):
+        with tempfile.TemporaryDirectory() as path:
+            compile_server = CompileServer(path, 1, "pyparsing")
+            filename = os.path.join(path, "server.sock")
+            server = make_server(compile_server, socket=filename)
+            threading.Thread(target=server.serve_forever,
+                             daemon=True).start()
+
+            try:
+                with socket.socket(socket.AF_UNIX) as client:
+                    client.connect(filename)
+                    client.sendall(b"GET /stats HTTP/1.0\r\n\r\n")
+                    response = client.makefile("rb").read()
+            finally:
+                server.shutdown()
+                server.server_close()
+                compile_server.pool.shutdown()
+
+        self.assertTrue(response.startswith(b"HTTP/1.1 200"))
+        self.assertEqual(
+            json.loads(response.split(b"\r\n\r\n", 1)[1])["requests"], 0)
+
+    def test_not_a_socket(self):
+        with tempfile.NamedTemporaryFile() as f:
+            compile_server = CompileServer(
+                os.path.dirname(f.name), 1, "pyparsing")
+
+            try:
+                with self.assertRaises(ValueError):
+                    make_server(compile_server, socket=f.name)
+            finally:
+                compile_server.pool.shutdown()
+
+            self.assertTrue(os.path.exists(f.name))
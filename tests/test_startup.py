@@ -0,0 +1,88 @@
+import subprocess
+import sys
+import unittest
+
+import argh
+
+from honeybee.comb_to_xlsform import (
+    QUICK_FLAGS, QUICK_OPTIONS, quick_arguments)
+from honeybee.comb_to_xlsform.command import main
+
+
+# Modules that take tens of milliseconds to import, which only the
+# code paths that use them should import.
+#
+HEAVY = ("argh", "openpyxl", "pyparsing", "xml.sax")
+
+
+def imported_modules(module):
+    "Return the modules that importing `module` imports, from -X importtime."
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True, capture_output=True, text=True)
+
+    return {line.split("|")[-1].strip()
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:")}
+
+
+class TestStartup(unittest.TestCase):
+    def test_lazy_imports(self):
+        for module in ("honeybee.comb_to_xlsform", "honeybee.lint"):
+            imported = imported_modules(module)
+
+            self.assertIn(module, imported)
+
+            for heavy in HEAVY:
+                self.assertNotIn(heavy, imported, msg=module)
+
+    def test_quick_arguments(self):
+        self.assertEqual(
+            quick_arguments(["form.hcs", "-o", "-", "-f", "xform", "-n"]),
+            {"input_filename": "form.hcs", "output_filename": "-",
+             "format": "xform", "parser": "pyparsing", "no_cache": True})
+        self.assertEqual(
+            quick_arguments(["-j", "2", "form.hcs", "-o", "form.xlsx"]),
+            {"input_filename": "form.hcs", "output_filename": "form.xlsx",
+             "format": "xlsx", "parser": "pyparsing", "jobs": 2})
+
+        for argv in (["-h"], ["serve"], ["form.hcs"],
+                     ["form.hcs", "-o", "out.xlsx", "--watch"],
+                     ["form.hcs", "-o", "out.xlsx", "-f", "pdf"],
+                     ["form.hcs", "-o", "out.xml", "-f", "xform", "-s"],
+                     ["form.hcs", "-o", "-", "-f", "csv"],
+                     ["form.hcs", "-o", "out.xlsx", "-e", "ten"],
+                     ["form.hcs", "--output-filename=out.xlsx"],
+                     ["a.hcs", "b.hcs", "-o", "out.xlsx"]):
+            self.assertIsNone(quick_arguments(argv), msg=argv)
+
+    def test_quick_arguments_match_argh(self):
+        parser = argh.ArghParser()
+        parser.set_default_command(main)
+
+        values = {"output_filename": "out.xlsx", "format": "xform",
+                  "parser": "fast", "cache_dir": "cache",
+                  "external_threshold": "5", "jobs": "2"}
+        arguments = [(name, [option, values[name]])
+                     for option, name in QUICK_OPTIONS.items()]
+        arguments += [(name, [flag]) for flag, name in QUICK_FLAGS.items()]
+
+        for name, argv in arguments:
+            if name != "output_filename":
+                argv = ["-o", "out.xlsx"] + argv
+
+            argv = ["form.hcs"] + argv
+            quick = quick_arguments(argv)
+
+            self.assertIsNotNone(quick, msg=argv)
+            self.assertEqual(
+                quick[name], vars(parser.parse_args(argv))[name], msg=argv)
+
+    def test_csv_to_stdout(self):
+        with self.assertRaisesRegex(argh.CommandError, "format=csv"):
+            main("form.hcs", "-", format="csv")
+
+    def test_packrat_with_fast(self):
+        with self.assertRaisesRegex(argh.CommandError, "pyparsing"):
+            main("form.hcs", "out.xlsx", parser="fast", packrat=True)
@@ -0,0 +1,72 @@
+import os
+
+import openpyxl
+
+from honeybee.comb_to_xlsform import comb_to_xlsx
+from honeybee.comb_to_xlsform.cache import DiskCache
+from honeybee.comb_to_xlsform.session import Session
+
+from project import ProjectTestCase
+
+
+CHOICES = (
+    'list inner:\n'
+    '    1 "One"\n')
+
+INCLUDE = (
+    '@choices "inner.hcc"\n'
+    'b_${!n} integer: "B" hint "H"\n'
+    'if ${b_${!n}} > 1:\n'
+    '    c_${!n} text: "C"\n')
+
+SURVEY = (
+    '@form "f" "1" "F"\n'
+    'a text: "A"\n'
+    '@include "inc.hcs" n "1"\n'
+    'group g "G":\n'
+    '    @include "inc.hcs" n "2"\n'
+    '@include "inc.hcs" n "1"\n')
+
+
+class TestStream(ProjectTestCase):
+    FILES = {"inc.hcs": INCLUDE, "inner.hcc": CHOICES}
+
+    def compile(self, code, stream, session=None):
+        filename = os.path.join(self.path, f"{stream}.xlsx")
+        comb_to_xlsx(code, self.path, filename, session, stream)
+
+        workbook = openpyxl.load_workbook(filename)
+
+        return {title: [list(row) for row in workbook[title].values]
+                for title in ("survey", "choices", "settings")}
+
+    def test_same_workbook(self):
+        expected = self.compile(SURVEY, False)
+
+        self.assertEqual(self.compile(SURVEY, True), expected)
+        self.assertEqual(
+            expected["choices"][0], ["list_name", "value", "label"])
+
+    def test_cached(self):
+        expected = self.compile(SURVEY, False)
+
+        for index in range(2):
+            session = Session(
+                cache=DiskCache(os.path.join(self.path, "cache")))
+
+            self.assertEqual(
+                self.compile(SURVEY, True, session), expected)
+
+    def test_no_settings(self):
+        code = 'a text: "A"\n'
+
+        self.assertEqual(
+            self.compile(code, True), self.compile(code, False))
+
+    def test_memo_size(self):
+        expected = self.compile(SURVEY, False)
+        session = Session(memo_size=1)
+
+        self.assertEqual(self.compile(SURVEY, True, session), expected)
+        self.assertLessEqual(len(session.trees), 1)
+        self.assertLessEqual(len(session.templates), 1)
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from honeybee.comb_to_xlsform.common import substitute_macros
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import (
+    parse_survey_code, compile_survey)
+
+
+MODULE = (
+    'member_${!member}_name text:\n'
+    '    "What is the name of member ${!member}?"\n'
+    'if ${member_${!member}_name} != "":\n'
+    '    member_${!member}_age integer: "Age of ${!member}"\n')
+
+VALUES = ("1", "head", "Household head", "if", "1a", 'say "hi"', "")
+
+
+class TestTemplate(unittest.TestCase):
+    def test_same_tree(self):
+        session = Session()
+
+        for value in VALUES:
+            macros = {"member": value}
+
+            try:
+                expected = parse_survey_code(
+                    substitute_macros(MODULE, macros))
+            except Exception as error:
+                expected = type(error)
+
+            try:
+                tree = session.instantiate(
+                    "survey", MODULE, macros, parse_survey_code)
+            except Exception as error:
+                tree = type(error)
+
+            self.assertEqual(tree, expected, msg=value)
+
+    def test_parsed_once(self):
+        calls = []
+
+        def parse(code, parser):
+            calls.append(code)
+            return parse_survey_code(code, parser)
+
+        session = Session()
+
+        for index in range(5):
+            session.instantiate(
+                "survey", MODULE, {"member": str(index)}, parse)
+
+        self.assertEqual(len(calls), 1)
+
+    def test_unknown_macro(self):
+        with tempfile.TemporaryDirectory() as path:
+            with open(os.path.join(path, "module.hcs"), "w") as f:
+                f.write(MODULE)
+
+            with self.assertRaisesRegex(
+                    NameError, r"^Unknown macro: member\.$"):
+                compile_survey(
+                    '@include "module.hcs" person "1"\n', path)
@@ -0,0 +1,114 @@
+import os
+import unittest.mock
+
+import argh
+
+from honeybee.comb_to_xlsform.cache import MemoryCache
+from honeybee.comb_to_xlsform.command import main
+from honeybee.comb_to_xlsform.session import Session
+from honeybee.comb_to_xlsform.survey import compile_survey
+from honeybee.comb_to_xlsform.watch import Watcher
+
+from project import ProjectTestCase
+
+
+class TestWatch(ProjectTestCase):
+    FILES = {
+        "main.hcs": '@include "a.hcs"\n@include "b.hcs"\n',
+        "a.hcs": 'a text: "A"\n',
+        "b.hcs": 'b text: "B"\n',
+    }
+
+    def setUp(self):
+        self.writes = 0
+        super().setUp()
+
+        self.session = Session(cache=MemoryCache())
+        self.builds = []
+
+        self.watcher = Watcher(
+            os.path.join(self.path, "main.hcs"), self.build, self.session)
+
+    def write(self, filename, code):
+        filename = super().write(filename, code)
+
+        # Each write gets its own time, whatever the resolution of the
+        # timestamps of the file system.
+        #
+        self.writes += 1
+        os.utime(filename, ns=(self.writes * 10**9, self.writes * 10**9))
+
+        return filename
+
+    def build(self):
+        with open(os.path.join(self.path, "main.hcs")) as f:
+            survey = compile_survey(f.read(), self.path, self.session)
+
+        self.builds.append([row["name"] for row in survey.survey])
+
+    def test_rebuild(self):
+        self.watcher.build()
+
+        self.assertEqual(self.builds, [["a", "b"]])
+        self.assertEqual(self.watcher.changed(), [])
+        self.assertEqual(
+            {os.path.basename(filename)
+             for filename in self.watcher.files()},
+            {"main.hcs", "a.hcs", "b.hcs"})
+
+        self.write("b.hcs", 'b text: "B"\nc text: "C"\n')
+        changed = self.watcher.changed()
+
+        self.assertEqual(
+            changed, [os.path.join(self.path, "b.hcs")])
+
+        hits = self.session.cache.hits
+        self.watcher.build(changed)
+
+        self.assertEqual(self.builds[-1], ["a", "b", "c"])
+        self.assertEqual(self.session.cache.hits - hits, 1)
+        self.assertEqual(self.watcher.changed(), [])
+
+    def test_new_include(self):
+        self.watcher.build()
+
+        self.write("d.hcs", 'd text: "D"\n')
+        self.write("a.hcs", 'a text: "A"\n@include "d.hcs"\n')
+        self.watcher.build(self.watcher.changed())
+
+        self.assertEqual(self.builds[-1], ["a", "d", "b"])
+
+        self.write("d.hcs", 'e text: "E"\n')
+        self.watcher.build(self.watcher.changed())
+
+        self.assertEqual(self.builds[-1], ["a", "e", "b"])
+
+    def test_stale_trees(self):
+        self.watcher.build()
+
+        for index in range(3):
+            self.write("b.hcs", f'b{index} text: "B"\n')
+            self.watcher.build(self.watcher.changed())
+
+        self.assertEqual(self.builds[-1], ["a", "b2"])
+        codes = [code for kind, code
+                 in [*self.session.trees, *self.session.templates]]
+
+        self.assertTrue(any("b2" in code for code in codes))
+        self.assertFalse(
+            any("b0" in code or "b1" in code for code in codes))
+
+    def test_cache_options(self):
+        for options in ({"no_cache": True}, {"cache_dir": self.path}):
+            with self.assertRaises(argh.CommandError):
+                main(os.path.join(self.path, "main.hcs"),
+                     os.path.join(self.path, "main.xlsx"),
+                     watch=True, **options)
+
+    def test_main_returns_after_watching(self):
+        with unittest.mock.patch.object(Watcher, "run") as run:
+            self.assertIsNone(
+                main(os.path.join(self.path, "main.hcs"),
+                     os.path.join(self.path, "main.xlsx"), watch=True))
+
+        run.assert_called_once_with()
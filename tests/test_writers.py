@@ -0,0 +1,70 @@
+import contextlib
+import csv
+import io
+import json
+import os
+
+import openpyxl
+
+from honeybee.comb_to_xlsform.survey import compile_survey
+from honeybee.comb_to_xlsform.writers import (
+    write_csv, write_ndjson, write_xlsx)
+
+from project import ProjectTestCase
+
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "example")
+
+
+class TestWriters(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+
+        with open(os.path.join(EXAMPLE, "survey.hcs")) as f:
+            self.survey = compile_survey(f.read(), EXAMPLE)
+
+        filename = os.path.join(self.path, "form.xlsx")
+        write_xlsx(self.survey, filename)
+
+        workbook = openpyxl.load_workbook(filename)
+        self.sheets = {
+            worksheet: [["" if value is None else str(value)
+                         for value in row]
+                        for row in workbook[worksheet].values]
+            for worksheet in ("survey", "choices", "settings")}
+
+    def test_csv(self):
+        write_csv(self.survey, os.path.join(self.path, "form.csv"))
+
+        for worksheet, rows in self.sheets.items():
+            filename = os.path.join(self.path, f"form.{worksheet}.csv")
+
+            with open(filename, newline="") as f:
+                self.assertEqual(list(csv.reader(f)), rows)
+
+    def test_ndjson_stdout(self):
+        out = io.StringIO()
+
+        with contextlib.redirect_stdout(out):
+            write_ndjson(self.survey, "-")
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        for worksheet, rows in self.sheets.items():
+            objects = [line["row"] for line in lines
+                       if line["sheet"] == worksheet]
+
+            self.assertEqual(len(objects), len(rows) - 1)
+
+            for values, row in zip(objects, rows[1:]):
+                self.assertEqual(
+                    values,
+                    {name: value for name, value in zip(rows[0], row)
+                     if value != ""})
+                self.assertEqual(
+                    list(values), [name for name in rows[0]
+                                   if name in values])
+
+    def test_csv_stdout(self):
+        with self.assertRaisesRegex(ValueError, "needs a filename"):
+            write_csv(self.survey, "-")
@@ -0,0 +1,120 @@
+import os
+import unittest
+import xml.etree.ElementTree as ET
+
+from honeybee.comb_to_xlsform.external import split_external_choices
+from honeybee.comb_to_xlsform.model import Survey
+from honeybee.comb_to_xlsform.survey import compile_survey
+from honeybee.comb_to_xlsform.xform import write_xform
+from honeybee.comb_to_xlsform.xlsx import write_xlsx
+
+from project import ProjectTestCase
+
+try:
+    from pyxform.xls2xform import convert
+except ImportError:
+    convert = None
+
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "example")
+
+SURVEY = (
+    '@form rich "1" "Rich Form"\n'
+    '@choices "rich.hcc"\n'
+    'age integer: "Age" hint "In years, ${age}"\n'
+    'weight decimal: "Weight"\n'
+    'fruits select_multiple fruit: "Fruits?" appearance minimal\n'
+    'group details "Details" appearance "field-list" if ${age} > 17:\n'
+    '    job text: "Job of ${age}"\n'
+    '    ok acknowledge: "OK?"\n'
+    'repeat people "People" repeat_count "${age}":\n'
+    '    pname text: "Name"\n'
+    '    group inner "Inner":\n'
+    '        page integer: "Age of ${pname}"'
+    ' relevance "${pname} != \'\'"\n'
+    '    total calculate: "${page} + ${weight}"\n')
+
+CHOICES = (
+    'list fruit:\n'
+    '    "apple" "Apple"\n'
+    '    "pear" "Pear"\n')
+
+
+def normalize(text):
+    return " ".join((text or "").split())
+
+
+def canonical(element):
+    "Return an XML element as nested tuples, ignoring whitespace."
+
+    return (element.tag,
+            sorted(element.attrib.items()),
+            normalize(element.text),
+            normalize(element.tail),
+            [canonical(child) for child in element])
+
+
+@unittest.skipIf(convert is None, "pyxform is not installed")
+class TestXForm(ProjectTestCase):
+    def assertConforms(self, code, include_path, threshold=None):
+        survey = compile_survey(code, include_path)
+
+        if threshold is not None:
+            survey = split_external_choices(survey, threshold, self.path)
+
+        xlsx = os.path.join(self.path, "form.xlsx")
+        xform = os.path.join(self.path, "form.xml")
+
+        write_xlsx(survey, xlsx)
+        write_xform(survey, xform)
+
+        expected = ET.fromstring(convert(xlsx).xform)
+
+        self.assertEqual(
+            canonical(ET.parse(xform).getroot()), canonical(expected))
+
+    def test_example(self):
+        with open(os.path.join(EXAMPLE, "survey.hcs")) as f:
+            self.assertConforms(f.read(), EXAMPLE)
+
+    def test_groups(self):
+        self.write("rich.hcc", CHOICES)
+
+        self.assertConforms(SURVEY, self.path)
+
+    def test_external(self):
+        with open(os.path.join(EXAMPLE, "survey.hcs")) as f:
+            self.assertConforms(f.read(), EXAMPLE, 2)
+
+    def test_or_other(self):
+        self.write("rich.hcc", CHOICES)
+
+        self.assertConforms(
+            '@choices "rich.hcc"\n'
+            'fruit select_one fruit or_other: "Fruit?"\n'
+            'repeat people "People":\n'
+            '    fruits select_multiple fruit or_other: "Fruits?"'
+            ' relevance "${fruit} = \'apple\'"\n', self.path)
+
+    def test_external_or_other(self):
+        self.write("rich.hcc", CHOICES)
+
+        self.assertConforms(
+            '@choices "rich.hcc"\n'
+            'fruit select_one fruit or_other: "Fruit?"\n', self.path, 1)
+
+    def test_or_other_from_file(self):
+        survey = Survey(
+            survey=[{"name": "a", "label": "A",
+                     "type": "select_one_from_file a.csv or_other"}],
+            choices=[],
+            settings=[])
+
+        with self.assertRaisesRegex(ValueError, r"^or_other with a list"):
+            write_xform(survey, os.path.join(self.path, "form.xml"))
+
+    def test_unknown_reference(self):
+        survey = compile_survey('a text: "A ${b}"\n', self.path)
+
+        with self.assertRaisesRegex(NameError, r"^Unknown question"):
+            write_xform(survey, os.path.join(self.path, "form.xml"))
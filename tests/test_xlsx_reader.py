@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from unittest import mock
+
+import openpyxl
+
+from honeybee.xlsx_reader import (
+    OpenpyxlWorkbook, XlsxWorkbook, header_rows, open_workbook)
+
+
+MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+RELATIONSHIPS = ("http://schemas.openxmlformats.org/officeDocument/"
+                 "2006/relationships")
+
+# A workbook as another spreadsheet program might write it, with a
+# namespace prefix, rich and phonetic text, inline strings, a formula
+# and rows and cells left out.
+#
+PARTS = {
+    "_rels/.rels": (
+        '<Relationships><Relationship Id="rId1" Type="http://schemas.'
+        'openxmlformats.org/officeDocument/2006/relationships/'
+        'officeDocument" Target="book/main.xml"/></Relationships>'),
+    "book/main.xml": (
+        f'<x:workbook xmlns:x="{MAIN}" xmlns:r="{RELATIONSHIPS}">'
+        '<x:sheets><x:sheet name="survey" sheetId="1" r:id="rId7"/>'
+        '</x:sheets></x:workbook>'),
+    "book/_rels/main.xml.rels": (
+        '<Relationships><Relationship Id="rId7" Type="http://schemas.'
+        'openxmlformats.org/officeDocument/2006/relationships/worksheet"'
+        ' Target="sheets/one.xml"/><Relationship Id="rId8" Type="http://'
+        'schemas.openxmlformats.org/officeDocument/2006/relationships/'
+        'sharedStrings" Target="/book/strings.xml"/></Relationships>'),
+    "book/strings.xml": (
+        f'<x:sst xmlns:x="{MAIN}"><x:si><x:t>type</x:t></x:si>'
+        '<x:si><x:r><x:t>na</x:t></x:r><x:r><x:t>me</x:t></x:r>'
+        '<x:rPh><x:t>ignored</x:t></x:rPh></x:si>'
+        '<x:si><x:t xml:space="preserve"> A &amp; B </x:t></x:si>'
+        '</x:sst>'),
+    "book/sheets/one.xml": (
+        f'<x:worksheet xmlns:x="{MAIN}"><x:sheetData>'
+        '<x:row r="1"><x:c r="A1" t="s"><x:v>0</x:v></x:c>'
+        '<x:c r="B1" t="s"><x:v>1</x:v></x:c>'
+        '<x:c r="D1" t="inlineStr"><x:is><x:t>label</x:t></x:is></x:c>'
+        '</x:row>'
+        '<x:row r="2"><x:c r="A2" t="inlineStr"><x:is><x:r><x:t>inte'
+        '</x:t></x:r><x:r><x:t>ger</x:t></x:r></x:is></x:c>'
+        '<x:c r="B2"><x:v>12</x:v></x:c>'
+        '<x:c r="D2" t="s"><x:v>2</x:v></x:c></x:row>'
+        '<x:row r="4"><x:c t="b"><x:v>1</x:v></x:c><x:c><x:v>2.5</x:v>'
+        '</x:c><x:c><x:f>1+2</x:f><x:v>3</x:v></x:c>'
+        '<x:c t="b"><x:v>0</x:v></x:c></x:row>'
+        '<x:row r="5"/>'
+        '</x:sheetData></x:worksheet>'),
+}
+
+
+class TestXlsxReader(unittest.TestCase):
+    def test_parts(self):
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, "form.xlsx")
+
+            with zipfile.ZipFile(filename, "w") as archive:
+                for name, data in PARTS.items():
+                    archive.writestr(name, data)
+
+            with XlsxWorkbook(filename) as workbook:
+                sheet = workbook.sheet("survey")
+
+                self.assertEqual(
+                    list(sheet),
+                    [("type", "name", "", "label"),
+                     ("integer", "12", "", " A & B "),
+                     (),
+                     ("True", "2.5", "=1+2")])
+                self.assertEqual(len(list(sheet)), 4)
+
+                with self.assertRaisesRegex(KeyError, "choices"):
+                    workbook.sheet("choices")
+
+    def workbook(self, path):
+        workbook = openpyxl.Workbook()
+        survey = workbook.active
+        survey.title = "survey"
+        survey.append(["type", "name", "label", "required"])
+        survey.append(["integer", "age", "Age", True])
+        survey.append([None, None, None, 0])
+        survey.append(["calculate", "double", 3.0, "=B2*2"])
+        survey.append(["note", "n", "x" * 300, 10 ** 20])
+
+        filename = os.path.join(path, "form.xlsx")
+        workbook.save(filename)
+
+        return filename
+
+    def test_openpyxl(self):
+        with tempfile.TemporaryDirectory() as path:
+            filename = self.workbook(path)
+
+            with XlsxWorkbook(filename) as fast, \
+                    OpenpyxlWorkbook(filename) as slow:
+                # openpyxl pads rows to the width of the sheet.
+                self.assertEqual(
+                    [dict(row) for row in header_rows(
+                        fast.sheet("survey"))],
+                    [dict(row) for row in header_rows(
+                        slow.sheet("survey"))])
+
+    def test_fallback(self):
+        with tempfile.TemporaryDirectory() as path:
+            filename = self.workbook(path)
+
+            with mock.patch.object(XlsxWorkbook, "find_sheets",
+                                   side_effect=KeyError("rId1")):
+                with open_workbook(filename) as workbook:
+                    self.assertIsInstance(workbook, OpenpyxlWorkbook)
+                    self.assertEqual(
+                        next(iter(workbook.sheet("survey"))),
+                        ("type", "name", "label", "required"))
+
+    def test_header_rows(self):
+        rows = list(header_rows([("type", "name", "label"),
+                                 ("text", "a"),
+                                 ()]))
+
+        self.assertEqual(dict(rows[0]),
+                         {"type": "text", "name": "a", "label": ""})
+        self.assertEqual(rows[1].get("hint"), None)
+        self.assertEqual(rows[1]["type"], "")
+        self.assertEqual([row.number for row in rows], [2, 3])
+        self.assertEqual("%(name)s" % rows[0], "a")